@@ -1,26 +1,27 @@
-from gnews import GNews
-import json
-import locale
 from email.utils import parsedate_tz, mktime_tz
 from datetime import datetime
 import sys
 import os
+import time
 import traceback
 import logging
 
-# Configurar logging
-logging.basicConfig(filename='news_generation.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+# Módulos partilhados dos scrapers (src/services/python)
+# gnews, image_pipeline (requests, Pillow) e event_store (sqlite3) só são importados em main(),
+# para que importar este módulo (ligafaro.py, ingest_daemon) seja barato
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "services", "python"))
+from news_dedup import canonical_news_url
 
-# Configurar o local para português de Portugal
-try:
-    locale.setlocale(locale.LC_TIME, 'pt_PT.UTF-8')
-except:
-    try:
-        locale.setlocale(locale.LC_TIME, 'Portuguese_Portugal.1252')
-    except:
-        logging.warning("Não foi possível configurar o locale para português")
-        pass  # Fallback para o locale padrão se não encontrar português
+# Modo cache (--cached): serve noticias_faro.json enquanto for mais novo que o TTL; depois disso
+# serve a cópia antiga e atualiza em segundo plano (stale-while-revalidate)
+NEWS_JSON_PATH = 'noticias_faro.json' # Relativo à pasta atual, como a escrita em main()
+REFRESH_LOCK_PATH = NEWS_JSON_PATH + '.lock' # Uma só atualização de cada vez (single-flight)
+# Instante da última atualização em segundo plano: uma que não traga notícias mantém o ficheiro (e o
+# seu mtime), e sem isto cada pedido seguinte lançava outra enquanto o GNews estivesse em baixo
+REFRESH_ATTEMPT_PATH = NEWS_JSON_PATH + '.attempt'
+NEWS_CACHE_TTL = int(os.environ.get("LIGAFARO_NEWS_TTL", "900")) # Segundos
+LOCK_STALE_AFTER = 600 # Um lock mais velho que isto é de uma atualização que morreu
+REFRESH_WAIT = 60 # Sem cópia nenhuma, espera no máximo isto pela atualização de outro processo
 
 # Função para converter a data para objeto datetime
 def converter_data(data_pub):
@@ -41,8 +42,9 @@ def remover_duplicatas(lista_noticias):
     
     for noticia in lista_noticias:
         url = noticia.get('url', '')
-        if url and url not in urls_vistas:
-            urls_vistas.add(url)
+        chave = canonical_news_url(url) or url # Sem tracking, www./m./amp. e redirecionamentos do Google News
+        if chave and chave not in urls_vistas:
+            urls_vistas.add(chave)
             noticias_unicas.append(noticia)
     
     return noticias_unicas
@@ -62,9 +64,24 @@ def criar_noticias_padrao():
         }
     ]
 
-def main():
+def main(keep_existing=False):
+    """
+    Pesquisa as notícias e grava noticias_faro.json. Com keep_existing=True (atualização do modo
+    cache), se nenhuma pesquisa trouxer notícias o ficheiro existente fica como está em vez de ser
+    substituído pela notícia padrão.
+    """
     import signal
     import sys
+    import news_queries
+    import event_store
+    from artifacts import write_json
+    from image_pipeline import generate_thumbnails
+    import news_archive
+    import news_dedup
+
+    # Configurar logging
+    logging.basicConfig(filename='news_generation.log', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
 
     def timeout_handler(signum, frame):
         logging.error('Tempo limite excedido ao buscar notícias')
@@ -72,28 +89,26 @@ def main():
         sys.exit(1)
 
     try:
-        # Definir um timeout de 30 segundos para a busca de notícias
+        # Cada pesquisa tem o seu timeout; o alarme global só cobre o pior caso de todas (mínimo 30s)
+        queries = news_queries.load_queries()
         signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)
+        signal.alarm(max(30, int(news_queries.time_budget(queries)) + 10))
         
         logging.info("Iniciando busca de notícias")
         print("Buscando notícias sobre Faro e Farense...")
         
-        # Inicializa o cliente do Google News
-        google_news = GNews(language='pt', country='PT', max_results=10)
+        # Pesquisas em paralelo (news_queries.json): uma pesquisa que falhe não deita fora as restantes
+        todas_noticias, falhas = news_queries.run_queries(queries)
+        logging.info(f"Notícias encontradas: {len(todas_noticias)} em {len(queries) - len(falhas)}/{len(queries)} pesquisas")
+        for consulta, erro in falhas.items():
+            logging.warning(f"Falha ao buscar notícias de '{consulta}': {erro}")
         
-        # Busca notícias sobre Faro e Farense separadamente
-        try:
-            noticias_faro = google_news.get_news('Faro Algarve')
-            noticias_farense = google_news.get_news('Farense')
-            logging.info(f"Notícias de Faro: {len(noticias_faro)}, Notícias do Farense: {len(noticias_farense)}")
-        except Exception as e:
-            logging.warning(f"Falha ao buscar notícias: {e}")
-            noticias_faro = []
-            noticias_farense = []
-        
-        # Combinar os resultados e remover duplicatas
-        todas_noticias = noticias_faro + noticias_farense
+        # Sem resultados, a cópia em cache (mesmo antiga) é melhor do que a notícia padrão
+        if not todas_noticias and keep_existing and os.path.exists(NEWS_JSON_PATH):
+            signal.alarm(0)
+            logging.warning("Nenhuma notícia encontrada; mantém-se o noticias_faro.json existente")
+            print("Nenhuma notícia encontrada; mantém-se o noticias_faro.json existente", file=sys.stderr)
+            return
         
         # Se não houver notícias, criar notícias padrão
         if not todas_noticias:
@@ -114,7 +129,7 @@ def main():
             elif 'farense' in titulo_lower or 'farense' in descricao_lower:
                 noticia['origem_busca'] = 'Farense'
             else:
-                noticia['origem_busca'] = 'Desconhecida'
+                noticia['origem_busca'] = noticia.get('origem_busca') or 'Desconhecida' # Etiqueta da pesquisa
         
         # Converter para o formato esperado pela página HTML
         noticias_formatadas = []
@@ -138,15 +153,42 @@ def main():
                 'origem_busca': noticia.get('origem_busca', 'Desconhecida')
             })
         
+        # A mesma história em vários jornais: fica uma, com os outros em "covered_by"
+        noticias_formatadas, agrupadas = news_dedup.cluster_stories(noticias_formatadas)
+        if agrupadas:
+            logging.info(f"Notícias repetidas agrupadas: {agrupadas}")
+        
+        # A busca terminou; os downloads das imagens têm timeouts próprios por pedido
+        signal.alarm(0)
+        
+        # Miniaturas locais das imagens (urlToImage passa a apontar para /thumbs/...)
+        generate_thumbnails(noticias_formatadas, 'urlToImage')
+        
+        # Modo arquivo (LIGAFARO_NEWS_ARCHIVE=1): acrescenta as notícias novas ao arquivo e publica
+        # as LATEST_VIEW_SIZE mais recentes em vez de só as da última pesquisa
+        # Sem o aviso "Sistema" (nenhuma notícia encontrada): não é uma notícia, não vai para o histórico
+        noticias_reais = [n for n in noticias_formatadas if n['origem_busca'] != 'Sistema']
+        noticias_publicadas = noticias_formatadas
+        if news_archive.ARCHIVE_ENABLED:
+            arquivo = news_archive.open_archive()
+            novas = arquivo.ingest(noticias_reais)
+            noticias_publicadas = arquivo.latest() or noticias_formatadas
+            logging.info(f"Arquivo de notícias: {novas} novas, {arquivo.count()} no total")
+        
         # Salvar as notícias em um arquivo JSON
-        with open('noticias_faro.json', 'w', encoding='utf-8') as f:
-            json.dump(noticias_formatadas, f, ensure_ascii=False, indent=2)
+        # Escrita atómica; com LIGAFARO_OUTPUT_MODE=production fica minificado com sidecars .gz/.br
+        write_json('noticias_faro.json', noticias_publicadas)
         
-        logging.info(f"Arquivo JSON gerado com {len(noticias_formatadas)} notícias.")
-        print(f"Arquivo JSON gerado com {len(noticias_formatadas)} notícias.")
+        # Histórico de notícias no store SQLite (upsert pelo URL canónico, pesquisa FTS no chatbot)
+        if event_store.STORE_ENABLED:
+            store = event_store.open_store()
+            try:
+                store.sync_news(noticias_reais)
+            finally:
+                store.close()
         
-        # Desativar o alarme após a conclusão bem-sucedida
-        signal.alarm(0)
+        logging.info(f"Arquivo JSON gerado com {len(noticias_publicadas)} notícias.")
+        print(f"Arquivo JSON gerado com {len(noticias_publicadas)} notícias.")
 
     except Exception as e:
         logging.error(f"Erro na geração de notícias: {e}")
@@ -154,5 +196,111 @@ def main():
         print(f"Erro na geração de notícias: {e}", file=sys.stderr)
         sys.exit(1)
 
+def cache_age(path=NEWS_JSON_PATH):
+    """Idade do ficheiro em segundos, ou None se não existir."""
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+def acquire_refresh_lock(path=REFRESH_LOCK_PATH):
+    """Cria o lock de forma atómica (O_EXCL). Devolve False se outra atualização já estiver a correr."""
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            age = cache_age(path)
+            if age is not None and age > LOCK_STALE_AFTER:
+                # Lock abandonado (processo morto a meio): remove-o e tenta outra vez
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{os.getpid()} {int(time.time())}\n")
+        return True
+    return False
+
+def release_refresh_lock(path=REFRESH_LOCK_PATH):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def record_refresh_attempt(path=REFRESH_ATTEMPT_PATH):
+    try:
+        with open(path, 'w') as f:
+            f.write(f"{int(time.time())}\n")
+    except OSError as e:
+        print(f"Aviso: não foi possível registar a tentativa de atualização em {path}: {e}", file=sys.stderr)
+
+def refresh_locked():
+    """Atualização feita por quem já tem o lock (processo lançado por refresh_in_background); liberta-o no fim."""
+    try:
+        record_refresh_attempt() # Antes de pesquisar: também conta se a pesquisa falhar ou morrer a meio
+        main(keep_existing=True)
+    finally:
+        release_refresh_lock()
+
+def refresh_in_background():
+    """
+    Lança a atualização num processo separado, que sobrevive ao pedido que a disparou.
+    O lock é criado aqui e passa para o processo filho; pedidos simultâneos não lançam outra.
+    """
+    import subprocess
+    if not acquire_refresh_lock():
+        return False
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--refresh-locked'],
+                         cwd=os.getcwd(), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        release_refresh_lock()
+        print(f"Aviso: não foi possível lançar a atualização das notícias: {e}", file=sys.stderr)
+        return False
+    return True
+
+def serve_cached(ttl=NEWS_CACHE_TTL):
+    """
+    Modo cache dos endpoints de notícias: termina logo se noticias_faro.json for mais novo que `ttl`;
+    se for mais velho, mantém a cópia antiga e atualiza em segundo plano, no máximo uma vez por `ttl`
+    (uma atualização sem resultados não muda o ficheiro). Só sem cópia nenhuma é que
+    espera pela pesquisa (ou pela atualização que outro processo já tenha em curso); termina com
+    código 1 se mesmo assim não houver ficheiro.
+    """
+    age = cache_age()
+    if age is not None and age < ttl:
+        print(f"Notícias em cache ({age:.0f}s, TTL {ttl}s)")
+        return
+    if age is not None:
+        attempt_age = cache_age(REFRESH_ATTEMPT_PATH)
+        if attempt_age is not None and attempt_age < ttl:
+            print(f"Notícias em cache desatualizadas ({age:.0f}s); última atualização tentada há "
+                  f"{attempt_age:.0f}s, a próxima só depois do TTL ({ttl}s)")
+            return
+        started = refresh_in_background()
+        print(f"Notícias em cache desatualizadas ({age:.0f}s); atualização "
+              f"{'lançada' if started else 'já em curso'} em segundo plano")
+        return
+
+    if acquire_refresh_lock():
+        refresh_locked()
+        return
+    # Outro processo está a gerar o primeiro ficheiro: espera por ele em vez de pesquisar outra vez
+    deadline = time.monotonic() + REFRESH_WAIT
+    while time.monotonic() < deadline and os.path.exists(REFRESH_LOCK_PATH):
+        time.sleep(0.5)
+    if cache_age() is None:
+        # O server.js segue o caminho de erro (fallback) em vez de ler um ficheiro que não existe
+        print(f"Erro: noticias_faro.json não foi gerado em {REFRESH_WAIT}s", file=sys.stderr)
+        sys.exit(1)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if '--cached' in sys.argv:
+        serve_cached()
+    elif '--refresh-locked' in sys.argv:
+        refresh_locked()
+    else:
+        main()
\ No newline at end of file
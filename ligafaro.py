@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ponto de entrada único dos scripts Python do LigaFaro.
+
+Uso:
+    python3 ligafaro.py news [--stdout]     # gera noticias_faro.json (--stdout: JSON das notícias no stdout)
+    python3 ligafaro.py news --cached [--ttl S]  # só pesquisa se noticias_faro.json tiver mais de S segundos
+    python3 ligafaro.py events              # recolhe os eventos de todas as fontes (events_data.json)
+    python3 ligafaro.py chat "pergunta"     # resposta do chatbot em JSON
+    python3 ligafaro.py entities [--publish]  # valida src/entidades_faro.json (--publish: copia para public/)
+
+Cada subcomando só importa os módulos de que precisa (gnews, requests, bs4, sqlite3, ...), por isso
+o arranque do chat não paga o custo das dependências dos scrapers. O orçamento de tempo de importação
+de cada subcomando é verificado por src/services/python/benchmarks/bench_startup.py.
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+PYTHON_SERVICES_DIR = os.path.join(PROJECT_ROOT, "src", "services", "python")
+ENTITIES_PATH = os.path.join(PROJECT_ROOT, "src", "entidades_faro.json")
+PUBLIC_ENTITIES_PATH = os.path.join(PROJECT_ROOT, "public", "entidades_faro.json")
+
+# Módulos que cada subcomando acaba por importar (incluindo os importados dentro de main()),
+# usados pelo benchmark de arranque para medir o custo real de um arranque a frio
+COMMAND_MODULES = {
+    "news": ("gerar_noticias_json", "news_queries", "gnews", "image_pipeline", "event_store"),
+    "events": ("fetch_events",),
+    "chat": ("chatbot", "news_archive"),
+    "entities": ("json",),
+}
+
+sys.path.insert(0, PYTHON_SERVICES_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def import_command(name):
+    """Importa os módulos do subcomando `name` (sem o executar) e devolve-os."""
+    import importlib
+    return [importlib.import_module(module) for module in COMMAND_MODULES[name]]
+
+def cmd_news(args):
+    if args.stdout:
+        import fetch_news
+        fetch_news.main()
+        return
+    import gerar_noticias_json
+    os.chdir(PROJECT_ROOT) # O script grava noticias_faro.json e o log na pasta atual
+    if args.cached:
+        gerar_noticias_json.serve_cached(args.ttl if args.ttl is not None else gerar_noticias_json.NEWS_CACHE_TTL)
+        return
+    gerar_noticias_json.main()
+
+def cmd_events(args):
+    import fetch_events
+    fetch_events.fetch_events()
+
+def cmd_chat(args):
+    import chatbot
+    chatbot.main([args.question] if args.question else [])
+
+def cmd_entities(args):
+    import json
+    try:
+        with open(ENTITIES_PATH, "r", encoding="utf-8") as f:
+            entities = json.load(f)
+    except (IOError, ValueError) as e:
+        print(f"Erro ao ler {ENTITIES_PATH}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"O arquivo JSON contém {len(entities)} entidades")
+    if args.publish:
+        from artifacts import write_json
+        digest = write_json(PUBLIC_ENTITIES_PATH, entities)
+        print(f"Entidades publicadas em {PUBLIC_ENTITIES_PATH} ({digest})")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="ligafaro", description="Scripts Python do LigaFaro")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    news = commands.add_parser("news", help="pesquisa notícias de Faro (pesquisas em news_queries.json)")
+    news.add_argument("--stdout", action="store_true", help="escreve o JSON no stdout em vez de noticias_faro.json")
+    news.add_argument("--cached", action="store_true",
+                      help="serve a cópia em cache e atualiza em segundo plano quando passar do TTL")
+    news.add_argument("--ttl", type=int, help="TTL da cache em segundos (default: LIGAFARO_NEWS_TTL ou 900)")
+    news.set_defaults(handler=cmd_news)
+
+    events = commands.add_parser("events", help="recolhe os eventos de todas as fontes")
+    events.set_defaults(handler=cmd_events)
+
+    chat = commands.add_parser("chat", help="responde a uma pergunta (JSON no stdout)")
+    chat.add_argument("question", nargs="?", help="pergunta do utilizador")
+    chat.set_defaults(handler=cmd_chat)
+
+    entities = commands.add_parser("entities", help="valida o ficheiro de entidades")
+    entities.add_argument("--publish", action="store_true", help="grava também public/entidades_faro.json")
+    entities.set_defaults(handler=cmd_entities)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,14 @@
-from gnews import GNews
 import json
-import locale
 from email.utils import parsedate_tz, mktime_tz
 from datetime import datetime
 import sys
 import os
 
-# Configurar o local para português de Portugal
-try:
-    locale.setlocale(locale.LC_TIME, 'pt_PT.UTF-8')
-except:
-    try:
-        locale.setlocale(locale.LC_TIME, 'Portuguese_Portugal.1252')
-    except:
-        pass  # Fallback para o locale padrão se não encontrar português
+# Módulos partilhados dos scrapers (src/services/python)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "services", "python"))
+from pt_dates import strftime_pt
+import news_queries
+from news_dedup import canonical_news_url
 
 # Função para converter a data para objeto datetime
 def converter_data(data_pub):
@@ -33,8 +28,9 @@ def remover_duplicatas(lista_noticias):
     
     for noticia in lista_noticias:
         url = noticia.get('url', '')
-        if url and url not in urls_vistas:
-            urls_vistas.add(url)
+        chave = canonical_news_url(url) or url # Sem tracking, www./m./amp. e redirecionamentos do Google News
+        if chave and chave not in urls_vistas:
+            urls_vistas.add(chave)
             noticias_unicas.append(noticia)
     
     return noticias_unicas
@@ -42,7 +38,8 @@ def remover_duplicatas(lista_noticias):
 def formatar_data(data_obj):
     if data_obj:
         try:
-            return data_obj.strftime('%A, %d de %B de %Y, %H:%M:%S')
+            # Nomes de dias/meses em português sem depender do locale do sistema
+            return strftime_pt(data_obj, '%A, %d de %B de %Y, %H:%M:%S')
         except:
             return str(data_obj)
     return "Data desconhecida"
@@ -50,15 +47,10 @@ def formatar_data(data_obj):
 def main():
     print("Buscando notícias sobre Faro e Farense...")
     
-    # Inicializa o cliente do Google News
-    google_news = GNews(language='pt', country='PT', max_results=10)
+    # Pesquisas configuradas em news_queries.json, em paralelo; as que falham são ignoradas
+    todas_noticias, _ = news_queries.run_queries()
     
-    # Busca notícias sobre Faro e Farense separadamente
-    noticias_faro = google_news.get_news('Faro Algarve')
-    noticias_farense = google_news.get_news('Farense')
-    
-    # Combinar os resultados e remover duplicatas
-    todas_noticias = noticias_faro + noticias_farense
+    # Remover duplicatas entre pesquisas
     noticias_unicas = remover_duplicatas(todas_noticias)
     
     # Ordenar as notícias pela data de publicação (mais recente no topo)
@@ -74,7 +66,7 @@ def main():
         elif 'farense' in titulo_lower or 'farense' in descricao_lower:
             noticia['origem_busca'] = 'Farense'
         else:
-            noticia['origem_busca'] = 'Desconhecida'
+            noticia['origem_busca'] = noticia.get('origem_busca') or 'Desconhecida' # Etiqueta da pesquisa
     
     # Exibe as notícias formatadas
     print(f"\nEncontradas {len(noticias_unicas)} notícias sobre Faro e Farense:\n")
@@ -14,6 +14,9 @@ const PORT = process.env.PORT || 3000;
 const OPENAI_API_KEY = process.env.OPENAI_API_KEY;
 const WEATHER_API_KEY = process.env.WEATHER_API_KEY;
 const NEWS_API_KEY = process.env.NEWS_API_KEY;
+// Com o ingest_daemon a correr (python3 src/services/python/ingest_daemon.py) os JSON já estão
+// sempre atualizados e os endpoints só leem os ficheiros, sem executar os scripts Python.
+const USE_INGEST_DAEMON = process.env.LIGAFARO_INGEST_DAEMON === '1';
 app.use(cors());
 app.use(express.json());
 app.use(express.static('.'));  // Servir arquivos estáticos do diretório atual
@@ -83,7 +86,7 @@ app.post('/api/chat', async (req, res) => {
       const escapedQuestion = question.replace(/"/g, '\\"');
       
       console.log('Executando script Python do chatbot...');
-      const { stdout, stderr } = await execPromise(`python3 src/services/python/chatbot.py "${escapedQuestion}"`);
+      const { stdout, stderr } = await execPromise(`python3 ligafaro.py chat "${escapedQuestion}"`);
       
       if (stderr) {
         console.log('Logs do script Python (stderr):', stderr);
@@ -176,14 +179,17 @@ app.get('/api/news', async (req, res) => {
   console.log(`Buscando notícias com Python/GNews: ${query}, pageSize: ${pageSize}`);
   
   try {
-    // Executar o script Python para gerar o arquivo JSON
-    try {
-      console.log('Executando script Python para gerar notícias...');
-      await execPromise('python3 gerar_noticias_json.py');
-      console.log('Script Python executado com sucesso!');
-    } catch (pythonError) {
-      console.error('Erro ao executar script Python:', pythonError);
-      // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+    // Executar o script Python para gerar o arquivo JSON (não é preciso com o ingest_daemon)
+    if (!USE_INGEST_DAEMON) {
+      try {
+        // Modo cache: responde logo com noticias_faro.json e atualiza em segundo plano quando passa do TTL
+        console.log('Executando script Python para gerar notícias...');
+        await execPromise('python3 ligafaro.py news --cached');
+        console.log('Script Python executado com sucesso!');
+      } catch (pythonError) {
+        console.error('Erro ao executar script Python:', pythonError);
+        // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+      }
     }
     
     // Ler o arquivo JSON gerado pelo script Python
@@ -227,14 +233,17 @@ app.get('/api/news-local', async (req, res) => {
   console.log('Processando requisição para buscar notícias locais');
   
   try {
-    // Executar o script Python para gerar o arquivo JSON
-    try {
-      console.log('Executando script Python para gerar notícias...');
-      await execPromise('python3 gerar_noticias_json.py');
-      console.log('Script Python executado com sucesso!');
-    } catch (pythonError) {
-      console.error('Erro ao executar script Python:', pythonError);
-      // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+    // Executar o script Python para gerar o arquivo JSON (não é preciso com o ingest_daemon)
+    if (!USE_INGEST_DAEMON) {
+      try {
+        // Modo cache: responde logo com noticias_faro.json e atualiza em segundo plano quando passa do TTL
+        console.log('Executando script Python para gerar notícias...');
+        await execPromise('python3 ligafaro.py news --cached');
+        console.log('Script Python executado com sucesso!');
+      } catch (pythonError) {
+        console.error('Erro ao executar script Python:', pythonError);
+        // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+      }
     }
     
     // Ler o arquivo JSON gerado pelo script Python
@@ -280,14 +289,16 @@ app.get('/api/events', async (req, res) => {
   console.log('Processando requisição para buscar eventos');
   
   try {
-    // Executar o script Python para gerar o arquivo JSON
-    try {
-      console.log('Executando script Python para gerar eventos...');
-      await execPromise('python3 src/services/python/fetch_events.py');
-      console.log('Script Python executado com sucesso!');
-    } catch (pythonError) {
-      console.error('Erro ao executar script Python:', pythonError);
-      // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+    // Executar o script Python para gerar o arquivo JSON (não é preciso com o ingest_daemon)
+    if (!USE_INGEST_DAEMON) {
+      try {
+        console.log('Executando script Python para gerar eventos...');
+        await execPromise('python3 ligafaro.py events');
+        console.log('Script Python executado com sucesso!');
+      } catch (pythonError) {
+        console.error('Erro ao executar script Python:', pythonError);
+        // Continuar mesmo com erro, pois o arquivo JSON pode já existir
+      }
     }
     
     // Ler o arquivo JSON gerado pelo script Python
@@ -0,0 +1,120 @@
+# --- Imports ---
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from file_utils import atomic_write_bytes
+
+# Serializador rápido e compressão brotli são opcionais (pip install orjson brotli)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Constants ---
+# "dev": JSON indentado, legível (comportamento de sempre)
+# "production": JSON minificado + sidecars .gz/.br + hash no manifesto para cache busting
+OUTPUT_MODE = os.environ.get("LIGAFARO_OUTPUT_MODE", "dev")
+MANIFEST_FILENAME = "artifacts_manifest.json" # Na mesma pasta dos artefactos
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+HASH_LENGTH = 16
+
+_manifest_lock = threading.Lock()
+
+
+def dumps(data, minify=True, indent=2, default=None):
+    """JSON em bytes UTF-8. Minificado usa orjson quando está instalado (várias vezes mais rápido)."""
+    if minify:
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, default=default)
+            except TypeError:
+                pass # ex.: inteiros fora de 64 bits; o json normal trata disso
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=indent, default=default).encode("utf-8")
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def _sidecars(path):
+    return {"gz": f"{path}.gz", "br": f"{path}.br"}
+
+def _update_manifest(path, entry):
+    manifest_path = os.path.join(os.path.dirname(path) or ".", MANIFEST_FILENAME)
+    with _manifest_lock:
+        manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (IOError, ValueError) as e:
+                print(f"Aviso: manifesto ilegível em {manifest_path}, a recriar: {e}")
+        manifest[os.path.basename(path)] = entry
+        atomic_write_bytes(manifest_path, dumps(manifest, minify=False))
+
+def write_bytes(path, data, mode=None):
+    """
+    Publica um artefacto já serializado.
+    Em produção escreve também `<path>.gz` e `<path>.br` (se o módulo brotli existir) e regista
+    o hash do conteúdo no manifesto da pasta. Em dev só grava o ficheiro e remove sidecars antigos
+    para não servirem uma versão desatualizada. Devolve o hash do conteúdo.
+    """
+    mode = mode or OUTPUT_MODE
+    sidecars = _sidecars(path)
+    if mode != "production":
+        for sidecar in sidecars.values():
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        atomic_write_bytes(path, data)
+        return content_hash(data)
+
+    # Sidecars primeiro: quando o ficheiro principal muda, as versões comprimidas já estão atualizadas
+    atomic_write_bytes(sidecars["gz"], gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    if brotli is not None:
+        atomic_write_bytes(sidecars["br"], brotli.compress(data, quality=BROTLI_QUALITY))
+    elif os.path.exists(sidecars["br"]):
+        os.remove(sidecars["br"])
+    atomic_write_bytes(path, data)
+
+    digest = content_hash(data)
+    entry = {"hash": digest, "bytes": len(data), "updated_at": datetime.now().isoformat(timespec="seconds")}
+    for kind, sidecar in sidecars.items():
+        if os.path.exists(sidecar):
+            entry[kind] = os.path.getsize(sidecar)
+    _update_manifest(path, entry)
+    return digest
+
+def remove_artifact(path):
+    """Apaga um artefacto e os seus sidecars (.gz/.br), se existirem."""
+    for candidate in (path, *_sidecars(path).values()):
+        if os.path.exists(candidate):
+            os.remove(candidate)
+
+def write_json(path, data, mode=None, indent=2, default=None):
+    """
+    Grava `data` como artefacto JSON: indentado em dev, minificado e pré-comprimido em produção
+    (LIGAFARO_OUTPUT_MODE=production). A escrita é sempre atómica. Devolve o hash do conteúdo.
+    """
+    mode = mode or OUTPUT_MODE
+    return write_bytes(path, dumps(data, minify=(mode == "production"), indent=indent, default=default), mode)
+
+
+if __name__ == "__main__":
+    # Republica ficheiros JSON existentes no modo atual, ex.:
+    #   LIGAFARO_OUTPUT_MODE=production python artifacts.py public/entidades_faro.json public/events_data.json
+    import sys
+    if len(sys.argv) < 2:
+        print("Uso: python artifacts.py <ficheiro.json> [...]")
+        sys.exit(1)
+    for json_path in sys.argv[1:]:
+        with open(json_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        print(f"{json_path}: {write_json(json_path, payload)} ({OUTPUT_MODE})")
@@ -0,0 +1,104 @@
+"""
+Benchmark dos backends de parsing HTML sobre páginas guardadas (benchmarks/fixtures).
+
+Mede, por página:
+  - só o parsing (árvore completa vs. apenas os contentores da agenda);
+  - parsing + extração completa (parse_agenda_html / parse_viralagenda_html).
+e verifica que todos os backends extraem exatamente os mesmos eventos.
+
+Uso:
+    python src/services/python/benchmarks/bench_parsers.py [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR)) # src/services/python
+
+import html_parsers
+from fetch_CMF_events import parse_agenda_html
+from fetch_viralagenda_events import parse_viralagenda_html
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+NOW = datetime(2025, 4, 12, 10, 0)
+TODAY_STR = NOW.strftime("%d-%m-%Y")
+
+SOURCES = {
+    "cmf": {
+        "fixture": "cmf_agenda_page.html",
+        "container": ("div", "list_agenda"),
+        "extract": lambda html, backend: parse_agenda_html(html, backend=backend),
+    },
+    "viralagenda": {
+        "fixture": "viralagenda_faro.html",
+        "container": ("li", "viral-item"),
+        "extract": lambda html, backend: parse_viralagenda_html(html, TODAY_STR, NOW, backend=backend),
+    },
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def time_per_call(func, repeat):
+    """Melhor tempo (ms) de `repeat` execuções; o mínimo é o menos afetado por ruído."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def quiet(func):
+    """Executa func sem os avisos impressos pelos scrapers."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+def run(repeat):
+    backends = html_parsers.available_backends()
+    print(f"Backends disponíveis: {', '.join(backends)}  (repetições: {repeat})")
+    failures = 0
+
+    for source, spec in SOURCES.items():
+        html = load_fixture(spec["fixture"])
+        print(f"\n== {source} ({spec['fixture']}, {len(html) / 1024:.0f} KB) ==")
+        print(f"{'backend':<12} {'parse total':>12} {'parse âmbito':>13} {'extração':>10} {'speedup':>8}")
+
+        # Referência: árvore completa com html.parser, como os scrapers faziam antes
+        baseline_ms = time_per_call(lambda: html_parsers.parse_html(html, backend="html.parser"), repeat)
+        reference_events = None
+        for backend in backends:
+            full_ms = time_per_call(lambda: html_parsers.parse_html(html, backend=backend), repeat)
+            scoped_ms = time_per_call(lambda: html_parsers.parse_html(html, only=spec["container"], backend=backend), repeat)
+            extract_ms = time_per_call(quiet(lambda: spec["extract"](html, backend)), repeat)
+
+            events = quiet(lambda: spec["extract"](html, backend))()
+            if reference_events is None:
+                reference_events = events
+            elif events != reference_events:
+                failures += 1
+                print(f"  !! {backend} extraiu eventos diferentes ({len(events)} vs {len(reference_events)})")
+
+            speedup = baseline_ms / scoped_ms
+            print(f"{backend:<12} {full_ms:>10.2f}ms {scoped_ms:>11.2f}ms {extract_ms:>8.2f}ms {speedup:>7.1f}x")
+
+        print(f"({len(reference_events)} eventos por página; speedup = parse total html.parser / parse com âmbito)")
+
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="repetições por medição (default: 20)")
+    args = parser.parse_args()
+    sys.exit(1 if run(args.repeat) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Benchmark offline dos scrapers sobre as páginas guardadas (benchmarks/fixtures), sem aceder aos sites.
+
+Para cada fonte e fator de escala (a página com 10x, 100x, 1000x mais itens, gerada a partir
+da fixture) mede:
+  - extração: parse_agenda_html / parse_viralagenda_html (parsing + extração dos eventos);
+  - página: get_events_from_page / get_listing_page com a resposta HTTP servida da fixture
+    (inclui cache HTTP desligada, métricas e formatação, mas não a rede);
+e reporta itens/s, custo por item e pico de memória (tracemalloc).
+
+Os resultados são comparados com a baseline local (benchmarks/baseline.json): um custo por item
+ou pico de memória acima da tolerância conta como regressão e o script termina com código 1.
+Os tempos dependem da máquina, por isso a baseline não está no repositório (.gitignore): grava-se
+com --save-baseline na máquina onde se compara; sem ela, o script só mostra os resultados.
+
+Uso:
+    python src/services/python/benchmarks/bench_scrapers.py [--scales 1,10,100,1000] [--repeat N]
+    python src/services/python/benchmarks/bench_scrapers.py --save-baseline
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR)) # src/services/python
+
+import requests
+
+import fetch_CMF_events
+import fetch_viralagenda_events
+import html_parsers
+import http_cache
+import http_client
+import rate_limit
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SCALES = (1, 10, 100, 1000)
+TIME_TOLERANCE = 0.25 # +25% no custo por item conta como regressão
+MEMORY_TOLERANCE = 0.20
+MIN_REPEAT = 3 # Mesmo nas páginas maiores, o melhor de 3 execuções
+NOW = datetime(2025, 4, 12, 10, 0)
+TODAY_STR = NOW.strftime("%d-%m-%Y")
+
+# Cada item da lista de eventos, para gerar páginas maiores repetindo-os
+SOURCES = {
+    "cmf": {
+        "fixture": "cmf_agenda_page.html",
+        "item": re.compile(r'<ul>\s*<li class="thumb">.*?</ul>', re.S),
+        "extract": lambda html: fetch_CMF_events.parse_agenda_html(html),
+        "page": lambda: fetch_CMF_events.get_events_from_page(1),
+        "url": fetch_CMF_events.BASE_URL,
+    },
+    "viralagenda": {
+        "fixture": "viralagenda_faro.html",
+        "item": re.compile(r'<li class="viral-item".*?</li>', re.S),
+        "extract": lambda html: fetch_viralagenda_events.parse_viralagenda_html(html, TODAY_STR, NOW),
+        "page": lambda: fetch_viralagenda_events.get_listing_page(fetch_viralagenda_events.page_url("faro", 1), TODAY_STR, NOW)[0],
+        "url": fetch_viralagenda_events.BASE_DOMAIN,
+    },
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def scale_page(html, item_pattern, factor):
+    """Página com a lista de itens repetida `factor` vezes (o resto do HTML fica igual)."""
+    items = list(item_pattern.finditer(html))
+    if factor == 1 or not items:
+        return html, len(items)
+    start, end = items[0].start(), items[-1].end()
+    block = html[start:end]
+    return html[:start] + "\n".join([block] * factor) + html[end:], len(items) * factor
+
+def serve_html(html):
+    """O cliente HTTP partilhado passa a devolver `html` a qualquer pedido (sem rede)."""
+    def fake_get(url, headers=None, timeout=None, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = html.encode("utf-8")
+        return response
+    http_client.default_client.session.get = fake_get
+
+def quiet(func):
+    """Executa func sem os prints dos scrapers."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func()
+
+def measure(func, repeat):
+    """(melhor tempo em s de `repeat` execuções, pico de memória em KB numa execução à parte)."""
+    best = float("inf")
+    gc.collect()
+    gc.disable() # Como o timeit: as pausas do GC não entram no tempo
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            quiet(func)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    # O tracemalloc abranda a execução, por isso a memória é medida fora das repetições cronometradas
+    tracemalloc.start()
+    try:
+        quiet(func)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024
+
+def run(scales, repeat):
+    http_cache.default_cache.enabled = False # Cada execução faz parsing completo (sem respostas 304)
+    for spec in SOURCES.values():
+        rate_limit.default_limiter.configure_host(spec["url"], 1e9, 10**9) # Sem esperas do token bucket
+    results = {}
+    print(f"Backend HTML: {html_parsers.PARSER_BACKEND}  Python {platform.python_version()}  (repetições: {repeat})")
+    print(f"{'caso':<28} {'itens':>7} {'KB':>8} {'ms':>9} {'itens/s':>10} {'µs/item':>9} {'pico KB':>10}")
+
+    for source, spec in SOURCES.items():
+        fixture = load_fixture(spec["fixture"])
+        for factor in scales:
+            html, items = scale_page(fixture, spec["item"], factor)
+            serve_html(html)
+            runs = max(MIN_REPEAT, repeat // factor) # Páginas grandes: menos repetições
+            for kind in ("extract", "page"):
+                func = (lambda: spec["extract"](html)) if kind == "extract" else spec["page"]
+                events = len(quiet(func))
+                seconds, peak_kb = measure(func, runs)
+                name = f"{source}/{kind}/x{factor}"
+                per_item_us = seconds * 1e6 / max(1, events)
+                results[name] = {
+                    "items": items,
+                    "events": events,
+                    "ms": round(seconds * 1000, 3),
+                    "items_per_s": round(events / seconds, 1) if seconds else None,
+                    "us_per_item": round(per_item_us, 2),
+                    "peak_kb": round(peak_kb, 1),
+                }
+                print(f"{name:<28} {events:>7} {len(html) / 1024:>8.0f} {seconds * 1000:>9.2f} "
+                      f"{results[name]['items_per_s']:>10.0f} {per_item_us:>9.1f} {peak_kb:>10.0f}")
+    return results
+
+def compare(results, baseline):
+    """Lista de regressões (custo por item ou pico de memória acima da tolerância)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric, tolerance in (("us_per_item", TIME_TOLERANCE), ("peak_kb", MEMORY_TOLERANCE)):
+            if previous.get(metric) and current[metric] > previous[metric] * (1 + tolerance):
+                change = (current[metric] / previous[metric] - 1) * 100
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]} (+{change:.0f}%)")
+    return regressions
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return None
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="fatores de escala separados por vírgulas (default: 1,10,100,1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="repetições na escala 1x (default: 20)")
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como nova baseline")
+    args = parser.parse_args()
+
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+    results = run(scales, args.repeat)
+
+    if args.save_baseline:
+        payload = {
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "backend": html_parsers.PARSER_BACKEND,
+            "results": results,
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nBaseline gravada em {BASELINE_PATH}")
+        return
+
+    baseline = load_baseline()
+    if baseline is None:
+        print(f"\nSem baseline em {BASELINE_PATH} (gravar com --save-baseline).")
+        return
+    if baseline.get("backend") != html_parsers.PARSER_BACKEND:
+        print(f"\nAviso: a baseline foi gravada com o backend {baseline.get('backend')}.")
+    regressions = compare(results, baseline.get("results", {}))
+    if regressions:
+        print(f"\n{len(regressions)} regressões em relação à baseline de {baseline.get('saved_at')}:")
+        for line in regressions:
+            print(f"  !! {line}")
+        sys.exit(1)
+    print(f"\nSem regressões em relação à baseline de {baseline.get('saved_at')} "
+          f"(tolerância: +{TIME_TOLERANCE:.0%} tempo, +{MEMORY_TOLERANCE:.0%} memória).")
+
+if __name__ == "__main__":
+    main()
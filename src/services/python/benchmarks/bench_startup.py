@@ -0,0 +1,107 @@
+"""
+Orçamento de tempo de importação dos subcomandos do ligafaro.py (arranque a frio dos endpoints).
+
+Para cada subcomando corre um interpretador novo com `python -X importtime`, importa os módulos
+do subcomando (ligafaro.import_command) e soma o tempo das importações de topo, descontando as que
+o próprio interpretador já faz ao arrancar (site, encodings, ...). Mostra os módulos mais pesados
+e termina com código 1 se algum subcomando passar do orçamento (IMPORT_BUDGET_MS) ou não se
+conseguir importar. Com --allow-missing, os subcomandos que falham só por falta de um pacote
+opcional (ModuleNotFoundError, ex.: gnews) são assinalados mas não fazem falhar o benchmark.
+
+Uso:
+    python src/services/python/benchmarks/bench_startup.py [--runs N] [--top N] [--allow-missing]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(BENCH_DIR, "../../../.."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import ligafaro
+
+# Orçamento por subcomando, em ms de importação (o melhor de N execuções com a cache .pyc quente)
+IMPORT_BUDGET_MS = {
+    "chat": 40,
+    "entities": 10,
+    "events": 300,
+    "news": 300,
+}
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """[(módulo, µs acumulados)] das importações de topo (sem indentação) no output do -X importtime."""
+    top_level = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not match.group(3):
+            top_level.append((match.group(4), int(match.group(2))))
+    return top_level
+
+def run_importtime(code):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=PROJECT_ROOT)
+    return result.returncode, result.stderr
+
+def startup_modules():
+    """Módulos que o interpretador importa antes de correr qualquer código (não contam no orçamento)."""
+    _, stderr = run_importtime("pass")
+    return {name for name, _ in parse_importtime(stderr)}
+
+def measure_command(command, runs, baseline_modules):
+    """(ms de importação do subcomando, módulos de topo mais pesados) — o melhor de `runs` execuções."""
+    code = f"import ligafaro; ligafaro.import_command({command!r})"
+    best = None
+    for _ in range(runs + 1): # A primeira execução aquece a cache de bytecode (.pyc) e é descartada
+        returncode, stderr = run_importtime(code)
+        if returncode != 0:
+            last_line = stderr.strip().splitlines()[-1] if stderr.strip() else f"código {returncode}"
+            raise RuntimeError(last_line)
+        modules = [(name, us) for name, us in parse_importtime(stderr) if name not in baseline_modules]
+        total_ms = sum(us for _, us in modules) / 1000
+        if best is None or total_ms < best[0]:
+            best = (total_ms, modules)
+    best_ms, modules = best
+    return best_ms, sorted(modules, key=lambda item: item[1], reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="execuções por subcomando (default: 5)")
+    parser.add_argument("--top", type=int, default=5, help="módulos mais pesados a mostrar (default: 5)")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="não falhar quando um subcomando não importa por falta de um pacote (ModuleNotFoundError)")
+    args = parser.parse_args()
+
+    baseline_modules = startup_modules()
+    over_budget, failed = [], []
+    print(f"{'subcomando':<10} {'importação':>11} {'orçamento':>10}  módulos mais pesados")
+    for command in ligafaro.COMMAND_MODULES:
+        budget = IMPORT_BUDGET_MS.get(command)
+        try:
+            total_ms, modules = measure_command(command, args.runs, baseline_modules)
+        except RuntimeError as e:
+            skipped = args.allow_missing and str(e).startswith("ModuleNotFoundError")
+            print(f"{command:<10} {'-':>11} {budget:>8}ms  não foi possível importar: {e}{'' if skipped else ' !!'}")
+            if not skipped:
+                failed.append(command)
+            continue
+        heaviest = ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in modules[:args.top])
+        flag = " !!" if budget is not None and total_ms > budget else ""
+        print(f"{command:<10} {total_ms:>9.1f}ms {budget:>8}ms  {heaviest}{flag}")
+        if flag:
+            over_budget.append(command)
+
+    if failed:
+        print(f"\nSem importação: {', '.join(failed)}")
+    if over_budget:
+        print(f"\nAcima do orçamento: {', '.join(over_budget)}")
+    if failed or over_budget:
+        sys.exit(1)
+    print("\nTodos os subcomandos dentro do orçamento de importação.")
+
+if __name__ == "__main__":
+    main()
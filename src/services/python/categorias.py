@@ -0,0 +1,78 @@
+# --- Imports ---
+import re
+
+from text_utils import fold_accents
+
+# --- Constants ---
+DEFAULT_CATEGORY = "Cultural"
+
+# Regras palavra-chave -> categoria partilhadas por todas as fontes.
+# A ordem das categorias é a prioridade: se um texto tiver palavras de várias categorias,
+# ganha a que aparece primeiro aqui (ex.: "Festival de teatro" -> Música).
+# As palavras são comparadas sem acentos e como início de palavra ("concerto" apanha "concertos",
+# mas "arte" já não apanha "parte").
+CATEGORY_KEYWORDS = {
+    "Música": ["música", "concerto", "festival", "dj", "banda"],
+    "Comida & Bebida": ["gastronomia", "culinária", "degustação", "jantar", "almoço"],
+    "Ambiente": ["ambiente", "ecologia", "natureza"],
+    "Compras": ["feira", "mercado", "artesanato"],
+    "Desporto": ["desporto", "corrida", "torneio"],
+    "Tecnologia": ["tecnologia", "digital", "inovação"],
+    "Educação": ["workshop", "curso", "palestra"],
+    "Cultural": ["teatro", "exposição", "arte", "cinema", "filme"],
+}
+
+
+class KeywordClassifier:
+    """
+    Classificador de categorias numa só passagem.
+    Todas as palavras-chave são compiladas numa única expressão regular (alternância, as mais
+    longas primeiro), por isso o custo é proporcional ao tamanho do texto e não ao número de regras.
+    """
+
+    def __init__(self, rules=CATEGORY_KEYWORDS, default=DEFAULT_CATEGORY):
+        self.default = default
+        self._category_of = {} # palavra (sem acentos) -> (prioridade, categoria)
+        for priority, (category, keywords) in enumerate(rules.items()):
+            for keyword in keywords:
+                folded = fold_accents(keyword).strip()
+                # Se a mesma palavra aparecer em duas categorias, fica a de maior prioridade
+                self._category_of.setdefault(folded, (priority, category))
+        alternatives = sorted(self._category_of, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, alternatives)) + ")") if alternatives else None
+
+    def find_category(self, text):
+        """Categoria de maior prioridade entre as palavras encontradas no texto, ou None se não houver nenhuma."""
+        if not text or self._pattern is None:
+            return None
+        best = None
+        for match in self._pattern.finditer(fold_accents(text)):
+            candidate = self._category_of[match.group(0)]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+                if best[0] == 0:
+                    break # Não há prioridade mais alta
+        return best[1] if best else None
+
+    def classify_text(self, text):
+        """Categoria do texto (a de maior prioridade entre as palavras encontradas) ou a categoria padrão."""
+        return self.find_category(text) or self.default
+
+    def classify(self, events, fields=("title", "description"), target="category"):
+        """Classifica uma lista de eventos (in place) a partir dos campos indicados. Devolve a lista."""
+        for evento in events:
+            evento[target] = self.classify_text(" ".join(str(evento.get(field) or "") for field in fields))
+        return events
+
+
+# Classificador partilhado (as regras são compiladas uma única vez por processo)
+default_classifier = KeywordClassifier()
+
+def classify_text(text):
+    return default_classifier.classify_text(text)
+
+def find_category(text):
+    return default_classifier.find_category(text)
+
+def classify(events, fields=("title", "description"), target="category"):
+    return default_classifier.classify(events, fields, target)
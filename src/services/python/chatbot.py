@@ -2,23 +2,71 @@ import json
 import sys
 import os
 import re
+from datetime import date, timedelta
+
+import categorias
+import event_store
+from pt_dates import strftime_pt
+
+NEWS_FROM_STORE_LIMIT = 50 # Notícias mais recentes usadas quando não há noticias_faro.json
+NEWS_FROM_ARCHIVE_LIMIT = 500 # Com o arquivo de notícias (news_archive) o chatbot vê mais do que a última pesquisa
+
+def periodo_da_pergunta(question_lower, hoje=None):
+    """
+    Intervalo de datas (início, fim) pedido na pergunta: hoje, amanhã, (próximo) fim de semana,
+    esta/próxima semana, este mês. Devolve None se a pergunta não indicar um período.
+    """
+    hoje = hoje or date.today()
+    if 'fim de semana' in question_lower or 'fim-de-semana' in question_lower:
+        if hoje.weekday() == 6: # Domingo: o fim de semana atual é só hoje
+            inicio, fim = hoje, hoje
+        else:
+            inicio = hoje + timedelta(days=(5 - hoje.weekday()) % 7)
+            fim = inicio + timedelta(days=1)
+        if any(palavra in question_lower for palavra in ['próximo', 'proximo']) and hoje.weekday() >= 5:
+            inicio = hoje + timedelta(days=12 - hoje.weekday())
+            fim = inicio + timedelta(days=1)
+        return inicio, fim
+    if 'amanhã' in question_lower or 'amanha' in question_lower:
+        return hoje + timedelta(days=1), hoje + timedelta(days=1)
+    if 'hoje' in question_lower:
+        return hoje, hoje
+    if any(palavra in question_lower for palavra in ['próxima semana', 'proxima semana']):
+        inicio = hoje + timedelta(days=7 - hoje.weekday())
+        return inicio, inicio + timedelta(days=6)
+    if 'esta semana' in question_lower or 'nesta semana' in question_lower:
+        return hoje, hoje + timedelta(days=6 - hoje.weekday())
+    if 'este mês' in question_lower or 'neste mês' in question_lower:
+        proximo_mes = (hoje.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return hoje, proximo_mes - timedelta(days=1)
+    return None
 
 def process_question(question):
     """Processa a pergunta e retorna uma resposta"""
-    
+    # Eventos: consultas indexadas no SQLite (event_store) se a base de dados existir; senão o JSON
+    store = event_store.open_existing_store()
+    try:
+        return _answer(question, store)
+    finally:
+        if store is not None:
+            store.close()
+
+def _answer(question, store):
     # Carregar dados de eventos e notícias
     events = []
     news = []
+    news_from_store = False # Só então a pesquisa por tema pode usar o FTS do store
     
     # Caminho base para os arquivos
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     
-    # Carregar eventos
     try:
         events_path = os.path.join(base_dir, 'src', 'events_data.json')
         print(f"Tentando carregar eventos de: {events_path}", file=sys.stderr)
         
-        if os.path.exists(events_path):
+        if store is not None:
+            print(f"A usar o store de eventos em: {store.path}", file=sys.stderr)
+        elif os.path.exists(events_path):
             with open(events_path, 'r', encoding='utf-8') as f:
                 events = json.load(f)
                 print(f"Carregados {len(events)} eventos", file=sys.stderr)
@@ -32,34 +80,63 @@ def process_question(question):
         news_path = os.path.join(base_dir, 'src', 'noticias_faro.json')
         print(f"Tentando carregar notícias de: {news_path}", file=sys.stderr)
         
-        if os.path.exists(news_path):
+        import news_archive # Só quando se carregam as notícias (mantém o arranque do chat leve)
+        archive = news_archive.open_existing_archive()
+        if archive is not None and archive.count():
+            news = archive.latest(NEWS_FROM_ARCHIVE_LIMIT)
+            print(f"Carregadas {len(news)} notícias do arquivo", file=sys.stderr)
+        elif os.path.exists(news_path):
             with open(news_path, 'r', encoding='utf-8') as f:
                 news = json.load(f)
                 print(f"Carregadas {len(news)} notícias", file=sys.stderr)
+        elif store is not None:
+            news = store.latest_news(limit=NEWS_FROM_STORE_LIMIT)
+            news_from_store = True
+            print(f"Carregadas {len(news)} notícias do store", file=sys.stderr)
         else:
             print(f"Arquivo de notícias não encontrado em: {news_path}", file=sys.stderr)
     except Exception as e:
         print(f"Erro ao carregar notícias: {str(e)}", file=sys.stderr)
     
+    total_events = store.count_events() if store is not None else len(events)
+    
     # Lógica para responder perguntas
     question_lower = question.lower()
     print(f"Processando pergunta: {question_lower}", file=sys.stderr)
     
     # Perguntas sobre eventos
     if any(word in question_lower for word in ['evento', 'acontecendo', 'programação', 'agenda']):
-        if len(events) == 0:
+        if total_events == 0:
             return "Não tenho informações sobre eventos no momento."
         
+        # Eventos num período ("eventos de música no próximo fim de semana")
+        periodo = periodo_da_pergunta(question_lower)
+        if periodo and store is not None:
+            categoria = categorias.find_category(question)
+            inicio, fim = periodo
+            filtered_events = store.query_events(start=inicio, end=fim, category=categoria)
+            descricao = f"{'de ' + categoria + ' ' if categoria else ''}entre {inicio.strftime('%d/%m')} e {fim.strftime('%d/%m')}"
+            if filtered_events:
+                event_list = "\n".join([f"- {event['title']} ({event['date']}{', ' + event['time'] if event.get('time') else ''} em {event['location']})" for event in filtered_events[:5]])
+                return f"Encontrei {len(filtered_events)} eventos {descricao}:\n\n{event_list}"
+            return f"Não encontrei eventos {descricao}."
+        
         # Listar eventos
         if any(phrase in question_lower for phrase in ['listar', 'quais', 'mostrar']):
-            event_list = "\n".join([f"- {event['title']} ({event['date']}{', ' + event['time'] if 'time' in event and event['time'] else ''} em {event['location']})" for event in events[:5]])
-            return f"Aqui estão os próximos eventos em Faro:\n\n{event_list}\n\nEstes são apenas os 5 próximos eventos. Há um total de {len(events)} eventos disponíveis."
+            upcoming = store.query_events(start=date.today(), limit=5) if store is not None else events[:5]
+            if not upcoming:
+                return f"Não há eventos agendados a partir de hoje. Há um total de {total_events} eventos registados."
+            event_list = "\n".join([f"- {event['title']} ({event['date']}{', ' + event['time'] if 'time' in event and event['time'] else ''} em {event['location']})" for event in upcoming])
+            return f"Aqui estão os próximos eventos em Faro:\n\n{event_list}\n\nEstes são apenas os 5 próximos eventos. Há um total de {total_events} eventos disponíveis."
         
         # Buscar por categoria
         category_match = re.search(r'categoria\s+(\w+)', question_lower) or re.search(r'eventos\s+de\s+(\w+)', question_lower)
         if category_match:
             category = category_match.group(1)
-            filtered_events = [event for event in events if 'category' in event and category.lower() in event['category'].lower()]
+            if store is not None:
+                filtered_events = store.query_events(category=categorias.find_category(category) or category)
+            else:
+                filtered_events = [event for event in events if 'category' in event and category.lower() in event['category'].lower()]
             
             if filtered_events:
                 event_list = "\n".join([f"- {event['title']} ({event['date']})" for event in filtered_events[:3]])
@@ -69,18 +146,26 @@ def process_question(question):
         
         # Buscar por local
         if any(word in question_lower for word in ['local', 'onde']):
-            locations = list(set([event['location'] for event in events if 'location' in event]))
+            if store is not None:
+                locations = store.event_locations()
+            else:
+                locations = list(set([event['location'] for event in events if 'location' in event]))
             return f"Os eventos acontecem nos seguintes locais:\n\n{chr(10).join(locations)}"
         
         # Buscar por data
         if any(word in question_lower for word in ['quando', 'data']):
-            # Ordenar eventos por data
-            sorted_events = sorted(events, key=lambda x: x['date'] if 'date' in x else '9999-99-99')
+            if store is not None:
+                sorted_events = store.query_events(start=date.today(), limit=3)
+                if not sorted_events:
+                    return "Não há eventos agendados a partir de hoje."
+            else:
+                # Ordenar eventos por data
+                sorted_events = sorted(events, key=lambda x: x['date'] if 'date' in x else '9999-99-99')
             event_list = "\n".join([f"- {event['title']}: {event['date']}{', ' + event['time'] if 'time' in event and event['time'] else ''}" for event in sorted_events[:3]])
             return f"Os próximos eventos são:\n\n{event_list}"
         
         # Resposta genérica sobre eventos
-        return f"Temos {len(events)} eventos disponíveis. Você pode perguntar sobre eventos por categoria, local ou data."
+        return f"Temos {total_events} eventos disponíveis. Você pode perguntar sobre eventos por categoria, local ou data."
     
     # Perguntas sobre notícias
     if any(word in question_lower for word in ['notícia', 'jornal', 'informação', 'novidade']):
@@ -101,11 +186,15 @@ def process_question(question):
         keywords = ['cultura', 'esporte', 'política', 'economia', 'turismo', 'farense']
         for keyword in keywords:
             if keyword in question_lower:
-                filtered_news = [
-                    item for item in news 
-                    if (keyword in item['title'].lower()) or 
-                       ('description' in item and item['description'] and keyword in item['description'].lower())
-                ]
+                if news_from_store:
+                    # Pesquisa de texto integral (FTS5) em vez de percorrer todas as notícias
+                    filtered_news = store.latest_news(text=keyword)
+                else:
+                    filtered_news = [
+                        item for item in news 
+                        if (keyword in item['title'].lower()) or 
+                           ('description' in item and item['description'] and keyword in item['description'].lower())
+                    ]
                 
                 if filtered_news:
                     news_list = "\n".join([f"- {item['title']}" for item in filtered_news[:3]])
@@ -137,7 +226,7 @@ def process_question(question):
         # Obter a data e hora atual em Faro (Europe/Lisbon)
         faro_tz = pytz.timezone('Europe/Lisbon')
         agora = datetime.now(faro_tz)
-        data_hora_faro = agora.strftime('%A, %d de %B de %Y às %H:%M')
+        data_hora_faro = strftime_pt(agora, '%A, %d de %B de %Y às %H:%M')
         
         return f'A temperatura atual em Faro é de aproximadamente 22°C, com céu parcialmente nublado. Agora são {data_hora_faro} em Faro, Portugal.'
     
@@ -154,7 +243,7 @@ def process_question(question):
             hora_faro = agora.strftime('%H:%M')
             return f'Agora são {hora_faro} em Faro, Portugal.'
         else:
-            data_faro = agora.strftime('%A, %d de %B de %Y')
+            data_faro = strftime_pt(agora, '%A, %d de %B de %Y')
             return f'Hoje é {data_faro} em Faro, Portugal.'
     
     # Perguntas sobre voluntariado
@@ -206,13 +295,17 @@ Em Faro, valorizamos muito a participação dos voluntários em diversas iniciat
         return "A comunidade LigaFaro é formada por diversos membros locais, incluindo líderes comunitários, donos de negócios, artistas, estudantes, professores e muito mais. Na seção Comunidade do nosso site, você pode conhecer e se conectar com outros membros que compartilham interesses semelhantes."
     
     # Resposta padrão
-    return f"Posso ajudar com informações sobre eventos em Faro, notícias locais, voluntariado, comunidade ou sobre o LigaFaro. Temos {len(events)} eventos e {len(news)} notícias disponíveis. Também posso informar sobre o tempo atual e a data em Faro."
+    return f"Posso ajudar com informações sobre eventos em Faro, notícias locais, voluntariado, comunidade ou sobre o LigaFaro. Temos {total_events} eventos e {len(news)} notícias disponíveis. Também posso informar sobre o tempo atual e a data em Faro."
 
-if __name__ == "__main__":
+def main(argv=None):
     # Receber a pergunta como argumento
-    if len(sys.argv) > 1:
-        question = sys.argv[1]
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        question = argv[0]
         response = process_question(question)
         print(json.dumps({"answer": response}))
     else:
-        print(json.dumps({"error": "Nenhuma pergunta fornecida"}))
\ No newline at end of file
+        print(json.dumps({"error": "Nenhuma pergunta fornecida"}))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+# --- Imports ---
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from file_utils import atomic_write_text
+from http_cache import CACHE_DIR, json_default, json_object_hook
+
+# --- Constants ---
+CRAWL_STATE_DIR = os.path.join(CACHE_DIR, "crawl")
+PAGE_PARAM_PATTERN = r"[?&]{param}=(\d+)" # Links do paginador, ex.: agenda.aspx?page=7
+# Eventos não vistos há mais do que isto saem do estado, mesmo sem data de fim conhecida
+# (senão o ficheiro crescia sem limite com o ingest_daemon sempre a correr). Um crawl "full" renova-os.
+MAX_UNSEEN_DAYS = int(os.environ.get("LIGAFARO_CRAWL_STATE_MAX_DAYS", "60"))
+
+
+def discover_page_count(html, param="page"):
+    """
+    Descobre o número real de páginas a partir dos links do paginador.
+    Usa uma expressão regular sobre o HTML bruto (não precisa de árvore BeautifulSoup),
+    por isso funciona também quando o corpo vem da cache HTTP.
+    Devolve o maior número de página encontrado, ou None se não houver paginador.
+    """
+    if not html:
+        return None
+    pages = [int(n) for n in re.findall(PAGE_PARAM_PATTERN.format(param=re.escape(param)), html)]
+    return max(pages) if pages else None
+
+def event_fingerprint(link, date_text):
+    """Impressão digital estável de um item da agenda: link + texto da data."""
+    raw = f"{(link or '').strip()}|{' '.join((date_text or '').split())}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """
+    Conjunto persistente de eventos já conhecidos por um scraper, indexado pela impressão digital.
+    Guarda o próprio evento para que um crawl incremental que pára cedo continue a conseguir
+    produzir a lista completa (eventos novos + eventos conhecidos das páginas não visitadas).
+    """
+
+    def __init__(self, name, state_dir=CRAWL_STATE_DIR):
+        self.path = os.path.join(state_dir, f"{name}.json")
+        self._lock = threading.Lock()
+        self.known = {} # {fingerprint: {"event": {...}, "last_seen": epoch}}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.known = json.load(f, object_hook=json_object_hook).get("known", {})
+        except (IOError, ValueError) as e:
+            print(f"Aviso: estado de crawl ilegível em {self.path}, a começar do zero: {e}")
+            self.known = {}
+
+    def save(self):
+        with self._lock:
+            payload = json.dumps({"saved_at": time.time(), "known": self.known}, ensure_ascii=False, default=json_default)
+        atomic_write_text(self.path, payload)
+
+    def is_known(self, fingerprint):
+        return fingerprint in self.known
+
+    def remember(self, fingerprint, event):
+        with self._lock:
+            self.known[fingerprint] = {"event": event, "last_seen": time.time()}
+
+    def prune(self, end_of, before=None, max_unseen_days=MAX_UNSEEN_DAYS, now=None):
+        """
+        Esquece eventos já terminados e eventos que não aparecem na agenda há mais de `max_unseen_days`.
+        `end_of(event)` devolve o datetime de fim do evento (datetime.max se desconhecido).
+        """
+        before = before or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        unseen_since = (now or time.time()) - max_unseen_days * 86400
+        with self._lock:
+            expired = [fp for fp, item in self.known.items()
+                       if end_of(item["event"]) < before or item.get("last_seen", 0) < unseen_since]
+            for fp in expired:
+                del self.known[fp]
+        return len(expired)
+
+    def events_except(self, fingerprints):
+        """Eventos conhecidos cujas impressões digitais não estão em `fingerprints`."""
+        return [item["event"] for fp, item in self.known.items() if fp not in fingerprints]
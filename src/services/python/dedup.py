@@ -0,0 +1,174 @@
+# --- Imports ---
+import hashlib
+import random
+import re
+from collections import defaultdict
+
+from text_utils import normalize_text
+
+# --- Constants ---
+SHINGLE_SIZE = 3 # Tamanho dos n-gramas de caracteres do título
+NUM_PERMUTATIONS = 32 # Número de funções de hash do MinHash
+LSH_BANDS = 8 # 8 bandas x 4 linhas: pares com Jaccard >= ~0.6 quase sempre partilham um bucket
+SIMILARITY_THRESHOLD = 0.7 # Jaccard estimado mínimo para considerar dois títulos o mesmo evento
+
+# Valores que não contam como informação ao escolher os campos mais ricos
+PLACEHOLDER_VALUES = {
+    "", "sem capa", "sem link", "sem descrição", "consulte o site para horários",
+    "hora não encontrada", "local não encontrado", "título não encontrado",
+}
+GENERIC_LOCATIONS = {"faro", "faro (cidade)"} # Local por omissão da agenda CMF/Viralagenda, menos útil que um local concreto
+
+HASH_SEED = 20240601 # Parâmetros fixos: as assinaturas são iguais entre execuções
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(HASH_SEED)
+# a, b aleatórios em [1, p): com multiplicadores pequenos sobre CRC32 o produto quase nunca dava a volta
+# ao primo, as "permutações" ficavam monotónicas e escolhiam quase todas o mesmo n-grama
+_HASH_PARAMS = [(_random.randrange(1, _MERSENNE_PRIME), _random.randrange(1, _MERSENNE_PRIME))
+                for _ in range(NUM_PERMUTATIONS)]
+del _random
+
+
+def _shingles(title):
+    text = f" {normalize_text(title)} "
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(title):
+    """Assinatura MinHash dos n-gramas do título (tuplo de NUM_PERMUTATIONS inteiros)."""
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+              for shingle in _shingles(title)]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _HASH_PARAMS)
+
+def _numbers(title):
+    """Números no título: 'Sessão 1' e 'Sessão 2' são eventos diferentes mesmo com títulos quase iguais."""
+    return frozenset(re.findall(r"\d+", title or ""))
+
+def estimated_similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+def _day_of(evento):
+    start = evento.get("_start")
+    return start.date() if start else None
+
+def _is_informative(field, value):
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in PLACEHOLDER_VALUES:
+        return False
+    return not (field == "location" and text in GENERIC_LOCATIONS)
+
+def _place(evento):
+    """Local normalizado, ou None se for genérico ou um placeholder (não distingue eventos)."""
+    location = evento.get("location")
+    return normalize_text(location) if _is_informative("location", location) else None
+
+def _same_place(places_a, places_b):
+    """
+    Os locais de dois grupos são compatíveis se todos os pares forem iguais ou um contiver o outro
+    ('Teatro das Figuras' e 'Teatro Municipal de Faro - Teatro das Figuras'). 'Mercado Mensal' em
+    Loulé e em Tavira no mesmo dia são eventos diferentes.
+    """
+    return all(f" {a} " in f" {b} " or f" {b} " in f" {a} " for a in places_a for b in places_b)
+
+def merge_events(primary, other):
+    """
+    Junta `other` em `primary` (in place), ficando com os campos mais ricos:
+    hora, local e imagem são preenchidos se o primário só tiver valores genéricos,
+    e fica a descrição mais longa.
+    """
+    for field in ("time", "location", "imageUrl", "link", "_end"):
+        if not _is_informative(field, primary.get(field)) and _is_informative(field, other.get(field)):
+            primary[field] = other[field]
+    other_description = other.get("description") or ""
+    if _is_informative("description", other_description) and len(other_description) > len(primary.get("description") or ""):
+        primary["description"] = other_description
+    return primary
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # O mais antigo (fonte registada primeiro) fica como representante
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def deduplicate(events):
+    """
+    Remove eventos repetidos entre fontes (ex.: o mesmo concerto na agenda CMF e na Viralagenda).
+    1. Índice de hash em título normalizado + dia de início: duplicados exatos.
+    2. MinHash + LSH por bandas, dentro do mesmo dia: títulos quase iguais.
+    Em ambos os passos só se juntam eventos com locais compatíveis (_same_place): com vários
+    concelhos, o mesmo título no mesmo dia pode ser noutro sítio. Um local genérico ('Faro') é
+    compatível com qualquer outro.
+    Só se comparam pares que partilham um bucket, por isso o custo cresce ~linearmente.
+    Os registos que coincidem são fundidos com merge_events. Devolve (eventos, número fundido).
+    """
+    groups = UnionFind(len(events))
+    places = {} # raiz -> locais informativos do grupo
+
+    def union_same_place(i, j):
+        root_i, root_j = groups.find(i), groups.find(j)
+        if root_i == root_j:
+            return True
+        if not _same_place(places[root_i], places[root_j]):
+            return False
+        groups.union(root_i, root_j)
+        places[groups.find(i)] = places.pop(root_i) | places.pop(root_j)
+        return True
+
+    exact_index = defaultdict(list) # chave -> representantes (um por local distinto)
+    for i, evento in enumerate(events):
+        day = _day_of(evento)
+        if day is None:
+            continue # Sem data não há como confirmar que é o mesmo evento
+        place = _place(evento)
+        places[i] = {place} if place else set()
+        representatives = exact_index[(normalize_text(evento.get("title")), day)]
+        if not any(union_same_place(rep, i) for rep in representatives):
+            representatives.append(i)
+
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = defaultdict(list)
+    signatures = {}
+    for representatives in exact_index.values(): # Um representante por grupo exato chega (só eventos com data)
+        for i in representatives:
+            day = _day_of(events[i])
+            signatures[i] = minhash_signature(events[i].get("title"))
+            for band in range(LSH_BANDS):
+                buckets[(day, band, signatures[i][band * rows:(band + 1) * rows])].append(i)
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Os buckets são pequenos (mesmo dia e mesma banda), a comparação par a par é barata
+        for pos, first in enumerate(members):
+            for other in members[pos + 1:]:
+                if groups.find(first) != groups.find(other) and \
+                        _numbers(events[first].get("title")) == _numbers(events[other].get("title")) and \
+                        estimated_similarity(signatures[first], signatures[other]) >= SIMILARITY_THRESHOLD:
+                    union_same_place(first, other)
+
+    merged = {}
+    order = []
+    for i, evento in enumerate(events):
+        root = groups.find(i)
+        if root not in merged:
+            merged[root] = dict(evento)
+            order.append(root)
+        else:
+            merge_events(merged[root], evento)
+    return [merged[root] for root in order], len(events) - len(order)
@@ -0,0 +1,173 @@
+# --- Imports ---
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import html_parsers
+import http_client
+from file_utils import atomic_write_text
+from http_cache import CACHE_DIR
+
+# --- Constants ---
+DETAIL_CACHE_DIR = os.path.join(CACHE_DIR, "details_v2") # v2: extração só pelos seletores da agenda (a v1 guardava texto dos menus)
+MAX_CONCURRENT_DETAIL_REQUESTS = 4 # Páginas de detalhe em simultâneo (a cortesia vem do token bucket do host)
+REQUEST_TIMEOUT = 15 # Segundos
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
+}
+# Valores que indicam que o campo ainda não foi preenchido a partir da página do evento
+PLACEHOLDER_TIMES = {"Consulte o site para horários", "Hora não encontrada"}
+PLACEHOLDER_LOCATIONS = {"Faro", "Local não encontrado"}
+
+# Seletores tentados por ordem na página de detalhe da agenda CMF (benchmarks/fixtures/cmf_event_detail.html).
+# Só blocos específicos da agenda: seletores genéricos (article, main, p) apanhavam menus e rodapés
+# quando o layout muda, e esse texto substituía a descrição do evento
+CMF_DESCRIPTION_SELECTORS = ["div.agenda_detail div.text", "div.conteudo div.text"]
+CMF_FIELD_SELECTORS = ["div.agenda_detail li", "div.agenda_detail p", "ul.info li", "dl.info"]
+LABEL_PATTERN = re.compile(r"^\s*(hor[áa]rio|hora|local)\b\s*:?\s*(.+)$", re.IGNORECASE | re.DOTALL)
+
+
+def _clean(text):
+    return " ".join((text or "").split())
+
+def extract_cmf_details(html):
+    """
+    Extrai hora, local e descrição completa de uma página de evento da agenda CMF.
+    Hora e local só vêm de linhas com etiqueta ('Horário: 21h30', 'Local: Teatro das Figuras') e a
+    descrição só do bloco de texto da agenda. Se o layout não corresponder aos seletores, não se
+    adivinha: devolve um dict só com os campos encontrados (possivelmente vazio).
+    """
+    soup = html_parsers.parse_html(html)
+    details = {}
+
+    for selector in CMF_FIELD_SELECTORS:
+        for node in soup.select(selector):
+            match = LABEL_PATTERN.match(_clean(node.get_text(separator=" ")))
+            if not match:
+                continue
+            label, value = match.group(1).lower(), _clean(match.group(2))
+            if label.startswith("local"):
+                details.setdefault("location", value)
+            else:
+                details.setdefault("time", value)
+        if "time" in details and "location" in details:
+            break
+
+    for selector in CMF_DESCRIPTION_SELECTORS:
+        node = soup.select_one(selector)
+        if node is not None:
+            description = _clean(node.get_text(separator=" "))
+            if description:
+                details["description"] = description
+                break
+
+    return details
+
+
+class DetailCache:
+    """
+    Cache persistente das páginas de detalhe.
+    Cada URL é descarregado uma única vez em toda a vida da cache; o resultado da extração é
+    guardado pelo hash do conteúdo, por isso páginas com o mesmo corpo também só são analisadas uma vez.
+    """
+
+    def __init__(self, cache_dir=DETAIL_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index = self._load(self._index_path) # {url: content_hash}
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Aviso: cache de detalhes ilegível em {path}, a ignorar: {e}")
+            return {}
+
+    def _details_path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def get(self, url):
+        content_hash = self._index.get(url)
+        if content_hash is None:
+            return None
+        path = self._details_path(content_hash)
+        return self._load(path) if os.path.exists(path) else None
+
+    def details_for_content(self, content_hash):
+        path = self._details_path(content_hash)
+        return self._load(path) if os.path.exists(path) else None
+
+    def put(self, url, content_hash, details):
+        with self._lock:
+            atomic_write_text(self._details_path(content_hash), json.dumps(details, ensure_ascii=False))
+            self._index[url] = content_hash
+
+    def save(self):
+        with self._lock:
+            atomic_write_text(self._index_path, json.dumps(self._index, ensure_ascii=False))
+
+
+def fetch_details(url, cache, extractor=extract_cmf_details):
+    """Detalhes de um evento: da cache se já existirem, senão descarrega e analisa a página uma vez."""
+    cached = cache.get(url)
+    if cached is not None:
+        return cached
+
+    try:
+        response = http_client.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao aceder à página de detalhe {url}: {e}")
+        return None # Não fica em cache: tenta-se outra vez na próxima execução
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    details = cache.details_for_content(content_hash)
+    if details is None:
+        details = extractor(response.text)
+    cache.put(url, content_hash, details)
+    return details
+
+def _needs_enrichment(evento):
+    link = evento.get("link")
+    if not link or not str(link).startswith("http"):
+        return False
+    return evento.get("time") in PLACEHOLDER_TIMES or evento.get("location") in PLACEHOLDER_LOCATIONS
+
+def enrich_events(events, extractor=extract_cmf_details, max_workers=MAX_CONCURRENT_DETAIL_REQUESTS, cache=None):
+    """
+    Completa hora, local e descrição dos eventos (formato da aplicação) a partir das páginas de detalhe.
+    Só são visitados eventos com valores genéricos e no máximo `max_workers` pedidos em simultâneo.
+    Altera os eventos in place e devolve a lista.
+    """
+    cache = cache or DetailCache()
+    pending = [evento for evento in events if _needs_enrichment(evento)]
+    if not pending:
+        return events
+
+    print(f"A completar {len(pending)} eventos com as páginas de detalhe ({max_workers} em simultâneo)...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        all_details = list(executor.map(lambda evento: fetch_details(evento["link"], cache, extractor), pending))
+    cache.save()
+
+    enriched = 0
+    for evento, details in zip(pending, all_details):
+        if not details:
+            continue
+        if details.get("time") and evento.get("time") in PLACEHOLDER_TIMES:
+            evento["time"] = details["time"]
+        if details.get("location") and evento.get("location") in PLACEHOLDER_LOCATIONS:
+            evento["location"] = details["location"]
+        if details.get("description") and len(details["description"]) > len(evento.get("description") or ""):
+            evento["description"] = details["description"]
+        enriched += 1
+    print(f"{enriched} eventos completados com dados da página de detalhe.")
+    return events
@@ -0,0 +1,134 @@
+# --- Imports ---
+import hashlib
+import json
+import os
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from text_utils import normalize_text
+
+# --- Constants ---
+# IDs até 2^52: cabem num Number de JavaScript sem perder precisão (Number.MAX_SAFE_INTEGER = 2^53 - 1)
+ID_BITS = 52
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+DELTA_FORMAT_VERSION = 1
+
+
+def canonical_link(link):
+    """
+    Forma canónica de um link para usar como identidade: esquema/host em minúsculas, sem
+    fragmento, sem parâmetros de tracking (utm_*, fbclid, ...) e sem '/' final.
+    Devolve None para valores que não são URLs ('Sem link', '').
+    """
+    if not link or not str(link).startswith(("http://", "https://")):
+        return None
+    parts = urlsplit(str(link).strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+def event_key(source, evento):
+    """
+    Identidade de um evento: fonte + link canónico, ou fonte + título normalizado + data de início
+    quando o evento não tem página própria. Não depende da posição do evento na lista.
+    """
+    link = canonical_link(evento.get("link"))
+    if link:
+        return f"{source}|{link}"
+    start = evento.get("_start")
+    day = start.date().isoformat() if isinstance(start, datetime) else " ".join(str(evento.get("date") or "").split())
+    return f"{source}|{normalize_text(evento.get('title'))}|{day}"
+
+def stable_id(key):
+    """Inteiro positivo de ID_BITS bits derivado da chave (sha1), estável entre execuções."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return (int.from_bytes(digest[:8], "big") >> (64 - ID_BITS)) or 1
+
+def assign_ids(events, source):
+    """Atribui (in place) IDs estáveis a eventos de uma fonte. Devolve a lista."""
+    for evento in events:
+        evento["id"] = stable_id(event_key(source, evento))
+    return events
+
+def _collision_key(evento):
+    return f"{normalize_text(evento.get('title'))}|{' '.join(str(evento.get('date') or '').split())}"
+
+def ensure_unique_ids(events):
+    """
+    Resolve colisões de IDs dentro de uma execução (ex.: o mesmo link publicado para duas datas).
+    Todos os eventos de um grupo em colisão recebem um ID derivado do ID + título + data, e não só
+    os seguintes ao primeiro: o ID de cada um não depende da ordem nem de os outros do grupo
+    continuarem a existir na execução seguinte. Eventos iguais também em título e data são
+    desempatados pela ordem do seu conteúdo. Devolve o número de IDs alterados.
+    """
+    groups = {}
+    for evento in events:
+        groups.setdefault(evento["id"], []).append(evento)
+    used = set(groups)
+    changed = 0
+    for base_id, group in groups.items():
+        if len(group) < 2:
+            continue
+        used.discard(base_id) # Nenhum membro do grupo fica com o ID base
+        group = sorted(group, key=lambda evento: (_collision_key(evento),
+                                                  json.dumps(evento, ensure_ascii=False, sort_keys=True, default=str)))
+        for evento in group:
+            key = f"{base_id}|{_collision_key(evento)}"
+            event_id, attempt = stable_id(key), 0
+            while event_id in used:
+                attempt += 1
+                event_id = stable_id(f"{key}|{attempt}")
+            evento["id"] = event_id
+            used.add(event_id)
+            changed += 1
+    return changed
+
+
+# --- Delta entre execuções ---
+
+def snapshot_version(events):
+    """Hash curto do conteúdo de uma lista de eventos (identifica o snapshot no delta)."""
+    payload = json.dumps(events, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def load_snapshot(path):
+    """Eventos do snapshot anterior (o JSON publicado), ou [] se não existir ou estiver ilegível."""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (IOError, ValueError) as e:
+        print(f"Aviso: snapshot anterior ilegível em {path}, o delta vai conter todos os eventos: {e}")
+        return []
+    return data if isinstance(data, list) else []
+
+def compute_delta(previous, current):
+    """
+    Diferença entre dois snapshots, por ID:
+    - added: eventos novos (completos)
+    - changed: eventos com o mesmo ID e conteúdo diferente (completos, já na versão nova)
+    - removed: IDs que deixaram de existir
+    `order` tem os IDs do snapshot novo pela ordem final, para o cliente reordenar sem o ficheiro completo.
+    """
+    previous_by_id = {evento.get("id"): evento for evento in previous}
+    current_ids = {evento["id"] for evento in current}
+    added, changed = [], []
+    for evento in current:
+        old = previous_by_id.get(evento["id"])
+        if old is None:
+            added.append(evento)
+        elif old != evento:
+            changed.append(evento)
+    removed = [event_id for event_id in previous_by_id if event_id not in current_ids]
+    return {
+        "format": DELTA_FORMAT_VERSION,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "base_version": snapshot_version(previous) if previous else None,
+        "version": snapshot_version(current),
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "order": [evento["id"] for evento in current],
+    }
@@ -0,0 +1,107 @@
+# --- Imports ---
+import json
+import os
+from datetime import datetime, timedelta
+
+import artifacts
+import event_sources
+
+# --- Constants ---
+SHARDED_OUTPUT = os.environ.get("LIGAFARO_SHARDED_OUTPUT", "0") == "1"
+SHARD_DIRNAME = "events" # Pasta dos shards, ao lado de events_data.json
+MANIFEST_FILENAME = "index.json"
+HOT_SHARD_FILENAME = "upcoming.json" # Eventos a decorrer ou a começar nos próximos HOT_WINDOW_DAYS
+UNDATED_SHARD_FILENAME = "undated.json"
+HOT_WINDOW_DAYS = 14
+
+
+def _month_of(evento):
+    start = evento.get("_start")
+    return start.strftime("%Y-%m") if start else None
+
+def _in_hot_window(evento, window_start, window_end):
+    start = evento.get("_start")
+    if start is None:
+        return False
+    end = evento.get("_end") or start
+    return start < window_end and end >= window_start
+
+def partition(events, today=None):
+    """
+    Divide os eventos (com `_start`/`_end`) em shards: {nome do ficheiro: eventos}.
+    - YYYY-MM.json: eventos pelo mês de início
+    - upcoming.json: eventos a decorrer hoje ou que começam nos próximos HOT_WINDOW_DAYS dias
+      (inclui exposições longas que começaram em meses anteriores)
+    - undated.json: eventos sem data reconhecida
+    """
+    window_start = datetime.combine(today or datetime.now().date(), datetime.min.time())
+    window_end = window_start + timedelta(days=HOT_WINDOW_DAYS + 1)
+    shards = {HOT_SHARD_FILENAME: []}
+    for evento in events:
+        month = _month_of(evento)
+        shards.setdefault(f"{month}.json" if month else UNDATED_SHARD_FILENAME, []).append(evento)
+        if _in_hot_window(evento, window_start, window_end):
+            shards[HOT_SHARD_FILENAME].append(evento)
+    return shards, window_start, window_end
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, ValueError) as e:
+        print(f"Aviso: manifesto de shards ilegível em {path}, todos os shards vão ser reescritos: {e}")
+        return {}
+
+def write_shards(events, output_dir, today=None, mode=None):
+    """
+    Grava os eventos particionados em `output_dir`/events e o manifesto index.json
+    (lista de shards com contagem e hash). Só são reescritos os shards cujo conteúdo mudou;
+    shards que deixaram de existir (meses passados) são apagados.
+    Os eventos devem ainda ter `_start`/`_end`; as chaves privadas não são gravadas.
+    Devolve o manifesto.
+    """
+    shard_dir = os.path.join(output_dir, SHARD_DIRNAME)
+    manifest_path = os.path.join(shard_dir, MANIFEST_FILENAME)
+    mode = mode or artifacts.OUTPUT_MODE
+    previous_manifest = _load_manifest(manifest_path)
+    previous = {shard["file"]: shard for shard in previous_manifest.get("shards", [])}
+    # Ao mudar de modo (dev <-> produção) os sidecars .gz/.br mudam, por isso reescreve-se tudo
+    rewrite_all = previous_manifest.get("mode") != mode
+
+    shards, window_start, window_end = partition(events, today)
+    minify = mode == "production"
+    entries, written = [], 0
+    for filename in sorted(shards):
+        data = artifacts.dumps(event_sources.strip_private_fields(shards[filename]), minify=minify)
+        digest = artifacts.content_hash(data)
+        path = os.path.join(shard_dir, filename)
+        old = previous.get(filename)
+        if rewrite_all or old is None or old.get("hash") != digest or not os.path.exists(path):
+            artifacts.write_bytes(path, data, mode)
+            written += 1
+        entry = {"file": filename, "count": len(shards[filename]), "hash": digest}
+        if filename == HOT_SHARD_FILENAME:
+            entry.update({"kind": "upcoming", "from": window_start.date().isoformat(),
+                          "to": (window_end - timedelta(days=1)).date().isoformat()})
+        elif filename == UNDATED_SHARD_FILENAME:
+            entry["kind"] = "undated"
+        else:
+            entry.update({"kind": "month", "month": filename[:-len(".json")]})
+        entries.append(entry)
+
+    removed = 0
+    for filename in set(previous) - set(shards):
+        artifacts.remove_artifact(os.path.join(shard_dir, filename))
+        removed += 1
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "total": len(events),
+        "shards": entries,
+    }
+    artifacts.write_json(manifest_path, manifest, mode)
+    print(f"Shards: {len(entries)} ficheiros ({written} reescritos, {removed} removidos) em {shard_dir}")
+    return manifest
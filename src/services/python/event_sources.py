@@ -0,0 +1,112 @@
+# --- Imports ---
+import importlib
+import time
+
+import scrape_metrics
+
+# --- Constants ---
+# Módulos que registam fontes de eventos. Para adicionar uma fonte nova basta criar um módulo
+# com uma subclasse de EventSource decorada com @register_source e acrescentá-lo aqui.
+SOURCE_MODULES = [
+    "fetch_CMF_events",
+    "fetch_viralagenda_events",
+]
+
+_REGISTRY = {}
+
+
+class EventSource:
+    """
+    Interface comum das fontes de eventos.
+    fetch() devolve a lista de eventos já no formato da aplicação
+    (title, description, date, time, location, category, attendees, imageUrl, organizer, link).
+    As fontes podem juntar `_start`/`_end` (datetime ou None) para a data não voltar a ser interpretada.
+    """
+
+    name = None # Identificador curto e único (ex.: "cmf")
+    description = ""
+
+    def fetch(self):
+        raise NotImplementedError
+
+
+def strip_private_fields(events):
+    """
+    Remove as chaves auxiliares dos eventos (começadas por '_', ex.: `_start`/`_end` com as datas
+    já convertidas pelas fontes) antes de gravar em JSON.
+    """
+    return [{k: v for k, v in evento.items() if not k.startswith("_")} for evento in events]
+
+def register_source(cls):
+    """Decorador de classe que regista uma fonte de eventos pelo seu `name`."""
+    if not cls.name:
+        raise ValueError(f"A fonte {cls.__name__} não tem 'name' definido")
+    if cls.name in _REGISTRY and _REGISTRY[cls.name].__qualname__ != cls.__qualname__:
+        raise ValueError(f"Já existe uma fonte registada com o nome '{cls.name}'")
+    _REGISTRY[cls.name] = cls
+    return cls
+
+def load_sources():
+    """Importa os módulos de SOURCE_MODULES para que as fontes se registem."""
+    for module_name in SOURCE_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"Aviso: não foi possível carregar a fonte '{module_name}': {e}")
+    return dict(_REGISTRY)
+
+def get_sources(names=None):
+    """Instâncias das fontes registadas (todas, ou só as indicadas em `names`), pela ordem de registo."""
+    registry = load_sources()
+    if names is None:
+        names = list(registry)
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise KeyError(f"Fontes desconhecidas: {', '.join(unknown)} (disponíveis: {', '.join(registry)})")
+    return [registry[name]() for name in names]
+
+def fetch_tagged(source):
+    """Corre source.fetch() e marca cada evento com `_source` (nome da fonte, usado pelo event_store)."""
+    events = source.fetch() or []
+    for evento in events:
+        evento["_source"] = source.name
+    return events
+
+def _run_one(source):
+    start = time.perf_counter()
+    try:
+        events = fetch_tagged(source)
+        error = None
+    except Exception as e:
+        events, error = [], e
+    elapsed = time.perf_counter() - start
+    scrape_metrics.observe("source_run_seconds", elapsed, source=source.name)
+    if error is None:
+        scrape_metrics.set_gauge("source_events", len(events), source=source.name)
+    else:
+        scrape_metrics.inc("source_errors_total", source=source.name)
+    return source.name, events, error, elapsed
+
+def run_sources(names=None, max_workers=None):
+    """
+    Corre todas as fontes em paralelo e junta os resultados pela ordem de registo.
+    O tempo total passa a ser o da fonte mais lenta e não a soma de todas.
+    Uma fonte que falhe não impede as outras: devolve (eventos, {nome: erro}).
+    """
+    from concurrent.futures import ThreadPoolExecutor # Só aqui: o chatbot importa este módulo sem correr fontes
+    sources = get_sources(names)
+    if not sources:
+        return [], {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+        results = list(executor.map(_run_one, sources))
+
+    merged, errors = [], {}
+    for name, events, error, elapsed in results:
+        if error is not None:
+            print(f"Erro na fonte '{name}': {error}")
+            errors[name] = error
+        else:
+            print(f"Fonte '{name}': {len(events)} eventos em {elapsed:.2f}s")
+        merged.extend(events)
+    return merged, errors
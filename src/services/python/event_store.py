@@ -0,0 +1,306 @@
+# --- Imports ---
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import event_ids
+import event_sources
+from news_dedup import canonical_news_url
+
+# --- Constants ---
+DB_PATH = os.environ.get("LIGAFARO_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ligafaro.db"))
+STORE_ENABLED = os.environ.get("LIGAFARO_EVENT_STORE", "1") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,          -- ID estável (event_ids)
+    source TEXT,
+    start_date TEXT,                 -- ISO (AAAA-MM-DD), NULL se a data não foi reconhecida
+    end_date TEXT,
+    category TEXT,
+    location TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    data TEXT NOT NULL,              -- Evento completo no formato da aplicação (JSON)
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1 -- 0 = deixou de aparecer nas fontes
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events(active, start_date);
+CREATE INDEX IF NOT EXISTS idx_events_category ON events(category, start_date);
+CREATE INDEX IF NOT EXISTS idx_events_source ON events(source);
+CREATE INDEX IF NOT EXISTS idx_events_location ON events(location);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    title, description, content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS events_ai AFTER INSERT ON events BEGIN
+    INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS events_ad AFTER DELETE ON events BEGIN
+    INSERT INTO events_fts(events_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS events_au AFTER UPDATE OF title, description ON events BEGIN
+    INSERT INTO events_fts(events_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,          -- Derivado do URL canónico
+    url TEXT NOT NULL UNIQUE,
+    published_at TEXT,               -- ISO, para ordenar
+    source TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    data TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_news_published ON news(active, published_at);
+CREATE INDEX IF NOT EXISTS idx_news_source ON news(source);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, description, content='news', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS news_ai AFTER INSERT ON news BEGIN
+    INSERT INTO news_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS news_ad AFTER DELETE ON news BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS news_au AFTER UPDATE OF title, description ON news BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO news_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (id, source, start_date, end_date, category, location, title, description, data,
+                    content_hash, first_seen, last_seen, active)
+VALUES (:id, :source, :start_date, :end_date, :category, :location, :title, :description, :data,
+        :content_hash, :now, :now, 1)
+ON CONFLICT(id) DO UPDATE SET
+    source = excluded.source, start_date = excluded.start_date, end_date = excluded.end_date,
+    category = excluded.category, location = excluded.location, title = excluded.title,
+    description = excluded.description, data = excluded.data, content_hash = excluded.content_hash,
+    last_seen = excluded.last_seen, active = 1
+WHERE events.content_hash != excluded.content_hash OR events.active = 0
+"""
+
+UPSERT_NEWS = """
+INSERT INTO news (id, url, published_at, source, title, description, data, content_hash, first_seen, last_seen, active)
+VALUES (:id, :url, :published_at, :source, :title, :description, :data, :content_hash, :now, :now, 1)
+ON CONFLICT(id) DO UPDATE SET
+    published_at = excluded.published_at, source = excluded.source, title = excluded.title,
+    description = excluded.description, data = excluded.data, content_hash = excluded.content_hash,
+    last_seen = excluded.last_seen, active = 1
+WHERE news.content_hash != excluded.content_hash OR news.active = 0
+"""
+
+
+def _content_hash(data):
+    return hashlib.sha1(data.encode("utf-8")).hexdigest() # Sobre o JSON gravado: a mesma ordem de campos dá o mesmo hash
+
+def _iso_day(value):
+    return value.date().isoformat() if isinstance(value, datetime) else None
+
+def _published_iso(text):
+    """publishedAt das notícias vem no formato RFC 2822 ('Mon, 14 Apr 2025 10:00:00 GMT')."""
+    if not text:
+        return None
+    from email.utils import parsedate_to_datetime # Só para as notícias; o chatbot não precisa dele
+    try:
+        return parsedate_to_datetime(text).isoformat()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def _fts_query(text):
+    """Converte texto livre numa consulta FTS5 segura (cada palavra como prefixo, todas obrigatórias)."""
+    words = [word.replace('"', "") for word in (text or "").split()]
+    return " ".join(f'"{word}"*' for word in words if word)
+
+
+class EventStore:
+    """
+    Armazenamento SQLite dos eventos e notícias.
+    - upsert pela chave estável (ID do evento / URL canónico da notícia): linhas sem alterações não
+      são reescritas, por isso a ingestão é incremental;
+    - índices em data de início, categoria, fonte e local, e FTS5 em título/descrição,
+      para as consultas do chatbot serem lookups em vez de percorrer a lista inteira;
+    - os JSON da aplicação continuam a ser exportados a partir daqui.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL") # Leitores (chatbot) não bloqueiam a escrita
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Escrita ---
+
+    def sync_events(self, events, sources=None):
+        """
+        Faz upsert de um snapshot de eventos (com `_start`/`_end`/`_source` se existirem) e marca como
+        inativos os que deixaram de aparecer, mas só nas fontes de `sources` (as que correram sem erro
+        e trouxeram eventos; por omissão, as fontes presentes em `events`). Uma fonte que falhe ou venha
+        vazia mantém os eventos que tinha. Devolve (inseridos ou alterados, desativados).
+        """
+        populated = {evento.get("_source") for evento in events}
+        sources = sorted(source for source in (populated if sources is None else sources)
+                         if source and source in populated)
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for evento in events:
+            public = event_sources.strip_private_fields([evento])[0]
+            data = json.dumps(public, ensure_ascii=False) # Mantém a ordem das chaves do JSON exportado
+            rows.append({
+                "id": public["id"], "source": evento.get("_source"),
+                "start_date": _iso_day(evento.get("_start")), "end_date": _iso_day(evento.get("_end")),
+                "category": public.get("category"), "location": public.get("location"),
+                "title": public.get("title") or "", "description": public.get("description"),
+                "data": data, "content_hash": _content_hash(data), "now": now,
+            })
+        with self._lock, self.conn:
+            upserted = self.conn.executemany(UPSERT_EVENT, rows).rowcount # Linhas sem alterações não contam
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_ids (id INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM seen_ids")
+            self.conn.executemany("INSERT OR IGNORE INTO seen_ids VALUES (?)", [(row["id"],) for row in rows])
+            deactivated = 0
+            if sources:
+                placeholders = ", ".join("?" for _ in sources)
+                deactivated = self.conn.execute(
+                    f"UPDATE events SET active = 0 WHERE active = 1 AND source IN ({placeholders}) "
+                    "AND id NOT IN (SELECT id FROM seen_ids)", sources).rowcount
+        return upserted, deactivated
+
+    def sync_news(self, news):
+        """
+        Upsert das notícias (formato de noticias_faro.json) pelo URL canónico do news_dedup, o mesmo
+        do arquivo de notícias e da remoção de repetidos. Devolve o número de linhas escritas.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for item in news:
+            url = canonical_news_url(item.get("url")) or item.get("url") or item.get("title") or ""
+            data = json.dumps(item, ensure_ascii=False)
+            rows.append({
+                "id": event_ids.stable_id(f"news|{url}"), "url": url,
+                "published_at": _published_iso(item.get("publishedAt")),
+                "source": (item.get("source") or {}).get("name"),
+                "title": item.get("title") or "", "description": item.get("description"),
+                "data": data, "content_hash": _content_hash(data), "now": now,
+            })
+        with self._lock, self.conn:
+            return self.conn.executemany(UPSERT_NEWS, rows).rowcount
+
+    # --- Consultas ---
+
+    def _decode(self, rows):
+        return [json.loads(row["data"]) for row in rows]
+
+    def query_events(self, start=None, end=None, category=None, location=None, source=None, text=None,
+                     limit=None, include_undated=False):
+        """
+        Eventos ativos que decorrem (pelo menos em parte) entre `start` e `end` (date/datetime),
+        filtrados por categoria, local (contém), fonte e texto (FTS). Ordenados por data de início.
+        """
+        clauses, params = ["e.active = 1"], []
+        if start is not None:
+            clauses.append("COALESCE(e.end_date, e.start_date) >= ?")
+            params.append(start.isoformat()[:10])
+        if end is not None:
+            clauses.append("e.start_date <= ?")
+            params.append(end.isoformat()[:10])
+        if (start is not None or end is not None) and not include_undated:
+            clauses.append("e.start_date IS NOT NULL")
+        if category:
+            clauses.append("e.category = ? COLLATE NOCASE")
+            params.append(category)
+        if location:
+            clauses.append("e.location LIKE ?")
+            params.append(f"%{location}%")
+        if source:
+            clauses.append("e.source = ?")
+            params.append(source)
+        join = ""
+        if text and _fts_query(text):
+            join = "JOIN events_fts f ON f.rowid = e.id AND events_fts MATCH ?"
+            params.insert(0, _fts_query(text))
+        sql = f"SELECT e.data FROM events e {join} WHERE {' AND '.join(clauses)} ORDER BY e.start_date IS NULL, e.start_date, e.id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._decode(self.conn.execute(sql, params).fetchall())
+
+    def count_events(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM events WHERE active = 1").fetchone()[0]
+
+    def event_locations(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT location FROM events WHERE active = 1 AND location IS NOT NULL ORDER BY location")
+            return [row[0] for row in rows]
+
+    def latest_news(self, limit=None, text=None):
+        """Notícias ativas, mais recentes primeiro; com `text`, só as que coincidem na pesquisa FTS."""
+        params = []
+        join = ""
+        if text and _fts_query(text):
+            join = "JOIN news_fts f ON f.rowid = n.id AND news_fts MATCH ?"
+            params.append(_fts_query(text))
+        sql = f"SELECT n.data FROM news n {join} WHERE n.active = 1 ORDER BY n.published_at IS NULL, n.published_at DESC, n.id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._decode(self.conn.execute(sql, params).fetchall())
+
+    # --- Exportação ---
+
+    def export_events(self, with_dates=False):
+        """
+        Lista de eventos ativos no formato de events_data.json (ordem por data de início).
+        Com `with_dates`, cada evento traz também `_start`/`_end` (datetime do dia, ou None), para os
+        shards serem gerados da mesma lista que é publicada.
+        """
+        if not with_dates:
+            return self.query_events()
+        sql = ("SELECT data, start_date, end_date FROM events WHERE active = 1 "
+               "ORDER BY start_date IS NULL, start_date, id")
+        with self._lock:
+            rows = self.conn.execute(sql).fetchall()
+        events = []
+        for row in rows:
+            evento = json.loads(row["data"])
+            evento["_start"] = datetime.fromisoformat(row["start_date"]) if row["start_date"] else None
+            evento["_end"] = datetime.fromisoformat(row["end_date"]) if row["end_date"] else None
+            events.append(evento)
+        return events
+
+
+def open_store(path=DB_PATH):
+    return EventStore(path)
+
+def open_existing_store(path=DB_PATH):
+    """O store, se a base de dados já existir (o chatbot não a cria); senão None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return EventStore(path)
+    except sqlite3.Error as e:
+        print(f"Aviso: não foi possível abrir {path}: {e}", file=sys.stderr)
+        return None
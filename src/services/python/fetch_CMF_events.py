@@ -1,100 +1,72 @@
 # --- Imports ---
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import locale
 import time
-import json # Import necessário para JSON
+import os
+import hashlib
+import html
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from string import Template
+
+import artifacts
+import categorias
+import crawl_state
+import enrich
+import event_ids
+import event_sources
+import file_utils
+import html_parsers
+import http_cache
+import pt_dates
+import rate_limit
+import scrape_metrics
 
 # --- Constants ---
+SOURCE_NAME = "cmf" # Source name in the registry (also part of the stable event IDs)
 BASE_URL = "https://www.cm-faro.pt/pt/agenda.aspx?page="
 BASE_DOMAIN = "https://www.cm-faro.pt"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
 }
-# NOTE: The DATE_FORMAT assumes Portuguese month abbreviations (e.g., 'abr')
-# This requires the locale to be set correctly using set_portuguese_locale()
-DATE_FORMAT = "%d %b %Y" # Example: 12 abr 2025
 NUM_PAGES_TO_SCRAPE = 3  # Adjust number of pages to scrape as needed
 REQUEST_TIMEOUT = 15 # Seconds for request timeout
-DELAY_BETWEEN_REQUESTS = 0.5 # Seconds delay between page requests (set to 0 to disable)
+DELAY_BETWEEN_REQUESTS = 0.5 # Seconds delay between page requests in sequential mode (set to 0 to disable)
+CONCURRENT_FETCH = True # Fetch several agenda pages at once (politeness via per-host token bucket)
+MAX_CONCURRENT_REQUESTS = 4 # Max number of get_events_from_page calls in flight
+REQUESTS_PER_SECOND = 2.0 # Token bucket refill rate per host
+REQUEST_BURST = 4 # Token bucket capacity per host (requests allowed back-to-back)
+# Crawl mode: "fixed" (pages 1..NUM_PAGES_TO_SCRAPE), "full" (every page in the agenda pager)
+# or "incremental" (stop at the first page with only already-known events)
+CRAWL_MODE = os.environ.get("LIGAFARO_CRAWL_MODE", "incremental")
+MAX_PAGES_TO_CRAWL = 200 # Safety cap for the page count discovered from the pager
+CRAWL_STATE_NAME = "cmf_agenda" # Persisted fingerprints file (under .cache/crawl)
+# Optional stage: visit each event page for time, venue and full description (cached per URL)
+ENRICH_DETAILS = os.environ.get("LIGAFARO_ENRICH_DETAILS", "0") == "1"
 JSON_OUTPUT_FILENAME = "eventos_faro.json" # Nome do ficheiro JSON de saída
 HTML_OUTPUT_FILENAME = "agenda_faro.html" # Nome do ficheiro HTML de saída
+HTML_EVENTS_PER_PAGE = 200 # Acima disto o HTML é dividido em páginas (agenda_faro.html, agenda_faro-2.html, ...)
+INVALID_DATE_MARKERS = ("sem data", "erro", "inválid")
 
 
-# --- Month name mapping (for potential manual normalization if locale fails) ---
-# Note: Verify Python's actual %b output for your pt_PT locale if using mapping.
-# Common locale outputs: 'jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez'
-PORTUGUESE_MONTH_MAP = {
-    # Maps full/alternative names to expected 3-letter abbr. for locale %b
-    'janeiro': 'jan', 'fevereiro': 'fev', 'março': 'mar', 'abril': 'abr',
-    'maio': 'mai', 'junho': 'jun', 'julho': 'jul', 'agosto': 'ago',
-    'setembro': 'set', # Check if your locale uses 'set' or 'sep'
-    'outubro': 'out', 'novembro': 'nov', 'dezembro': 'dez',
-    # Add variations like 'mar' -> 'mar' if needed, though usually not required if source is consistent
-}
-
 # --- Helper Functions ---
 
-def set_portuguese_locale():
-    """
-    Attempts to set the system's locale for time functions to Portuguese (pt_PT).
-    Returns True if successful, False otherwise.
-    """
-    # Get current time to display today's date according to locale
-    now = datetime.now()
-    locale_options = ['pt_PT.UTF-8', 'Portuguese_Portugal.1252', 'pt_PT'] # Common Linux/macOS and Windows codes
-    for loc in locale_options:
-        try:
-            locale.setlocale(locale.LC_TIME, loc)
-            print(f"Locale definido com sucesso para '{loc}'. Exemplo data hoje: {now.strftime('%A, %d de %B de %Y')}")
-            return True
-        except locale.Error:
-            continue # Try the next option
-
-    print("\nAviso: Não foi possível definir o locale para Português (pt_PT).")
-    print("A interpretação dos nomes dos meses (%b) pode falhar.")
-    print(f"Verifique se um dos seguintes locales está instalado no sistema: {locale_options}")
-    return False
-
-def normalize_month(date_str):
-    """ Replaces full Portuguese month names with 3-letter abbr based on PORTUGUESE_MONTH_MAP """
-    parts = date_str.split()
-    if len(parts) == 3:
-        month_original = parts[1].lower().strip('.') # Handle abbr like 'set.' if needed
-        # Use the mapped abbreviation if found, otherwise keep original part
-        month_normalized = PORTUGUESE_MONTH_MAP.get(month_original, parts[1])
-        if month_normalized != parts[1]: # Only reconstruct if changed
-             # Return using the potentially mapped month name
-            return f"{parts[0]} {month_normalized} {parts[2]}"
-    # Return original string if not in expected format or no mapping needed
-    return date_str
-
-
 def parse_date_string(date_str):
     """
-    Parses a date string using the defined DATE_FORMAT.
-    Handles specific error/missing strings and optionally normalizes month names.
+    Parses a Portuguese date string such as '12 abr 2025' (see pt_dates.parse_date).
+    Handles specific error/missing strings.
     Returns a datetime object on success, or datetime.max on failure.
     """
     if not date_str or any(marker in date_str.lower() for marker in ["sem data", "erro", "inválid"]):
         return datetime.max
 
-    original_for_warning = date_str # Keep original for warning message
-    # --- Optional: Uncomment the next block if locale parsing fails due to full month names ---
-    # date_str_normalized = normalize_month(date_str)
-    # if date_str_normalized != date_str:
-    #      print(f"--- DEBUG Parse: Normalized month: '{date_str}' -> '{date_str_normalized}'")
-    #      date_str = date_str_normalized # Use the normalized string for parsing
-    # --- End Optional ---
-
-    try:
-        # Attempt to parse the (potentially normalized) date string
-        return datetime.strptime(date_str, DATE_FORMAT)
-    except ValueError as e:
-        # If parsing fails, log the warning with the string that was attempted
-        print(f"Aviso: Não foi possível converter a data '{date_str}' (Original: '{original_for_warning}') usando o formato '{DATE_FORMAT}'. Erro: {e}")
+    # Month table + memo cache (pt_dates): no locale.setlocale, safe across threads
+    parsed = pt_dates.parse_date(date_str)
+    if parsed is None:
+        print(f"Aviso: Não foi possível converter a data '{date_str}'.")
         return datetime.max
+    return parsed
 
 def format_url(relative_url):
     """
@@ -112,29 +84,65 @@ def format_url(relative_url):
 
 # --- Core Scraping Function (Corrected multi-day detection) ---
 
-def get_events_from_page(page_number):
+def get_events_from_page(page_number, page_info=None):
     """
     Scrapes event data from a single agenda page specified by page_number.
     Includes corrected multi-day detection and optional debugging prints.
     Returns a list of dictionaries, each representing an event.
+    If a page_info dict is given, page_info["total_pages"] is set from the agenda pager.
     """
     url = f"{BASE_URL}{page_number}"
     print(f"A processar página: {url}")
 
     try:
-        response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        # Conditional GET (ETag / Last-Modified) through the on-disk HTTP cache; the shared
+        # http_client waits on this host's token bucket and retries transient errors
+        with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="fetch"):
+            response = http_cache.fetch(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Erro ao aceder à página {page_number}: {e}")
+        scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="error")
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    if page_info is not None:
+        page_info["total_pages"] = crawl_state.discover_page_count(response.text)
+
+    if response.not_modified:
+        cached_events = http_cache.load_parsed(url)
+        if cached_events is not None:
+            print(f"Página {page_number} sem alterações (304), a reutilizar {len(cached_events)} eventos em cache.")
+            scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="not_modified")
+            return cached_events
+
+    eventos_pagina = parse_agenda_html(response.text)
+    http_cache.store_parsed(url, eventos_pagina) # Reused on the next 304 for this page
+    scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="ok")
+    scrape_metrics.inc("scrape_events_total", len(eventos_pagina), source=SOURCE_NAME)
+    scrape_metrics.observe("scrape_events_per_page", len(eventos_pagina), source=SOURCE_NAME)
+    return eventos_pagina
+# --- End of get_events_from_page function ---
+
+
+def parse_agenda_html(html, backend=None):
+    """
+    Extracts the events from the HTML of one agenda page.
+    `backend` selects the HTML parser (see html_parsers.PARSER_BACKEND); None uses the configured one.
+    Returns a list of dictionaries, each representing an event.
+    """
+    # Only the div.list_agenda container is parsed (SoupStrainer-style); the rest of the page is skipped
+    with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="parse"):
+        soup = html_parsers.parse_html(html, only=("div", "list_agenda"), backend=backend)
     eventos_pagina = []
+    extract_start = time.perf_counter()
+    date_seconds = 0.0 # Date parsing time, reported as its own stage (and included in "extract")
+    date_failures = 0
 
     for item in soup.select("div.list_agenda ul"):
         titulo_tag = item.select_one("p.title a")
         titulo = titulo_tag.get_text(strip=True) if titulo_tag else None
         if not titulo:
+            scrape_metrics.drop(SOURCE_NAME, "no_title")
             continue
         current_event_title_for_debug = titulo # For debug messages
 
@@ -209,8 +217,12 @@ def get_events_from_page(page_number):
 
 
         # --- Date Parsing ---
+        date_start = time.perf_counter()
         data_inicio_dt = parse_date_string(data_inicio_str)
         data_fim_dt = parse_date_string(data_fim_str)
+        date_seconds += time.perf_counter() - date_start
+        if data_inicio_dt == datetime.max:
+            date_failures += 1
 
         # --- Append event data ---
         eventos_pagina.append({
@@ -225,12 +237,171 @@ def get_events_from_page(page_number):
         })
         # --- End of loop for one event item ---
 
+    scrape_metrics.observe("scrape_stage_seconds", time.perf_counter() - extract_start, source=SOURCE_NAME, stage="extract")
+    scrape_metrics.observe("scrape_stage_seconds", date_seconds, source=SOURCE_NAME, stage="dates")
+    if date_failures:
+        scrape_metrics.inc("date_parse_failures_total", date_failures, source=SOURCE_NAME)
     return eventos_pagina
-# --- End of get_events_from_page function ---
 
 
+def fetch_pages(page_numbers):
+    """
+    Fetches several agenda pages and returns the events of all of them, in page order.
+    With CONCURRENT_FETCH, up to MAX_CONCURRENT_REQUESTS pages are in flight at once and
+    politeness comes from the per-host token bucket (REQUESTS_PER_SECOND / REQUEST_BURST).
+    Otherwise pages are fetched one at a time with DELAY_BETWEEN_REQUESTS between them.
+    """
+    page_numbers = list(page_numbers)
+    rate_limit.default_limiter.configure_host(BASE_DOMAIN, REQUESTS_PER_SECOND, REQUEST_BURST)
+    all_events = []
+
+    if CONCURRENT_FETCH and len(page_numbers) > 1:
+        workers = min(MAX_CONCURRENT_REQUESTS, len(page_numbers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map keeps the results in page order
+            for events_from_page in executor.map(get_events_from_page, page_numbers):
+                if events_from_page:
+                    all_events.extend(events_from_page)
+        return all_events
+
+    for index, page_num in enumerate(page_numbers):
+        events_from_page = get_events_from_page(page_num)
+        if events_from_page: # Check if list is not empty before extending
+             all_events.extend(events_from_page)
+
+        # Optional polite delay between requests
+        if DELAY_BETWEEN_REQUESTS > 0 and index < len(page_numbers) - 1:
+             print(f"A aguardar {DELAY_BETWEEN_REQUESTS} segundos...")
+             time.sleep(DELAY_BETWEEN_REQUESTS)
+
+    return all_events
+
+
+def _event_fingerprint(evento):
+    """Fingerprint used by the incremental crawl (link + date text)."""
+    return crawl_state.event_fingerprint(evento["Link"], f"{evento['Data Início']} - {evento['Data Fim']}")
+
+def crawl_agenda(mode=CRAWL_MODE):
+    """
+    Collects the agenda events according to the crawl mode:
+      - "fixed": pages 1..NUM_PAGES_TO_SCRAPE (original behaviour)
+      - "full": every page reported by the agenda pager (backfill)
+      - "incremental": pages in order until one has only already-known events;
+        the known events of the pages that were not visited come from the persisted state
+    Returns the list of events (same dictionaries as get_events_from_page).
+    """
+    if mode == "fixed":
+        return fetch_pages(range(1, NUM_PAGES_TO_SCRAPE + 1))
+
+    state = crawl_state.CrawlState(CRAWL_STATE_NAME)
+    page_info = {}
+    first_page = get_events_from_page(1, page_info)
+    total_pages = min(page_info.get("total_pages") or NUM_PAGES_TO_SCRAPE, MAX_PAGES_TO_CRAWL)
+    print(f"Paginador da agenda indica {total_pages} página(s) (modo {mode}).")
+
+    if mode == "full":
+        all_events = first_page + fetch_pages(range(2, total_pages + 1))
+        seen = set()
+        for evento in all_events:
+            fingerprint = _event_fingerprint(evento)
+            seen.add(fingerprint)
+            state.remember(fingerprint, evento)
+    else:
+        all_events = []
+        seen = set()
+        page_events, page_num = first_page, 1
+        while True:
+            new_on_page = 0
+            for evento in page_events:
+                fingerprint = _event_fingerprint(evento)
+                if not state.is_known(fingerprint):
+                    new_on_page += 1
+                seen.add(fingerprint)
+                state.remember(fingerprint, evento)
+            all_events.extend(page_events)
+            print(f"Página {page_num}: {len(page_events)} eventos, {new_on_page} novos.")
+            # Stop on an empty/failed page, a page with nothing new, or the last page
+            if not page_events or new_on_page == 0 or page_num >= total_pages:
+                break
+            page_num += 1
+            page_events = get_events_from_page(page_num)
+        print(f"Crawl incremental parou na página {page_num} de {total_pages}.")
+
+    expired = state.prune(lambda evento: evento["Data Fim DT"])
+    if expired:
+        print(f"{expired} eventos terminados ou sem aparecer há {crawl_state.MAX_UNSEEN_DAYS} dias removidos do estado do crawl.")
+    if mode != "full":
+        all_events.extend(state.events_except(seen))
+    state.save()
+    return all_events
+
+
+# --- Event source for the unified pipeline (fetch_events.py) ---
+
+def format_cmf_events(event_list):
+    """
+    Converts the scraped agenda events to the format expected by the application.
+    The category is picked from keywords in the title or description (shared categorias rules).
+    """
+    formatted_events = []
+    for evento in event_list:
+        # Formatar a data para exibição
+        if evento["Data Início"] == evento["Data Fim"]:
+            data_exibicao = evento["Data Início"]
+        else:
+            data_exibicao = f"{evento['Data Início']} - {evento['Data Fim']}"
+
+        formatted_events.append({
+            "id": None, # Atribuído abaixo a partir do link (estável entre execuções)
+            "title": evento["Título"],
+            "description": evento["Descrição"],
+            "date": data_exibicao,
+            "time": "Consulte o site para horários",
+            "location": "Faro",
+            "category": categorias.DEFAULT_CATEGORY,
+            "attendees": 0,  # Valor inicial
+            "imageUrl": evento["Capa"],
+            "organizer": "Câmara Municipal de Faro",
+            "link": evento["Link"],
+            # Parsed dates carried through the pipeline (private keys, removed before writing)
+            "_start": evento["Data Início DT"] if evento["Data Início DT"] != datetime.max else None,
+            "_end": evento["Data Fim DT"] if evento["Data Fim DT"] != datetime.max else None
+        })
+    event_ids.assign_ids(formatted_events, SOURCE_NAME)
+    # Single-pass keyword classification for the whole batch
+    with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="classify"):
+        return categorias.classify(formatted_events, fields=("title", "description"))
+
+@event_sources.register_source
+class CMFAgendaSource(event_sources.EventSource):
+    """Agenda municipal em cm-faro.pt (crawl conforme CRAWL_MODE)."""
+
+    name = SOURCE_NAME
+    description = f"Agenda da Câmara Municipal de Faro (modo {CRAWL_MODE})"
+
+    def fetch(self):
+        all_events = crawl_agenda()
+        # Events with parsing errors (datetime.max) will be placed at the end.
+        eventos_ordenados = sorted(all_events, key=lambda x: x["Data Início DT"])
+        formatted_events = format_cmf_events(eventos_ordenados)
+        if ENRICH_DETAILS:
+            with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="enrich"):
+                enrich.enrich_events(formatted_events)
+        return formatted_events
+
 # --- Output Functions ---
 
+@lru_cache(maxsize=4096)
+def date_status(start_str, end_str):
+    """
+    Validade das datas de um evento, partilhada pelas saídas de consola e HTML:
+    (início válido, fim válido, início e fim são o mesmo dia). Memorizado pelo par de textos.
+    """
+    start_is_valid = bool(start_str) and not any(marker in start_str.lower() for marker in INVALID_DATE_MARKERS)
+    end_is_valid = bool(end_str) and not any(marker in end_str.lower() for marker in INVALID_DATE_MARKERS)
+    same_day = ' '.join((start_str or '').split()) == ' '.join((end_str or '').split())
+    return start_is_valid, end_is_valid, same_day
+
 # Opção 1: Saída na Consola Melhorada
 def display_events_console_melhorada(event_list):
     """
@@ -242,7 +413,7 @@ def display_events_console_melhorada(event_list):
 
     today_date = datetime.now().date()
     print(f"\n📅 AGENDA DE FARO ({len(event_list)} EVENTOS) 📅")
-    print(f"   (Dados de: {today_date.strftime('%d %b %Y')}, ordenados por data de início)")
+    print(f"   (Dados de: {pt_dates.format_date(today_date)}, ordenados por data de início)")
     print("=" * 60) # Separador mais forte
 
     for i, evento in enumerate(event_list, 1):
@@ -251,13 +422,10 @@ def display_events_console_melhorada(event_list):
 
         start_str = evento['Data Início']
         end_str = evento['Data Fim']
-        start_norm = ' '.join(start_str.split()).strip()
-        end_norm = ' '.join(end_str.split()).strip()
-        start_is_valid = start_str and not any(marker in start_str.lower() for marker in ["sem data", "erro", "inválid"])
-        end_is_valid = end_str and not any(marker in end_str.lower() for marker in ["sem data", "erro", "inválid"])
+        start_is_valid, end_is_valid, same_day = date_status(start_str, end_str)
 
         if start_is_valid and end_is_valid:
-            if start_norm == end_norm:
+            if same_day:
                 print(f"🗓️ Data:    {start_str}")
             else:
                 print(f"🗓️ Início:  {start_str}")
@@ -311,10 +479,10 @@ def output_events_as_json(event_list, filename=JSON_OUTPUT_FILENAME):
         events_for_json.append(evento_copy)
 
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            # indent=4 para tornar o ficheiro JSON legível por humanos
-            # ensure_ascii=False para suportar caracteres portugueses corretamente
-            json.dump(events_for_json, f, ensure_ascii=False, indent=4)
+        # indent=4 para tornar o ficheiro JSON legível por humanos (em produção: minificado + .gz/.br)
+        # ensure_ascii=False para suportar caracteres portugueses corretamente
+        with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="write"):
+            artifacts.write_json(filename, events_for_json, indent=4)
         print(f"\n✅ Eventos guardados com sucesso no ficheiro: {filename}")
     except IOError as e:
         print(f"\n❌ Erro ao guardar o ficheiro JSON: {e}")
@@ -324,19 +492,13 @@ def output_events_as_json(event_list, filename=JSON_OUTPUT_FILENAME):
 
 
 # Opção 3: Saída em HTML
-def generate_html_output(event_list, filename=HTML_OUTPUT_FILENAME):
-    """Gera um ficheiro HTML simples com os eventos."""
-    if not event_list:
-        print("Nenhum evento para gerar HTML.")
-        return
-
-    html_content = """
+HTML_PAGE_HEADER = Template("""
 <!DOCTYPE html>
 <html lang="pt">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Agenda de Faro</title>
+    <title>$title</title>
     <style>
         body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; padding: 20px; background-color: #f8f9fa; color: #343a40; }
         .container { max-width: 900px; margin: auto; background: #ffffff; padding: 25px; border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.1); }
@@ -352,64 +514,138 @@ def generate_html_output(event_list, filename=HTML_OUTPUT_FILENAME):
         .event-card .link a:hover { background-color: #0056b3; text-decoration: none; }
         .event-card .link.no-link { color: #6c757d; font-style: italic; font-size: 0.9em; } /* Style for no link text */
         .error-date { color: #e74c3c; font-style: italic; font-weight: 500; }
+        .pager { text-align: center; margin: 10px 0 25px; }
+        .pager a, .pager span { margin: 0 4px; }
         .footer { text-align: center; margin-top: 30px; font-size: 0.85em; color: #6c757d; }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>📅 Agenda de Eventos - Faro</h1>
+$pager""")
+HTML_EVENT_CARD = Template("""        <div class="event-card">
+            <h2>$title</h2>
+$image            <p class="date">$date</p>
+            <p class="description">📝 $description</p>
+$link        </div>
+""")
+HTML_IMAGE = Template("""            <img src="$src" alt="Capa para $title" onerror="this.style.display='none'; console.error('Erro ao carregar imagem: $src');">
+""")
+HTML_LINK = Template("""            <p class="link"><a href="$href" target="_blank" rel="noopener noreferrer">🔗 Mais informações</a></p>
+""")
+HTML_NO_LINK = """            <p class="link no-link">🔗 Sem link disponível</p>
 """
+HTML_PAGE_FOOTER = Template("""
+     <p class="footer">Gerado em: $generated</p>
+    </div> </body>
+</html>
+""")
+# Marcador no fim do ficheiro com o hash do conteúdo (sem a hora de geração), para saltar reescritas
+HTML_HASH_MARKER = "<!-- content-hash: {} -->\n"
+HTML_HASH_PATTERN = re.compile(r"<!-- content-hash: ([0-9a-f]+) -->\s*$")
+
+def _html_date(evento):
+    start_str, end_str = evento['Data Início'], evento['Data Fim']
+    start_is_valid, end_is_valid, same_day = date_status(start_str, end_str)
+    start_html, end_html = html.escape(start_str or ''), html.escape(end_str or '')
+    if start_is_valid and end_is_valid:
+        if same_day:
+            return f"<span class='label'>🗓️ Data:</span> {start_html}"
+        return f"<span class='label'>🗓️ De:</span> {start_html}<br><span class='label'>🗓️ Até:</span> {end_html}"
+    return (f"<span class='label'>Data Início:</span> <span class='{'' if start_is_valid else 'error-date'}'>{start_html}</span><br>"
+            f"<span class='label'>Data Fim:</span> <span class='{'' if end_is_valid else 'error-date'}'>{end_html}</span>")
+
+def render_event_card(evento):
+    """HTML de um evento (um cartão), a partir dos templates."""
+    title = html.escape(evento['Título'] or '')
+    image = ""
+    if evento['Capa'] and evento['Capa'].lower() != "sem capa":
+        image = HTML_IMAGE.substitute(src=html.escape(evento['Capa']), title=title)
+    if evento['Link'] and evento['Link'].lower() != "sem link":
+        link = HTML_LINK.substitute(href=html.escape(evento['Link']))
+    else:
+        link = HTML_NO_LINK
+    return HTML_EVENT_CARD.substitute(title=title, image=image, date=_html_date(evento),
+                                      description=html.escape(evento['Descrição'] or ''), link=link)
+
+def _page_filename(filename, page):
+    if page == 1:
+        return filename
+    base, ext = os.path.splitext(filename)
+    return f"{base}-{page}{ext}"
+
+def _render_pager(filename, page, total_pages):
+    if total_pages <= 1:
+        return ""
+    links = []
+    for number in range(1, total_pages + 1):
+        if number == page:
+            links.append(f"<span>{number}</span>")
+        else:
+            links.append(f'<a href="{html.escape(os.path.basename(_page_filename(filename, number)))}">{number}</a>')
+    return f'        <p class="pager">{" ".join(links)}</p>\n'
 
-    for evento in event_list:
-        html_content += '        <div class="event-card">\n'
-        html_content += f"            <h2>{evento['Título']}</h2>\n"
-
-        # Imagem
-        if evento['Capa'] and evento['Capa'].lower() != "sem capa":
-             html_content += f'            <img src="{evento["Capa"]}" alt="Capa para {evento["Título"]}" onerror="this.style.display=\'none\'; console.error(\'Erro ao carregar imagem: {evento["Capa"]}\');">\n'
-
-        # Datas
-        start_str = evento['Data Início']
-        end_str = evento['Data Fim']
-        start_norm = ' '.join(start_str.split()).strip()
-        end_norm = ' '.join(end_str.split()).strip()
-        start_is_valid = start_str and not any(marker in start_str.lower() for marker in ["sem data", "erro", "inválid"])
-        end_is_valid = end_str and not any(marker in end_str.lower() for marker in ["sem data", "erro", "inválid"])
+def _stored_html_hash(path):
+    """Hash gravado no fim de um HTML gerado anteriormente (lê só o final do ficheiro)."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 200))
+            match = HTML_HASH_PATTERN.search(f.read().decode('utf-8', errors='ignore'))
+    except OSError:
+        return None
+    return match.group(1) if match else None
 
-        html_content += '            <p class="date">'
-        if start_is_valid and end_is_valid:
-            if start_norm == end_norm:
-                html_content += f"<span class='label'>🗓️ Data:</span> {start_str}"
-            else:
-                html_content += f"<span class='label'>🗓️ De:</span> {start_str}<br><span class='label'>🗓️ Até:</span> {end_str}"
-        else:
-             html_content += f"<span class='label'>Data Início:</span> <span class='{'' if start_is_valid else 'error-date'}'>{start_str}</span><br>"
-             html_content += f"<span class='label'>Data Fim:</span> <span class='{'' if end_is_valid else 'error-date'}'>{end_str}</span>"
-        html_content += '</p>\n'
+def _page_chunks(title, pager, events):
+    yield HTML_PAGE_HEADER.substitute(title=title, pager=pager)
+    for evento in events:
+        yield render_event_card(evento)
+    yield pager
 
-        # Descrição
-        html_content += f'            <p class="description">📝 {evento["Descrição"]}</p>\n'
+def _write_agenda_page(path, title, pager, events, generated):
+    """
+    Escreve uma página em streaming (cartão a cartão, para um temporário) enquanto calcula o hash
+    do conteúdo. Se o hash for igual ao da página existente, o ficheiro não é substituído.
+    Devolve True se a página foi reescrita.
+    """
+    digest = hashlib.sha256()
 
-        # Link
-        if evento['Link'] and evento['Link'].lower() != "sem link":
-            html_content += f'            <p class="link"><a href="{evento["Link"]}" target="_blank" rel="noopener noreferrer">🔗 Mais informações</a></p>\n'
-        else:
-             html_content += '            <p class="link no-link">🔗 Sem link disponível</p>\n' # Added class for styling
+    def chunks():
+        for chunk in _page_chunks(title, pager, events):
+            digest.update(chunk.encode('utf-8'))
+            yield chunk
+        yield HTML_PAGE_FOOTER.substitute(generated=generated)
+        yield HTML_HASH_MARKER.format(digest.hexdigest()[:16])
 
+    return file_utils.atomic_write_chunks(
+        path, chunks(), unchanged=lambda: _stored_html_hash(path) == digest.hexdigest()[:16])
 
-        html_content += '        </div>\n' # Fecha event-card
+def generate_html_output(event_list, filename=HTML_OUTPUT_FILENAME, events_per_page=HTML_EVENTS_PER_PAGE):
+    """
+    Gera a agenda em HTML a partir de templates, escrita em streaming (a memória não cresce com o
+    número de eventos). Acima de `events_per_page` eventos é dividida em várias páginas com paginador.
+    Páginas cujo conteúdo não mudou desde a última execução não são reescritas.
+    """
+    if not event_list:
+        print("Nenhum evento para gerar HTML.")
+        return
 
-    # Adiciona data de geração no rodapé
-    generation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    html_content += f"""
-     <p class="footer">Gerado em: {generation_time}</p>
-    </div> </body>
-</html>
-"""
+    total_pages = max(1, -(-len(event_list) // events_per_page))
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    written = 0
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"\n✅ Ficheiro HTML gerado com sucesso: {filename}")
+        for page in range(1, total_pages + 1):
+            page_events = event_list[(page - 1) * events_per_page:page * events_per_page]
+            pager = _render_pager(filename, page, total_pages)
+            title = "Agenda de Faro" if total_pages == 1 else f"Agenda de Faro ({page}/{total_pages})"
+            if _write_agenda_page(_page_filename(filename, page), title, pager, page_events, generated):
+                written += 1
+        # Páginas a mais de uma execução anterior com mais eventos
+        stale_page = total_pages + 1
+        while os.path.exists(_page_filename(filename, stale_page)):
+            os.remove(_page_filename(filename, stale_page))
+            stale_page += 1
+        print(f"\n✅ Ficheiro HTML gerado com sucesso: {filename} ({total_pages} páginas, {written} reescritas)")
         print(f"   Pode abri-lo no seu navegador.")
     except IOError as e:
         print(f"\n❌ Erro ao gerar o ficheiro HTML: {e}")
@@ -420,27 +656,13 @@ def main():
     """
     Main function to orchestrate the scraping process and output generation.
     """
-    # Attempt to set locale for date parsing - script continues even if it fails
-    set_portuguese_locale()
-
-    all_events = []
-    print(f"\nA iniciar scraping de {NUM_PAGES_TO_SCRAPE} página(s) da agenda de Faro...")
+    print(f"\nA iniciar scraping da agenda de Faro (modo {CRAWL_MODE})...")
     # Use current date from context
     print(f"(Executado em {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
 
 
-    # Loop through the specified number of pages
-    for page_num in range(1, NUM_PAGES_TO_SCRAPE + 1):
-        events_from_page = get_events_from_page(page_num)
-        if events_from_page: # Check if list is not empty before extending
-             all_events.extend(events_from_page)
-        # else: # Optional: Keep commented unless needed
-             # print(f"Nenhum evento encontrado na página {page_num}.")
-
-        # Optional polite delay between requests
-        if DELAY_BETWEEN_REQUESTS > 0 and page_num < NUM_PAGES_TO_SCRAPE:
-             print(f"A aguardar {DELAY_BETWEEN_REQUESTS} segundos...")
-             time.sleep(DELAY_BETWEEN_REQUESTS)
+    # Fetch the agenda pages according to CRAWL_MODE (fixed / full / incremental)
+    all_events = crawl_agenda()
 
     print(f"\nScraping concluído. Total de {len(all_events)} eventos brutos encontrados.")
 
@@ -459,6 +681,9 @@ def main():
     # 3. Output to Console (Improved version)
     display_events_console_melhorada(eventos_ordenados)
 
+    # Timings and counters of this run (JSON + Prometheus textfile)
+    scrape_metrics.write("cmf")
+
     # 4. Original Console Output (Keep if needed for comparison)
     # from __main__ import display_events # Assuming original function was named display_events
     # display_events(eventos_ordenados)
@@ -1,18 +1,9 @@
-from gnews import GNews
 import json
-import locale
 from email.utils import parsedate_tz, mktime_tz
 from datetime import datetime
 import sys
 
-# Configurar o local para português de Portugal
-try:
-    locale.setlocale(locale.LC_TIME, 'pt_PT.UTF-8')
-except:
-    try:
-        locale.setlocale(locale.LC_TIME, 'Portuguese_Portugal.1252')
-    except:
-        pass  # Fallback para o locale padrão se não encontrar português
+from news_dedup import canonical_news_url, cluster_stories
 
 # Função para converter a data para objeto datetime
 def converter_data(data_pub):
@@ -32,22 +23,20 @@ def remover_duplicatas(lista_noticias):
     
     for noticia in lista_noticias:
         url = noticia.get('url', '')
-        if url and url not in urls_vistas:
-            urls_vistas.add(url)
+        chave = canonical_news_url(url) or url # Sem tracking, www./m./amp. e redirecionamentos do Google News
+        if chave and chave not in urls_vistas:
+            urls_vistas.add(chave)
             noticias_unicas.append(noticia)
     
     return noticias_unicas
 
 def main():
-    # Inicializa o cliente do Google News
-    google_news = GNews(language='pt', country='PT', max_results=10)
+    import news_queries # gnews só é importado quando as pesquisas arrancam
     
-    # Busca notícias sobre Faro e Farense separadamente
-    noticias_faro = google_news.get_news('Faro Algarve')
-    noticias_farense = google_news.get_news('Farense')
+    # Pesquisas configuradas em news_queries.json, em paralelo; as que falham são ignoradas
+    todas_noticias, _ = news_queries.run_queries()
     
-    # Combinar os resultados e remover duplicatas
-    todas_noticias = noticias_faro + noticias_farense
+    # Remover duplicatas entre pesquisas
     noticias_unicas = remover_duplicatas(todas_noticias)
     
     # Ordenar as notícias pela data de publicação (mais recente no topo)
@@ -63,7 +52,7 @@ def main():
         elif 'farense' in titulo_lower or 'farense' in descricao_lower:
             noticia['origem_busca'] = 'Farense'
         else:
-            noticia['origem_busca'] = 'Desconhecida'
+            noticia['origem_busca'] = noticia.get('origem_busca') or 'Desconhecida' # Etiqueta da pesquisa
     
     # Converter para o formato esperado pela aplicação
     noticias_formatadas = []
@@ -88,6 +77,9 @@ def main():
             'origem_busca': noticia.get('origem_busca', 'Desconhecida')
         })
     
+    # A mesma história em vários jornais: fica uma, com os outros em "covered_by"
+    noticias_formatadas, _ = cluster_stories(noticias_formatadas)
+    
     # Imprimir o número de notícias encontradas
     print(f"Total de notícias encontradas: {len(noticias_formatadas)}", file=sys.stderr)
     
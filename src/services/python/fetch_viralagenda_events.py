@@ -1,30 +1,142 @@
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import json
+from concurrent.futures import ThreadPoolExecutor
 import os
 
-def get_viralagenda_events():
-    """Obtém eventos da Viralagenda para Faro."""
-    # URL para extrair os eventos
-    url = "https://www.viralagenda.com/pt/faro/faro"
-    
-    # Obtém a data e hora atuais
-    now = datetime.now()
-    today_str = now.strftime("%d-%m-%Y")
-    
+import artifacts
+import categorias
+import crawl_state
+import event_ids
+import event_sources
+import html_parsers
+import http_cache
+import pt_dates
+import rate_limit
+import scrape_metrics
+
+SOURCE_NAME = "viralagenda" # Nome da fonte no registo (também entra nos IDs estáveis dos eventos)
+REQUEST_TIMEOUT = 20 # Segundos por tentativa (o cliente HTTP repete erros transitórios)
+BASE_DOMAIN = "https://www.viralagenda.com"
+CITY_URL = BASE_DOMAIN + "/pt/faro/{city}" # Listagem de um concelho do distrito de Faro
+# Concelhos a recolher (slugs da Viralagenda); LIGAFARO_VIRALAGENDA_CITIES=faro,loule,... substitui a lista
+DEFAULT_CITIES = ("faro", "loule", "olhao", "tavira", "sao-bras-de-alportel")
+CITIES = tuple(city.strip() for city in os.environ.get("LIGAFARO_VIRALAGENDA_CITIES", ",".join(DEFAULT_CITIES)).split(",") if city.strip())
+# Nomes para mostrar; outros slugs passam a 'Vila Real De Santo Antonio' (sem acentos)
+CITY_NAMES = {"faro": "Faro", "loule": "Loulé", "olhao": "Olhão", "tavira": "Tavira",
+              "sao-bras-de-alportel": "São Brás de Alportel"}
+MAX_PAGES_PER_CITY = 20 # Limite de segurança para o número de páginas indicado pelo paginador
+MAX_CONCURRENT_REQUESTS = 4 # Páginas em simultâneo (todas as cidades partilham o token bucket do host)
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 4
+
+def city_name(city):
+    return CITY_NAMES.get(city, city.replace("-", " ").title())
+
+def page_url(city, page):
+    url = CITY_URL.format(city=city)
+    return url if page == 1 else f"{url}?page={page}"
+
+def get_listing_page(url, today_str, now):
+    """
+    Obtém e extrai uma página de resultados.
+    Devolve (eventos, número de páginas indicado pelo paginador ou None); em caso de erro (None, None).
+    """
     try:
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
+        # GET condicional através da cache HTTP em disco
+        with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="fetch"):
+            response = http_cache.fetch(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=REQUEST_TIMEOUT)
         
         if response.status_code != 200:
-            print(f"Erro ao acessar a página: {response.status_code}")
-            return []
+            print(f"Erro ao acessar a página {url}: {response.status_code}")
+            scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="error")
+            return None, None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return extract_events(soup, today_str, now)
+        # O paginador lê-se do HTML bruto, também quando o corpo vem da cache (304)
+        page_count = crawl_state.discover_page_count(response.text)
+        
+        # O marcador "Hoje!" depende do dia, por isso a cache dos eventos é por data
+        if response.not_modified:
+            cached_events = http_cache.load_parsed(url, variant=today_str)
+            if cached_events is not None:
+                scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="not_modified")
+                return cached_events, page_count
+        
+        events = parse_viralagenda_html(response.text, today_str, now)
+        http_cache.store_parsed(url, events, variant=today_str)
+        scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="ok")
+        scrape_metrics.inc("scrape_events_total", len(events), source=SOURCE_NAME)
+        scrape_metrics.observe("scrape_events_per_page", len(events), source=SOURCE_NAME)
+        return events, page_count
     except Exception as e:
-        print(f"Erro ao buscar eventos da Viralagenda: {e}")
-        return []
+        print(f"Erro ao buscar eventos da Viralagenda em {url}: {e}")
+        scrape_metrics.inc("scrape_pages_total", source=SOURCE_NAME, result="error")
+        return None, None
+
+def record_key(evento):
+    """Chave estável de um evento da listagem: id da Viralagenda, senão o link, senão título + data + local."""
+    return evento.get("viral_id") or evento.get("link") or f"{evento['titulo']}|{evento['data']}|{evento['local']}"
+
+def get_viralagenda_events(cities=CITIES):
+    """
+    Obtém eventos da Viralagenda para os concelhos em `cities`, percorrendo todas as páginas.
+    As páginas são pedidas em paralelo (MAX_CONCURRENT_REQUESTS) sob o token bucket do host.
+    Em cada cidade as páginas são processadas por ordem e a recolha pára na primeira página vazia
+    ou que repete eventos já vistos (o site devolve a última página para números fora do intervalo).
+    Os eventos repetidos entre páginas ou cidades são descartados pela chave estável (record_key).
+    """
+    now = datetime.now()
+    today_str = now.strftime("%d-%m-%Y")
+    rate_limit.default_limiter.configure_host(BASE_DOMAIN, REQUESTS_PER_SECOND, REQUEST_BURST)
+    
+    seen = set() # Chaves de todas as cidades (eventos repetidos entre cidades)
+    city_seen = {city: set() for city in cities} # Chaves por cidade (deteção de páginas repetidas)
+    events = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        # Página 1 de todas as cidades em paralelo: dá os primeiros eventos e o número de páginas
+        pending = {city: [(1, executor.submit(get_listing_page, page_url(city, 1), today_str, now))] for city in cities}
+        known_pages = {city: 1 for city in cities}
+        finished = set()
+        while pending:
+            next_round = {}
+            for city, futures in pending.items():
+                for page, future in futures:
+                    if city in finished:
+                        future.cancel()
+                        continue
+                    page_events, page_count = future.result()
+                    if page_events is None:
+                        continue # Erro nesta página: as seguintes ainda podem ser recolhidas
+                    keys = {record_key(evento) for evento in page_events}
+                    if not keys or keys <= city_seen[city]:
+                        # Página vazia ou repetida: não há mais resultados nesta cidade
+                        finished.add(city)
+                        continue
+                    city_seen[city].update(keys)
+                    for evento in page_events:
+                        key = record_key(evento)
+                        if key not in seen:
+                            seen.add(key)
+                            events.append(evento)
+                    if page_count:
+                        known_pages[city] = max(known_pages[city], min(page_count, MAX_PAGES_PER_CITY))
+                if city in finished:
+                    continue
+                # O paginador pode mostrar só algumas páginas de cada vez: pedir as que ainda faltam
+                last_requested = futures[-1][0]
+                new_pages = range(last_requested + 1, known_pages[city] + 1)
+                if new_pages:
+                    next_round[city] = [(page, executor.submit(get_listing_page, page_url(city, page), today_str, now))
+                                        for page in new_pages]
+            pending = next_round
+    
+    print(f"Viralagenda: {len(events)} eventos em {len(cities)} concelhos ({', '.join(cities)}).")
+    return events
+
+def parse_viralagenda_html(html, today_str, now, backend=None):
+    """Faz o parsing apenas dos itens li.viral-item (estilo SoupStrainer) e extrai os eventos."""
+    with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="parse"):
+        soup = html_parsers.parse_html(html, only=("li", "viral-item"), backend=backend)
+    with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="extract"):
+        return extract_events(soup, today_str, now)
 
 def format_event_date(day, month, year, today_str):
     """Formata a data do evento e verifica se é hoje."""
@@ -36,48 +148,58 @@ def format_event_date(day, month, year, today_str):
     return f"{day} {month} {year}"
 
 def extract_events(soup, today_str, now):
-    """Extrai os detalhes dos eventos da página."""
+    """
+    Extrai os detalhes dos eventos da página.
+    `soup` pode vir de qualquer backend de html_parsers (só usa select/select_one/get_text/get).
+    """
     events_list = []
-    event_items = soup.find_all('li', class_='viral-item')
+    event_items = soup.select('li.viral-item')
     
     for item in event_items:
         # Extrair data
-        date_element = item.find('div', class_='viral-event-date')
+        date_element = item.select_one('div.viral-event-date')
         if date_element:
-            weekday = date_element.find('label', class_='viral-event-weekday').text
-            day = date_element.find('label', class_='viral-event-day').text
-            month = date_element.find('label', class_='viral-event-month').text
-            year = date_element.find('label', class_='viral-event-year')
-            year = year.text if year else str(now.year)  # Caso o ano não seja encontrado, usa o ano atual
+            weekday = date_element.select_one('label.viral-event-weekday').get_text()
+            day = date_element.select_one('label.viral-event-day').get_text()
+            month = date_element.select_one('label.viral-event-month').get_text()
+            year = date_element.select_one('label.viral-event-year')
+            year = year.get_text() if year else str(now.year)  # Caso o ano não seja encontrado, usa o ano atual
             date = format_event_date(day, month, year, today_str)
+            date_dt = pt_dates.parse_date(f"{day} {month} {year}") # Meses em maiúsculas (ABR, MAI, ...)
+            if date_dt is None:
+                scrape_metrics.inc("date_parse_failures_total", source=SOURCE_NAME)
         else:
             date = "Data não encontrada"
+            date_dt = None
 
         # Extrair hora
-        time_element = item.find('div', class_='viral-event-hour')
-        time = time_element.text.strip() if time_element else "Hora não encontrada"
+        time_element = item.select_one('div.viral-event-hour')
+        time = time_element.get_text().strip() if time_element else "Hora não encontrada"
 
         # Extrair título
-        title_element = item.find('div', class_='viral-event-title')
-        title = title_element.text.strip() if title_element else "Título não encontrado"
+        title_element = item.select_one('div.viral-event-title')
+        title = title_element.get_text().strip() if title_element else "Título não encontrado"
 
         # Extrair local
-        location_element = item.find('a', class_='viral-event-place')
-        location = location_element.text.strip() if location_element else "Local não encontrado"
+        location_element = item.select_one('a.viral-event-place')
+        location = location_element.get_text().strip() if location_element else "Local não encontrado"
         
         # Extrair link
-        link_element = item.find('a', class_='viral-event-title')
-        link = link_element['href'] if link_element and 'href' in link_element.attrs else None
+        link_element = item.select_one('a.viral-event-title')
+        link = link_element.get('href') if link_element else None
         
         # Filtra os eventos que têm o local "Local não encontrado" ou "Auchan Live Faro"
         if location in ["Local não encontrado", "Auchan Live Faro"]:
+            scrape_metrics.drop(SOURCE_NAME, "location_missing" if location == "Local não encontrado" else "location_excluded")
             continue
 
         # Adiciona o evento à lista apenas se as informações essenciais forem encontradas
-        if "não encontrado" not in [title, time, location]:
+        if "não encontrado" in [title, time, location]:
+            scrape_metrics.drop(SOURCE_NAME, "incomplete")
+        else:
             # Extrair imagem
-            image_element = item.find('div', class_='viral-event-image')
-            image_url = image_element['data-img'] if image_element and 'data-img' in image_element.attrs else None
+            image_element = item.select_one('div.viral-event-image')
+            image_url = image_element.get('data-img') if image_element else None
             
             # Determinar categoria com base em palavras-chave no título
             categoria = determinar_categoria(title)
@@ -85,65 +207,28 @@ def extract_events(soup, today_str, now):
             events_list.append({
                 'titulo': title,
                 'data': date,
+                'data_dt': date_dt,
                 'hora': time,
                 'local': location,
                 'imagem': image_url,
                 'link': link,
-                'categoria': categoria
+                'categoria': categoria,
+                'viral_id': item.get('data-id') # Id do evento na Viralagenda (chave estável entre páginas)
             })
 
     return events_list
 
 def determinar_categoria(titulo):
-    """Determina a categoria do evento com base em palavras-chave no título."""
-    titulo_lower = titulo.lower()
-    
-    keywords = {
-        'música': "Música",
-        'concerto': "Música",
-        'festival': "Música",
-        'dj': "Música",
-        'banda': "Música",
-        'gastronomia': "Comida & Bebida",
-        'culinária': "Comida & Bebida",
-        'degustação': "Comida & Bebida",
-        'jantar': "Comida & Bebida",
-        'almoço': "Comida & Bebida",
-        'ambiente': "Ambiente",
-        'ecologia': "Ambiente",
-        'natureza': "Ambiente",
-        'feira': "Compras",
-        'mercado': "Compras",
-        'artesanato': "Compras",
-        'desporto': "Desporto",
-        'corrida': "Desporto",
-        'torneio': "Desporto",
-        'tecnologia': "Tecnologia",
-        'digital': "Tecnologia",
-        'inovação': "Tecnologia",
-        'workshop': "Educação",
-        'curso': "Educação",
-        'palestra': "Educação",
-        'teatro': "Cultural",
-        'exposição': "Cultural",
-        'arte': "Cultural",
-        'cinema': "Cultural",
-        'filme': "Cultural"
-    }
-    
-    for keyword, cat in keywords.items():
-        if keyword in titulo_lower:
-            return cat
-    
-    return "Cultural"  # Categoria padrão
+    """Determina a categoria do evento com base em palavras-chave no título (regras partilhadas em categorias)."""
+    return categorias.classify_text(titulo)
 
 def format_viralagenda_events(events):
     """Formata os eventos da Viralagenda para o formato esperado pela aplicação."""
     formatted_events = []
     
-    for i, evento in enumerate(events):
+    for evento in events:
         formatted_events.append({
-            "id": 10000 + i,  # IDs a partir de 10000 para evitar conflitos com outros eventos
+            "id": None,  # Atribuído abaixo a partir do link (estável entre execuções e sem conflitos com outras fontes)
             "title": evento["titulo"],
             "description": f"Evento em {evento['local']}",
             "date": evento["data"],
@@ -153,10 +238,13 @@ def format_viralagenda_events(events):
             "attendees": 0,
             "imageUrl": evento["imagem"],
             "organizer": "Viralagenda",
-            "link": evento["link"]
+            "link": evento["link"],
+            # Data já convertida, levada até ao fim do pipeline (chaves privadas, não são gravadas)
+            "_start": evento.get("data_dt"),
+            "_end": evento.get("data_dt")
         })
     
-    return formatted_events
+    return event_ids.assign_ids(formatted_events, SOURCE_NAME)
 
 def fetch_viralagenda_events():
     """Função principal para buscar e formatar eventos da Viralagenda."""
@@ -167,11 +255,22 @@ def fetch_viralagenda_events():
     output_dir = os.path.dirname(os.path.abspath(__file__))
     output_path = os.path.join(output_dir, "viralagenda_events.json")
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(formatted_events, f, ensure_ascii=False, indent=2)
+    with scrape_metrics.timer("scrape_stage_seconds", source=SOURCE_NAME, stage="write"):
+        artifacts.write_json(output_path, event_sources.strip_private_fields(formatted_events))
     
     print(f"Dados da Viralagenda salvos em {output_path}")
     return formatted_events
 
+@event_sources.register_source
+class ViralagendaSource(event_sources.EventSource):
+    """Eventos dos concelhos de CITIES publicados na Viralagenda."""
+
+    name = SOURCE_NAME
+    description = f"Viralagenda - {', '.join(city_name(city) for city in CITIES)}"
+
+    def fetch(self):
+        return fetch_viralagenda_events()
+
 if __name__ == "__main__":
-    fetch_viralagenda_events()
\ No newline at end of file
+    fetch_viralagenda_events()
+    scrape_metrics.write(SOURCE_NAME)
\ No newline at end of file
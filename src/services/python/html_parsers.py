@@ -0,0 +1,106 @@
+# --- Imports ---
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# --- Constants ---
+# Backend de parsing: "auto", "html.parser", "lxml" ou "selectolax" (pode ser alterado com LIGAFARO_HTML_PARSER)
+PARSER_BACKEND = os.environ.get("LIGAFARO_HTML_PARSER", "auto")
+# Ordem de preferência do modo "auto" (do mais rápido para o mais portátil)
+AUTO_PREFERENCE = ["selectolax", "lxml", "html.parser"]
+
+
+def _backend_is_available(name):
+    if name == "html.parser":
+        return True
+    try:
+        if name == "lxml":
+            import lxml # noqa: F401
+        elif name == "selectolax":
+            _selectolax_parser_class()
+        else:
+            return False
+    except ImportError:
+        return False
+    return True
+
+def _selectolax_parser_class():
+    """Classe de parser do selectolax: Lexbor (selectolax >= 1.0) ou Modest (versões antigas)."""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+        return HTMLParser
+
+def available_backends():
+    """Lista os backends instalados neste ambiente."""
+    return [name for name in AUTO_PREFERENCE if _backend_is_available(name)]
+
+def resolve_backend(name=None):
+    """
+    Converte o nome pedido no backend efetivo.
+    "auto" escolhe o mais rápido instalado; um backend pedido mas não instalado
+    recai para "html.parser" com um aviso, para o scraping nunca falhar por isto.
+    """
+    name = name or PARSER_BACKEND
+    if name == "auto":
+        return available_backends()[0]
+    if not _backend_is_available(name):
+        print(f"Aviso: backend HTML '{name}' não disponível, a usar 'html.parser'.")
+        return "html.parser"
+    return name
+
+
+class SelectolaxNode:
+    """
+    Adaptador mínimo de um nó selectolax para a interface de Tag do BeautifulSoup
+    usada pelos scrapers: select, select_one, get_text, get, attrs, text e [].
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [SelectolaxNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css):
+        node = self._node.css_first(css)
+        return SelectolaxNode(node) if node is not None else None
+
+    def get_text(self, separator="", strip=False):
+        return self._node.text(deep=True, separator=separator, strip=strip)
+
+    @property
+    def text(self):
+        return self._node.text(deep=True)
+
+    @property
+    def attrs(self):
+        return self._node.attributes
+
+    def get(self, attr, default=None):
+        value = self._node.attributes.get(attr, default)
+        return default if value is None else value
+
+    def __getitem__(self, attr):
+        return self._node.attributes[attr]
+
+
+def parse_html(html, only=None, backend=None):
+    """
+    Faz o parsing do HTML com o backend escolhido e devolve um objeto com select/select_one.
+    `only=(tag, classe)` limita a árvore aos contentores que interessam (estilo SoupStrainer),
+    ex.: ("div", "list_agenda") ou ("li", "viral-item"); tudo o resto da página é ignorado.
+    """
+    backend = resolve_backend(backend)
+
+    if backend == "selectolax":
+        tree = _selectolax_parser_class()(html)
+        # O selectolax constrói a árvore em C de uma só vez; o âmbito é aplicado nos seletores
+        return SelectolaxNode(tree.root if tree.root is not None else tree.body)
+
+    parse_only = SoupStrainer(only[0], class_=only[1]) if only else None
+    return BeautifulSoup(html, backend, parse_only=parse_only)
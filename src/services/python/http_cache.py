@@ -0,0 +1,158 @@
+# --- Imports ---
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+import http_client
+from file_utils import atomic_write_text
+
+# --- Constants ---
+# Pasta da cache em disco (pode ser alterada com LIGAFARO_CACHE_DIR)
+CACHE_DIR = os.environ.get(
+    "LIGAFARO_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+# LIGAFARO_HTTP_CACHE=0 desativa a cache (todos os pedidos passam a ser completos)
+HTTP_CACHE_ENABLED = os.environ.get("LIGAFARO_HTTP_CACHE", "1") != "0"
+
+
+# --- Serialização de datetime nos eventos guardados ---
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+def json_object_hook(obj):
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class CachedResponse:
+    """
+    Resposta mínima devolvida pela cache.
+    `not_modified` é True quando o servidor respondeu 304 e o corpo veio do disco.
+    """
+
+    def __init__(self, url, status_code, text, headers=None, not_modified=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.not_modified = not_modified
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} para {self.url}", response=self)
+
+
+class HttpCache:
+    """
+    Cache HTTP condicional em disco.
+    Por URL guarda o ETag / Last-Modified, o corpo da última resposta 200 e, opcionalmente,
+    a lista de eventos já extraída desse corpo. Os pedidos seguintes enviam
+    If-None-Match / If-Modified-Since; num 304 o chamador pode reutilizar os eventos
+    guardados sem voltar a correr o BeautifulSoup.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, enabled=HTTP_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def _entry_path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_entry(self, url):
+        path = self._entry_path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f, object_hook=json_object_hook)
+        except (IOError, ValueError) as e:
+            print(f"Aviso: entrada de cache corrompida para {url}, a ignorar: {e}")
+            return None
+        return entry if entry.get("url") == url else None
+
+    def _write_entry(self, url, entry):
+        with self._lock:
+            atomic_write_text(self._entry_path(url), json.dumps(entry, ensure_ascii=False, default=json_default))
+
+    def fetch(self, url, headers=None, timeout=None):
+        """
+        Faz um GET condicional ao URL.
+        Devolve um CachedResponse; em caso de 304 o texto é o corpo guardado e not_modified=True.
+        Erros de rede são propagados (requests.exceptions.RequestException) como no requests.get.
+        """
+        request_headers = dict(headers or {})
+        entry = self._read_entry(url) if self.enabled else None
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        # Cliente partilhado: pool keep-alive, tentativas com backoff, circuit breaker e token bucket
+        response = http_client.get(url, headers=request_headers, timeout=timeout or http_client.DEFAULT_TIMEOUT)
+
+        if response.status_code == 304 and entry and entry.get("body") is not None:
+            return CachedResponse(url, 200, entry["body"], dict(response.headers), not_modified=True)
+
+        if self.enabled and response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._write_entry(url, {
+                    "url": url,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fetched_at": time.time(),
+                    "body": response.text,
+                    "parsed": {}, # Corpo novo: os eventos extraídos anteriormente deixam de valer
+                })
+
+        return CachedResponse(url, response.status_code, response.text, dict(response.headers))
+
+    def load_parsed(self, url, variant="default"):
+        """Devolve a lista de eventos guardada para o URL (ou None se não existir)."""
+        if not self.enabled:
+            return None
+        entry = self._read_entry(url)
+        if not entry:
+            return None
+        return entry.get("parsed", {}).get(variant)
+
+    def store_parsed(self, url, events, variant="default"):
+        """
+        Guarda os eventos extraídos do corpo atualmente em cache.
+        `variant` distingue resultados que dependem de mais do que o HTML (ex.: a data de hoje).
+        """
+        if not self.enabled:
+            return
+        entry = self._read_entry(url)
+        if not entry:
+            return # Sem validadores não há como saber se o corpo mudou; não vale a pena guardar
+        entry.setdefault("parsed", {})[variant] = events
+        self._write_entry(url, entry)
+
+
+# Cache partilhada por todos os scrapers do mesmo processo
+default_cache = HttpCache()
+
+def fetch(url, headers=None, timeout=None):
+    return default_cache.fetch(url, headers=headers, timeout=timeout)
+
+def load_parsed(url, variant="default"):
+    return default_cache.load_parsed(url, variant)
+
+def store_parsed(url, events, variant="default"):
+    default_cache.store_parsed(url, events, variant)
@@ -0,0 +1,191 @@
+# --- Imports ---
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import rate_limit
+import scrape_metrics
+
+# --- Constants ---
+POOL_SIZE = 16 # Ligações keep-alive por host no pool da sessão partilhada
+DEFAULT_TIMEOUT = (5, 15) # (ligação, leitura) em segundos, por tentativa
+DEFAULT_DEADLINE = 45 # Tempo máximo (s) de um pedido, somando todas as tentativas e esperas
+MAX_RETRIES = 3 # Tentativas extra depois da primeira
+BACKOFF_BASE = 0.5 # Segundos; a espera máxima duplica a cada tentativa (com jitter)
+BACKOFF_MAX = 8
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Erros transitórios que justificam nova tentativa; os outros RequestException (TooManyRedirects,
+# InvalidURL, ContentDecodingError, ...) contam como falha do host mas são levantados logo
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)
+BREAKER_THRESHOLD = 5 # Falhas seguidas de um host até o circuito abrir
+BREAKER_COOLDOWN = 60 # Segundos com o circuito aberto antes de deixar passar um pedido de teste
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """O host falhou repetidamente e o circuito está aberto: o pedido falha de imediato."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um host.
+    closed: pedidos passam; ao fim de `threshold` falhas seguidas passa a open.
+    open: pedidos falham logo durante `cooldown` segundos (as outras fontes não ficam à espera).
+    half-open: depois do cooldown deixa passar um pedido de teste; sucesso fecha, falha volta a abrir.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True # Só um pedido de teste de cada vez
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """Liberta a vaga do pedido de teste sem contar sucesso nem falha (pedido interrompido)."""
+        with self._lock:
+            self._probing = False
+
+
+class HttpClient:
+    """
+    Cliente HTTP partilhado pelos scrapers.
+    - Uma requests.Session com pool de ligações keep-alive (sem novo handshake TLS a cada pedido).
+    - Cada pedido tem um prazo total (`deadline`) que inclui as tentativas e as esperas.
+    - Erros de rede e respostas 429/5xx são repetidos com backoff exponencial com jitter.
+    - Um circuit breaker por host faz falhar logo os pedidos a um site em baixo.
+    - O token bucket por host (rate_limit) é aplicado a cada tentativa.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES, limiter=None):
+        self.max_retries = max_retries
+        self.limiter = limiter or rate_limit.default_limiter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"requests": 0, "retries": 0, "failures": 0, "rejected": 0})
+
+    def breaker_for(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def _count(self, host, key):
+        with self._lock:
+            self.stats[host][key] += 1
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(BACKOFF_MAX, int(retry_after))
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))) # "Full jitter"
+
+    def get(self, url, headers=None, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE, rate_limited=True, **kwargs):
+        """
+        GET com tentativas, prazo total e circuit breaker. Devolve o requests.Response
+        (as respostas 4xx voltam ao chamador como com requests.get).
+        Levanta requests.exceptions.RequestException (CircuitOpenError, Timeout, ...) se não conseguir.
+        """
+        host = urlsplit(url).netloc.lower()
+        breaker = self.breaker_for(host)
+        if isinstance(timeout, (int, float)):
+            timeout = (min(timeout, DEFAULT_TIMEOUT[0]), timeout)
+        expires = time.monotonic() + deadline
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count(host, "rejected")
+                raise CircuitOpenError(f"Circuito aberto para {host} ({breaker.failures} falhas seguidas)")
+            if rate_limited:
+                self.limiter.acquire(url)
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(f"Prazo de {deadline}s esgotado para {url}")
+
+            self._count(host, "requests")
+            response, error = None, None
+            try:
+                with scrape_metrics.timer("http_request_seconds", host=host):
+                    response = self.session.get(url, headers=headers,
+                                                timeout=(min(timeout[0], remaining), min(timeout[1], remaining)), **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = e
+            except BaseException:
+                breaker.release() # Ex.: KeyboardInterrupt no pedido de teste: o circuito não fica preso em half-open
+                raise
+            if error is None:
+                scrape_metrics.inc("http_requests_total", host=host, status=response.status_code)
+                scrape_metrics.inc("http_response_bytes_total", len(response.content), host=host)
+            else:
+                scrape_metrics.inc("http_requests_total", host=host, status=type(error).__name__)
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                breaker.record_success() # Incluindo 4xx: o host está a responder
+                return response
+
+            breaker.record_failure()
+            self._count(host, "failures")
+            wait = self._backoff(attempt, response)
+            # Sem nova tentativa se esgotou as tentativas, se a espera passa o prazo ou se o circuito abriu
+            if attempt >= self.max_retries or time.monotonic() + wait >= expires or breaker.state != "closed" or \
+                    (error is not None and not isinstance(error, RETRY_ERRORS)):
+                if error is not None:
+                    raise error
+                return response # 429/5xx definitivo: o chamador decide (raise_for_status, status_code)
+            self._count(host, "retries")
+            time.sleep(wait)
+            attempt += 1
+
+    def summary(self):
+        """Resumo por host (pedidos, tentativas repetidas, falhas, rejeitados pelo circuito, estado)."""
+        with self._lock:
+            hosts = list(self.stats.items())
+        return {host: dict(counts, state=self.breaker_for(host).state) for host, counts in hosts}
+
+
+# Cliente partilhado por todos os scrapers do processo
+default_client = HttpClient()
+
+def get(url, **kwargs):
+    return default_client.get(url, **kwargs)
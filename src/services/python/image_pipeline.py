@@ -0,0 +1,204 @@
+# --- Imports ---
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import http_client
+from file_utils import atomic_write_bytes, atomic_write_text
+from http_cache import CACHE_DIR
+
+# --- Constants ---
+# As miniaturas vão para public/thumbs, servidas pela aplicação em /thumbs/...
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+THUMBNAIL_DIR = os.environ.get("LIGAFARO_THUMBNAIL_DIR", os.path.join(PROJECT_ROOT, "public", "thumbs"))
+THUMBNAIL_URL_PREFIX = "/thumbs/"
+THUMBNAIL_WIDTHS = (320, 640, 960) # Larguras geradas (as imagens mais pequenas não são ampliadas)
+DEFAULT_WIDTH = 640 # Largura usada no campo reescrito (imageUrl / urlToImage)
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+# Opcional (LIGAFARO_THUMBNAILS=1, com Pillow instalado): acrescenta downloads de imagens à recolha
+THUMBNAILS_ENABLED = os.environ.get("LIGAFARO_THUMBNAILS", "0") == "1"
+IMAGE_INDEX_PATH = os.path.join(CACHE_DIR, "images", "index.json")
+MAX_CONCURRENT_DOWNLOADS = 6
+MAX_IMAGE_BYTES = 15 * 1024 * 1024 # Imagens maiores são ignoradas
+REQUEST_TIMEOUT = 20 # Segundos
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
+}
+
+
+def _load_pillow():
+    """Pillow é opcional: sem ele o passo de miniaturas é ignorado e os URLs originais ficam."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None, None
+    return Image, ImageOps
+
+def _thumbnail_name(content_hash, width, fmt):
+    return f"{content_hash[:20]}-{width}.{fmt}"
+
+def _is_remote(url):
+    return isinstance(url, str) and url.startswith(("http://", "https://"))
+
+
+class ImagePipeline:
+    """
+    Descarrega as imagens dos eventos/notícias e gera miniaturas locais (WebP e JPEG) em várias larguras.
+    - O índice persistente URL -> hash do conteúdo evita voltar a descarregar imagens já processadas.
+    - As miniaturas têm o nome do hash do conteúdo, por isso a mesma imagem em URLs diferentes
+      só é redimensionada uma vez.
+    """
+
+    def __init__(self, output_dir=THUMBNAIL_DIR, widths=THUMBNAIL_WIDTHS, index_path=IMAGE_INDEX_PATH,
+                 max_workers=MAX_CONCURRENT_DOWNLOADS):
+        self.output_dir = output_dir
+        self.widths = tuple(sorted(widths))
+        self.index_path = index_path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._hash_locks = {} # Um lock por conteúdo: a mesma imagem em dois URLs só é redimensionada uma vez
+        self._index = self._load_index() # {url: {"hash": ..., "thumbnails": {"jpg": {largura: nome}, "webp": {...}}}}
+        self.downloaded = 0
+        self.generated = 0
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Aviso: índice de imagens ilegível em {self.index_path}, a ignorar: {e}")
+            return {}
+
+    def save(self):
+        with self._lock:
+            atomic_write_text(self.index_path, json.dumps(self._index, ensure_ascii=False))
+
+    def _thumbnails_exist(self, entry):
+        return all(os.path.exists(os.path.join(self.output_dir, name))
+                   for names in entry["thumbnails"].values() for name in names.values())
+
+    def _render(self, content, content_hash, Image, ImageOps):
+        """Gera as miniaturas de uma imagem (as que ainda não existem). Devolve {formato: {largura: nome}}."""
+        with Image.open(io.BytesIO(content)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "L"):
+                # Fundo branco para imagens com transparência (o JPEG não a suporta)
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                rgba = image.convert("RGBA")
+                background.paste(rgba, mask=rgba.split()[-1])
+                image = background
+            widths = [w for w in self.widths if w < image.width] or [image.width]
+            thumbnails = {"jpg": {}, "webp": {}}
+            for width in widths:
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                for fmt, options in (("jpg", {"format": "JPEG", "quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+                                     ("webp", {"format": "WEBP", "quality": WEBP_QUALITY, "method": 4})):
+                    name = _thumbnail_name(content_hash, width, fmt)
+                    path = os.path.join(self.output_dir, name)
+                    if not os.path.exists(path):
+                        buffer = io.BytesIO()
+                        resized.save(buffer, **options)
+                        atomic_write_bytes(path, buffer.getvalue())
+                        with self._lock:
+                            self.generated += 1
+                    thumbnails[fmt][str(width)] = name
+            return thumbnails
+
+    def process_url(self, url, Image, ImageOps):
+        """Miniaturas de um URL: do índice se já existirem, senão descarrega e redimensiona. None se falhar."""
+        entry = self._index.get(url)
+        if entry is not None and self._thumbnails_exist(entry):
+            return entry
+
+        try:
+            response = http_client.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao descarregar imagem {url}: {e}")
+            return None
+        with self._lock:
+            self.downloaded += 1
+        content = response.content
+        if not content or len(content) > MAX_IMAGE_BYTES:
+            print(f"Aviso: imagem ignorada (vazia ou demasiado grande): {url}")
+            return None
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            hash_lock = self._hash_locks.setdefault(content_hash, threading.Lock())
+        try:
+            with hash_lock:
+                thumbnails = self._render(content, content_hash, Image, ImageOps)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            print(f"Aviso: não foi possível processar a imagem {url}: {e}")
+            return None
+        entry = {"hash": content_hash, "thumbnails": thumbnails}
+        with self._lock:
+            self._index[url] = entry
+        return entry
+
+    def process(self, items, field):
+        """
+        Processa as imagens do campo `field` dos itens (eventos ou notícias) e reescreve-o (in place)
+        para a miniatura local. O URL original fica em `<field>Original` e as restantes larguras em
+        `thumbnails` ({"jpg": srcset, "webp": srcset}). Itens cuja imagem falhe ficam como estavam.
+        """
+        Image, ImageOps = _load_pillow()
+        if Image is None:
+            print("Aviso: Pillow não está instalado, as miniaturas não foram geradas (pip install Pillow).")
+            return items
+
+        urls = list(dict.fromkeys(item[field] for item in items if _is_remote(item.get(field))))
+        if not urls:
+            return items
+        os.makedirs(self.output_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            entries = dict(zip(urls, executor.map(lambda url: self.process_url(url, Image, ImageOps), urls)))
+        self.save()
+
+        rewritten = 0
+        for item in items:
+            entry = entries.get(item.get(field))
+            if not entry:
+                continue
+            jpg, webp = entry["thumbnails"]["jpg"], entry["thumbnails"]["webp"]
+            default = str(DEFAULT_WIDTH) if str(DEFAULT_WIDTH) in jpg else max(jpg, key=int)
+            item[f"{field}Original"] = item[field]
+            item[field] = THUMBNAIL_URL_PREFIX + jpg[default]
+            item["thumbnails"] = {
+                fmt: ", ".join(f"{THUMBNAIL_URL_PREFIX}{name} {width}w" for width, name in sorted(names.items(), key=lambda kv: int(kv[0])))
+                for fmt, names in (("jpg", jpg), ("webp", webp))
+            }
+            rewritten += 1
+        print(f"Miniaturas: {rewritten} imagens locais ({self.downloaded} descarregadas, {self.generated} ficheiros gerados).")
+        return items
+
+
+def generate_thumbnails(items, field):
+    """Atalho usado pelos scripts de recolha; só gera miniaturas com LIGAFARO_THUMBNAILS=1."""
+    if not THUMBNAILS_ENABLED:
+        return items
+    return ImagePipeline().process(items, field)
+
+
+if __name__ == "__main__":
+    # Uso: python image_pipeline.py <ficheiro.json> <campo>   (ex.: noticias_faro.json urlToImage)
+    import sys
+    if len(sys.argv) != 3:
+        print("Uso: python image_pipeline.py <ficheiro.json> <campo da imagem>")
+        sys.exit(1)
+    json_path, image_field = sys.argv[1], sys.argv[2]
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ImagePipeline().process(data, image_field)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
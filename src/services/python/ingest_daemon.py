@@ -0,0 +1,229 @@
+# --- Imports ---
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+import artifacts
+import event_sources
+import fetch_events
+import file_utils
+import scrape_metrics
+from http_cache import CACHE_DIR, json_default, json_object_hook
+
+# --- Constants ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+PUBLIC_DIR = os.path.join(PROJECT_ROOT, "public")
+NEWS_JSON_FILENAME = "noticias_faro.json" # Escrito na raiz do projeto por gerar_noticias_json.py
+DAEMON_STATE_DIR = os.path.join(CACHE_DIR, "ingest")
+SCHEDULE_PATH = os.path.join(DAEMON_STATE_DIR, "schedule.json")
+
+# Intervalos por trabalho, em segundos: (inicial, mínimo, máximo).
+# Cada fonte de eventos registada em event_sources é um trabalho; "news" são as pesquisas GNews.
+DEFAULT_INTERVALS = (30 * 60, 10 * 60, 6 * 3600)
+JOB_INTERVALS = {
+    "cmf": (30 * 60, 15 * 60, 6 * 3600),
+    "viralagenda": (20 * 60, 10 * 60, 3 * 3600),
+    "news": (15 * 60, 5 * 60, 2 * 3600),
+}
+SPEEDUP_ON_CHANGE = 0.5 # O conteúdo mudou: voltar mais cedo
+SLOWDOWN_ON_SAME = 1.5 # Nada mudou: espaçar as visitas
+BACKOFF_ON_ERROR = 2.0
+MAX_IDLE_SLEEP = 30 # Segundos; o ciclo acorda pelo menos com esta frequência para reagir a sinais
+
+
+class Job:
+    """Estado de agendamento de um trabalho: intervalo atual (adaptativo), próxima execução e estatísticas."""
+
+    def __init__(self, name, intervals):
+        self.name = name
+        self.interval, self.min_interval, self.max_interval = intervals
+        self.next_run = 0.0 # Epoch; 0 = corre logo no arranque
+        self.last_hash = None
+        self.runs = self.changes = self.failures = 0
+
+    def record(self, content_hash, now):
+        """Ajusta o intervalo à taxa de mudança observada e agenda a próxima execução."""
+        self.runs += 1
+        if content_hash != self.last_hash:
+            self.changes += 1
+            self.interval = max(self.min_interval, self.interval * SPEEDUP_ON_CHANGE)
+        else:
+            self.interval = min(self.max_interval, self.interval * SLOWDOWN_ON_SAME)
+        self.last_hash = content_hash
+        self.next_run = now + self.interval
+
+    def record_failure(self, now):
+        self.failures += 1
+        self.interval = min(self.max_interval, self.interval * BACKOFF_ON_ERROR)
+        self.next_run = now + self.interval
+
+    def to_dict(self):
+        return {"interval": self.interval, "next_run": self.next_run, "last_hash": self.last_hash,
+                "runs": self.runs, "changes": self.changes, "failures": self.failures}
+
+    def load(self, data):
+        self.interval = min(self.max_interval, max(self.min_interval, data.get("interval", self.interval)))
+        self.next_run = data.get("next_run", 0.0)
+        self.last_hash = data.get("last_hash")
+        self.runs, self.changes, self.failures = data.get("runs", 0), data.get("changes", 0), data.get("failures", 0)
+
+
+class IngestDaemon:
+    """
+    Processo residente que mantém os artefactos (events_data.json, noticias_faro.json) atualizados.
+    Cada fonte tem o seu próprio intervalo, que encurta quando o conteúdo muda e alarga quando não muda.
+    Os eventos de cada fonte ficam guardados em disco, por isso uma fonte que corre sozinha volta a
+    publicar a lista completa. Os handlers HTTP só leem ficheiros já prontos (escritos atomicamente).
+    """
+
+    def __init__(self, with_news=True):
+        self._stop = threading.Event()
+        self.source_names = list(event_sources.load_sources())
+        self.jobs = {name: Job(name, JOB_INTERVALS.get(name, DEFAULT_INTERVALS)) for name in self.source_names}
+        if with_news:
+            self.jobs["news"] = Job("news", JOB_INTERVALS["news"])
+        self.source_events = {name: self._load_source_events(name) for name in self.source_names}
+        # Há eventos por publicar; no arranque republica-se o que estiver guardado
+        self._events_dirty = any(events is not None for events in self.source_events.values())
+        self._load_schedule()
+
+    # --- Estado persistente ---
+
+    def _source_path(self, name):
+        return os.path.join(DAEMON_STATE_DIR, f"events_{name}.json")
+
+    def _load_source_events(self, name):
+        path = self._source_path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f, object_hook=json_object_hook)
+        except (IOError, ValueError) as e:
+            print(f"Aviso: eventos guardados de '{name}' ilegíveis, a fonte vai ser recolhida de novo: {e}")
+            return None
+
+    def _load_schedule(self):
+        if not os.path.exists(SCHEDULE_PATH):
+            return
+        try:
+            with open(SCHEDULE_PATH, "r", encoding="utf-8") as f:
+                saved = json.load(f).get("jobs", {})
+        except (IOError, ValueError) as e:
+            print(f"Aviso: agenda do daemon ilegível em {SCHEDULE_PATH}, a começar do zero: {e}")
+            return
+        for name, job in self.jobs.items():
+            if name in saved:
+                job.load(saved[name])
+            if name in self.source_events and self.source_events[name] is None:
+                job.next_run = 0.0 # Sem eventos guardados desta fonte: recolher já
+
+    def _save_schedule(self):
+        payload = {"saved_at": datetime.now().isoformat(timespec="seconds"),
+                   "jobs": {name: job.to_dict() for name, job in self.jobs.items()}}
+        file_utils.atomic_write_text(SCHEDULE_PATH, json.dumps(payload, ensure_ascii=False, indent=2))
+
+    # --- Trabalhos ---
+
+    def _run_source(self, name):
+        """Recolhe uma fonte de eventos; se o conteúdo mudou, a lista completa é republicada no fim do ciclo."""
+        source = event_sources.get_sources([name])[0]
+        events = event_sources.fetch_tagged(source)
+        digest = artifacts.content_hash(artifacts.dumps(event_sources.strip_private_fields(events)))
+        if digest != self.jobs[name].last_hash or self.source_events[name] is None:
+            self.source_events[name] = events
+            file_utils.atomic_write_text(self._source_path(name), json.dumps(events, ensure_ascii=False, default=json_default))
+            self._events_dirty = True
+        return digest
+
+    def publish_events(self):
+        combined = [evento for name in self.source_names for evento in (self.source_events[name] or [])]
+        # Fontes ainda sem eventos recolhidos não têm snapshot: o store mantém os eventos que tinha delas
+        loaded = [name for name in self.source_names if self.source_events[name] is not None]
+        fetch_events.publish_events(combined, loaded)
+        self._publish_copy(os.path.join(fetch_events.OUTPUT_DIR, fetch_events.JSON_OUTPUT_FILENAME),
+                           os.path.join(PUBLIC_DIR, fetch_events.JSON_OUTPUT_FILENAME))
+
+    def _run_news(self):
+        """Corre gerar_noticias_json.main() no próprio processo (sem custo de arranque do interpretador)."""
+        if PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, PROJECT_ROOT)
+        import gerar_noticias_json
+        try:
+            gerar_noticias_json.main()
+        except SystemExit as e: # O script termina com sys.exit(1) em caso de erro
+            if e.code:
+                raise RuntimeError(f"gerar_noticias_json terminou com código {e.code}")
+        news_path = os.path.join(PROJECT_ROOT, NEWS_JSON_FILENAME)
+        with open(news_path, "rb") as f:
+            digest = artifacts.content_hash(f.read())
+        if digest != self.jobs["news"].last_hash:
+            self._publish_copy(news_path, os.path.join(PUBLIC_DIR, NEWS_JSON_FILENAME))
+        return digest
+
+    def _publish_copy(self, source_path, target_path):
+        """Copia um artefacto para public/ de forma atómica (com sidecars em produção)."""
+        with open(source_path, "rb") as f:
+            artifacts.write_bytes(target_path, f.read())
+
+    def run_job(self, job):
+        start = time.perf_counter()
+        try:
+            digest = self._run_news() if job.name == "news" else self._run_source(job.name)
+        except Exception as e:
+            scrape_metrics.inc("daemon_job_failures_total", job=job.name)
+            job.record_failure(time.time())
+            print(f"[daemon] Erro em '{job.name}': {e} (nova tentativa em {job.interval / 60:.0f} min)")
+            return
+        changed = digest != job.last_hash
+        job.record(digest, time.time())
+        print(f"[daemon] '{job.name}' {'mudou' if changed else 'sem alterações'} em {time.perf_counter() - start:.1f}s; "
+              f"próxima execução em {job.interval / 60:.0f} min")
+
+    # --- Ciclo principal ---
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run(self, once=False):
+        """
+        Ciclo principal: corre os trabalhos vencidos (um de cada vez, no thread principal, porque
+        gerar_noticias_json usa SIGALRM) e dorme até ao próximo. Com once=True corre tudo uma vez e sai.
+        """
+        os.chdir(PROJECT_ROOT) # gerar_noticias_json escreve e regista relativamente à pasta atual
+        print(f"[daemon] A iniciar com os trabalhos: {', '.join(self.jobs)}")
+        while not self._stop.is_set():
+            now = time.time()
+            due = sorted((job for job in self.jobs.values() if once or job.next_run <= now), key=lambda job: job.next_run)
+            for job in due:
+                if self._stop.is_set():
+                    break
+                self.run_job(job)
+                self._save_schedule()
+                scrape_metrics.set_gauge("daemon_job_interval_seconds", job.interval, job=job.name)
+            # Uma só publicação por ciclo, mesmo que várias fontes tenham mudado (no arranque correm todas)
+            if self._events_dirty:
+                try:
+                    self.publish_events()
+                    self._events_dirty = False
+                except Exception as e:
+                    print(f"[daemon] Erro ao publicar os eventos: {e}")
+            if due:
+                scrape_metrics.write("ingest_daemon")
+            if once:
+                break
+            next_due = min(job.next_run for job in self.jobs.values())
+            self._stop.wait(max(1.0, min(MAX_IDLE_SLEEP, next_due - time.time())))
+        print("[daemon] Terminado.")
+
+
+if __name__ == "__main__":
+    # Uso: python ingest_daemon.py [--once] [--no-news]
+    daemon = IngestDaemon(with_news="--no-news" not in sys.argv)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run(once="--once" in sys.argv)
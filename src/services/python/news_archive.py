@@ -0,0 +1,253 @@
+# --- Imports ---
+import fcntl
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+from file_utils import atomic_write_text
+from news_dedup import canonical_news_url
+
+# --- Constants ---
+# Arquivo de notícias só de acréscimo: as notícias novas de cada execução são acrescentadas a segmentos
+# JSONL (em vez de noticias_faro.json ser reescrito só com as da última pesquisa)
+ARCHIVE_ENABLED = os.environ.get("LIGAFARO_NEWS_ARCHIVE", "0") == "1"
+ARCHIVE_DIR = os.environ.get("LIGAFARO_NEWS_ARCHIVE_DIR",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_archive"))
+LATEST_VIEW_SIZE = int(os.environ.get("LIGAFARO_NEWS_LATEST", "50")) # Notícias em noticias_faro.json
+SEGMENTS_DIRNAME = "segments"
+INDEX_DIRNAME = "index" # URLs já arquivados: 256 ficheiros pelo primeiro byte do hash
+STATE_FILENAME = "state.json" # Segmento atual e contagens (evita ler os segmentos para acrescentar)
+LOCK_FILENAME = ".lock"
+SEGMENT_MAX_ITEMS = 5000
+KEY_LENGTH = 16 # Hex do sha1 do URL canónico guardado no índice
+
+
+def article_key(item):
+    """
+    Chave de uma notícia: hash do URL canónico (ou do título, para itens sem URL). O mesmo do
+    news_dedup: www./m./amp., /amp e redirecionamentos do Google News não criam entradas repetidas.
+    """
+    url = canonical_news_url(item.get("url")) or item.get("url") or item.get("title") or ""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:KEY_LENGTH]
+
+def _published_timestamp(item):
+    from email.utils import parsedate_tz, mktime_tz # email.utils custa ~15ms a importar (arranque do chat)
+    parsed = parsedate_tz(item.get("publishedAt") or "")
+    if parsed:
+        try:
+            return mktime_tz(parsed)
+        except (OverflowError, ValueError):
+            pass
+    return 0
+
+
+class NewsArchive:
+    """
+    Arquivo de notícias em `path`:
+    - segments/NNNNNN.jsonl: uma linha {"key", "archived_at", "item"} por notícia, só de acréscimo;
+      um segmento novo a cada SEGMENT_MAX_ITEMS notícias
+    - index/XX.txt: chaves já arquivadas, repartidas pelo primeiro byte do hash; cada ingestão só lê
+      os baldes das notícias que recebe, por isso o custo é O(notícias novas) e não O(arquivo)
+    - state.json: segmento atual e contagens
+    """
+
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        self.segments_dir = os.path.join(path, SEGMENTS_DIRNAME)
+        self.index_dir = os.path.join(path, INDEX_DIRNAME)
+        os.makedirs(self.segments_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._buckets = {}
+        self.state = self._load_state()
+
+    # --- Estado e índice ---
+
+    def _load_state(self):
+        state_path = os.path.join(self.path, STATE_FILENAME)
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            if self._segment_numbers():
+                print(f"Aviso: {state_path} em falta, a reconstruir o índice do arquivo", file=sys.stderr)
+                return self.rebuild_index()
+            return {"segment": 1, "segment_items": 0, "total": 0}
+        except (IOError, ValueError) as e:
+            print(f"Aviso: estado do arquivo ilegível em {state_path}, a reconstruir o índice: {e}", file=sys.stderr)
+            return self.rebuild_index()
+
+    def _save_state(self):
+        atomic_write_text(os.path.join(self.path, STATE_FILENAME), json.dumps(self.state))
+
+    def _segment_numbers(self):
+        return sorted(int(name.split(".")[0]) for name in os.listdir(self.segments_dir) if name.endswith(".jsonl"))
+
+    def _segment_path(self, number):
+        return os.path.join(self.segments_dir, f"{number:06d}.jsonl")
+
+    def _bucket(self, key):
+        bucket = key[:2]
+        if bucket not in self._buckets:
+            keys = set()
+            try:
+                with open(os.path.join(self.index_dir, f"{bucket}.txt"), "r", encoding="utf-8") as f:
+                    keys.update(line.strip() for line in f)
+            except FileNotFoundError:
+                pass
+            self._buckets[bucket] = keys
+        return self._buckets[bucket]
+
+    def __contains__(self, key):
+        return key in self._bucket(key)
+
+    def rebuild_index(self):
+        """Reconstrói o índice e o estado a partir dos segmentos (recuperação; O(arquivo))."""
+        seen_by_bucket = {}
+        segments = self._segment_numbers()
+        total = segment_items = 0
+        for number in segments:
+            segment_items = 0
+            with open(self._segment_path(number), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        key = json.loads(line)["key"]
+                    except (ValueError, KeyError):
+                        continue # Linha truncada por uma escrita interrompida
+                    segment_items += 1
+                    total += 1
+                    seen_by_bucket.setdefault(key[:2], set()).add(key)
+        # Cada balde é substituído atomicamente e só depois se removem os que deixaram de existir:
+        # uma interrupção a meio deixa baldes antigos ou novos completos, nunca um índice truncado
+        for bucket, keys in seen_by_bucket.items():
+            atomic_write_text(os.path.join(self.index_dir, f"{bucket}.txt"), "".join(f"{key}\n" for key in sorted(keys)))
+        for name in os.listdir(self.index_dir):
+            if name.endswith(".txt") and name[:-len(".txt")] not in seen_by_bucket:
+                os.remove(os.path.join(self.index_dir, name))
+        self._buckets = seen_by_bucket
+        self.state = {"segment": segments[-1] if segments else 1, "segment_items": segment_items, "total": total}
+        self._save_state()
+        return self.state
+
+    @contextmanager
+    def _locked(self):
+        """Exclusão entre processos (ingest_daemon, ligafaro.py news) durante a escrita."""
+        with open(os.path.join(self.path, LOCK_FILENAME), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Escrita ---
+
+    def ingest(self, news, now=None):
+        """
+        Acrescenta ao arquivo as notícias (formato de noticias_faro.json) cujo URL ainda não foi visto.
+        Escreve primeiro o segmento e só depois o índice: uma interrupção a meio pode repetir uma
+        notícia no arquivo (a vista latest() ignora repetidos), mas nunca a perde. `now` (ISO) é o
+        archived_at do lote (por omissão o instante atual). Devolve o número de novas.
+        """
+        with self._locked():
+            self._buckets = {} # Outro processo pode ter acrescentado entretanto
+            self.state = self._load_state()
+            now = now or datetime.now().isoformat(timespec="seconds")
+            new_by_bucket = {}
+            pending = {}
+            for item in news:
+                key = article_key(item)
+                if key in self or key in pending:
+                    continue
+                pending[key] = item
+            if not pending:
+                return 0
+
+            lines = []
+            for key, item in pending.items():
+                if self.state["segment_items"] >= SEGMENT_MAX_ITEMS:
+                    self._append_segment(lines)
+                    lines = []
+                    self.state["segment"] += 1
+                    self.state["segment_items"] = 0
+                lines.append(json.dumps({"key": key, "archived_at": now, "item": item}, ensure_ascii=False) + "\n")
+                self.state["segment_items"] += 1
+                self.state["total"] += 1
+                new_by_bucket.setdefault(key[:2], []).append(key)
+            self._append_segment(lines)
+
+            for bucket, keys in new_by_bucket.items():
+                with open(os.path.join(self.index_dir, f"{bucket}.txt"), "a", encoding="utf-8") as f:
+                    f.writelines(f"{key}\n" for key in keys)
+                self._bucket(keys[0]).update(keys)
+            self._save_state()
+            return len(pending)
+
+    def _append_segment(self, lines):
+        if not lines:
+            return
+        with open(self._segment_path(self.state["segment"]), "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Leitura ---
+
+    def iter_newest(self):
+        """Notícias do arquivo da mais recentemente arquivada para a mais antiga (segmento a segmento)."""
+        for number in reversed(self._segment_numbers()):
+            with open(self._segment_path(number), "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            for line in reversed(lines):
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def latest(self, limit=LATEST_VIEW_SIZE):
+        """
+        As `limit` notícias mais recentes, sem repetidos, ordenadas pela data de publicação.
+        A escolha é por (archived_at, data de publicação) e não pela ordem das linhas: cada ingestão
+        acrescenta um lote inteiro com o mesmo archived_at, por isso lêem-se lotes completos dos
+        segmentos mais recentes até haver `limit` notícias e só depois se escolhe.
+        """
+        seen, candidates = set(), []
+        cutoff = None # archived_at do lote em que se chegou a `limit`
+        for record in self.iter_newest():
+            if cutoff is not None and record["archived_at"] < cutoff:
+                break
+            if record["key"] in seen:
+                continue
+            seen.add(record["key"])
+            candidates.append(record)
+            if cutoff is None and len(candidates) >= limit:
+                cutoff = record["archived_at"]
+        candidates.sort(key=lambda record: (record["archived_at"], _published_timestamp(record["item"])), reverse=True)
+        items = [record["item"] for record in candidates[:limit]]
+        items.sort(key=_published_timestamp, reverse=True)
+        return items
+
+    def count(self):
+        return self.state["total"]
+
+
+def open_archive(path=ARCHIVE_DIR):
+    return NewsArchive(path)
+
+def open_existing_archive(path=ARCHIVE_DIR):
+    """O arquivo, se já existir (o chatbot não o cria); senão None."""
+    if not os.path.isdir(os.path.join(path, SEGMENTS_DIRNAME)):
+        return None
+    return NewsArchive(path)
+
+if __name__ == "__main__":
+    # Uso: python news_archive.py [N]   (mostra as N notícias mais recentes do arquivo)
+    archive = open_existing_archive()
+    if archive is None:
+        print(f"Sem arquivo de notícias em {ARCHIVE_DIR}")
+        sys.exit(1)
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"{archive.count()} notícias arquivadas em {archive.path}")
+    for item in archive.latest(limit):
+        print(f"- {item.get('publishedAt', '')}  {item.get('title', '')}")
@@ -0,0 +1,204 @@
+# --- Imports ---
+import base64
+import binascii
+import re
+import zlib
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import event_ids
+from dedup import NUM_PERMUTATIONS, UnionFind, estimated_similarity
+from text_utils import normalize_text
+
+# --- Constants ---
+# Parâmetros de tracking e de sessão acrescentados pelo Google News e pelos sites de notícias
+NEWS_TRACKING_PARAMS = event_ids.TRACKING_PARAMS + ("oc", "ocid", "ref", "cmpid", "mc_cid", "mc_eid", "hl", "gl", "ceid")
+HOST_PREFIXES = ("www.", "m.", "amp.") # www.publico.pt, m.publico.pt e publico.pt são o mesmo site
+GOOGLE_NEWS_HOST = "news.google.com"
+DESCRIPTION_CHARS = 200 # Só o início da descrição entra na assinatura (o resto varia entre jornais)
+# 4-gramas (os eventos usam 3): os trigramas comuns do português (" de", "ao ") dominam os mínimos
+# e enchem os buckets de candidatos falsos em lotes grandes
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.5 # Jaccard estimado mínimo de título+descrição para ser a mesma notícia
+LSH_BANDS = 16 # 16 bandas x 2 linhas: pares com Jaccard >= ~0.5 quase sempre partilham um bucket
+STORY_WINDOW_SECONDS = 3 * 24 * 3600 # Notícias publicadas com mais de 3 dias de diferença não se juntam
+MAX_BUCKET_SIZE = 50 # Buckets LSH maiores que isto (textos genéricos) não são comparados par a par
+
+_EMBEDDED_URL = re.compile(rb"https?://[\x21-\x7e]+")
+
+
+def _decode_google_news(parts):
+    """
+    URL do jornal dentro de um link news.google.com, se for possível sem pedidos HTTP:
+    ?url=... ou o formato /articles/CBMi..., um protobuf em base64 com o URL original.
+    Os links no formato novo (opacos) ficam como estão.
+    """
+    params = dict(parse_qsl(parts.query))
+    if params.get("url", "").startswith(("http://", "https://")):
+        return params["url"]
+    token = parts.path.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    match = _EMBEDDED_URL.search(payload)
+    return match.group(0).decode("ascii") if match else None
+
+def canonical_news_url(url):
+    """
+    Forma canónica do URL de uma notícia: redirecionamentos do Google News resolvidos (quando o
+    link traz o URL original), https, host sem www./m./amp., sem parâmetros de tracking e sem /amp final.
+    Devolve None para valores que não são URLs ou que não se conseguem interpretar.
+    """
+    if not url or not str(url).startswith(("http://", "https://")):
+        return None
+    try:
+        parts = urlsplit(str(url).strip())
+        if parts.netloc.lower() == GOOGLE_NEWS_HOST:
+            original = _decode_google_news(parts)
+            if original:
+                parts = urlsplit(original)
+    except ValueError: # URL malformado no feed (ex.: "https://[bad"): não derruba a execução
+        return None
+    host = parts.netloc.lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(NEWS_TRACKING_PARAMS)]
+    path = re.sub(r"/amp/?$", "", parts.path)
+    return event_ids.canonical_link(urlunsplit(("https", host, path, urlencode(query), "")))
+
+def story_signature(text):
+    """
+    MinHash de uma permutação (one-permutation hashing) dos n-gramas de caracteres do texto:
+    cada n-grama é hasheado uma vez, o hash escolhe um de NUM_PERMUTATIONS compartimentos e fica o
+    mínimo de cada um. Custa uma passagem pelo texto (o minhash_signature dos eventos faz
+    NUM_PERMUTATIONS), o que conta com milhares de notícias de título+descrição.
+    Compartimentos vazios ficam com o valor do seguinte não vazio (densificação por rotação).
+    """
+    text = f" {normalize_text(text)} "
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    bins = [None] * NUM_PERMUTATIONS
+    for shingle in shingles:
+        shingle_hash = zlib.crc32(shingle.encode("utf-8"))
+        bin_index, value = shingle_hash % NUM_PERMUTATIONS, shingle_hash // NUM_PERMUTATIONS
+        if bins[bin_index] is None or value < bins[bin_index]:
+            bins[bin_index] = value
+    for i in range(NUM_PERMUTATIONS):
+        if bins[i] is None:
+            for offset in range(1, NUM_PERMUTATIONS):
+                donor = bins[(i + offset) % NUM_PERMUTATIONS]
+                if donor is not None and not isinstance(donor, tuple):
+                    bins[i] = (offset, donor)
+                    break
+    return tuple(bins)
+
+def _story_text(item):
+    title = item.get("title") or ""
+    description = (item.get("description") or "")[:DESCRIPTION_CHARS]
+    # O GNews repete muitas vezes o título na descrição: não conta duas vezes
+    if description.lower().startswith(title.lower()):
+        description = description[len(title):]
+    return f"{title} {description}"
+
+def _proper_names(title):
+    """
+    Palavras com maiúscula no título (exceto a primeira): 'Câmara de Faro aprova orçamento' e
+    'Câmara de Loulé aprova orçamento' têm n-gramas quase iguais mas são notícias diferentes.
+    """
+    words = re.findall(r"\w+", title or "")[1:]
+    return frozenset(normalize_text(word) for word in words if len(word) > 2 and word[0].isupper())
+
+def _same_names(names_a, names_b):
+    return not names_a or not names_b or not names_a.isdisjoint(names_b)
+
+def _published(item):
+    from email.utils import parsedate_tz, mktime_tz # email.utils custa ~15ms a importar (arranque do chat)
+    parsed = parsedate_tz(item.get("publishedAt") or "")
+    if parsed:
+        try:
+            return mktime_tz(parsed)
+        except (OverflowError, ValueError):
+            pass
+    return None
+
+def _close_in_time(a, b):
+    if a is None or b is None:
+        return True
+    return abs(a - b) <= STORY_WINDOW_SECONDS
+
+def _coverage(item):
+    return {"name": (item.get("source") or {}).get("name") or item.get("author") or "Desconhecida",
+            "url": item.get("url", "")}
+
+def cluster_stories(news):
+    """
+    Agrupa as notícias (formato de noticias_faro.json) que são a mesma história:
+    1. URL canónico igual (canonical_news_url): o mesmo artigo vindo de pesquisas diferentes.
+    2. MinHash (story_signature) + LSH por bandas do título+descrição: a mesma história noutro jornal, com título
+       ligeiramente diferente, publicada no máximo STORY_WINDOW_SECONDS depois e com algum nome
+       próprio em comum no título (quando ambos os títulos têm nomes próprios).
+    Só se comparam pares que partilham um bucket, por isso o custo cresce ~linearmente.
+    Fica a primeira notícia de cada grupo (a ordem de entrada é a prioridade), com a imagem de
+    outra se não tiver, e "covered_by" com os outros jornais. Devolve (notícias, número agrupado).
+    """
+    groups = UnionFind(len(news))
+
+    url_index = {}
+    for i, item in enumerate(news):
+        key = canonical_news_url(item.get("url")) or normalize_text(item.get("title"))
+        if not key:
+            key = i # Sem URL nem título: não há como o juntar pela chave, fica só com a assinatura
+        if key in url_index:
+            groups.union(url_index[key], i)
+        else:
+            url_index[key] = i
+
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = defaultdict(list)
+    signatures = {}
+    published = {}
+    names = {}
+    for i in url_index.values(): # Um representante por URL chega
+        text = _story_text(news[i])
+        if not text.strip():
+            continue # Sem título nem descrição: nada para comparar
+        signatures[i] = story_signature(text)
+        published[i] = _published(news[i])
+        names[i] = _proper_names(news[i].get("title"))
+        for band in range(LSH_BANDS):
+            buckets[(band, signatures[i][band * rows:(band + 1) * rows])].append(i)
+
+    # Com 2 linhas por banda, um par parecido cai em várias bandas: cada par candidato só é avaliado uma vez
+    candidates = set()
+    for members in buckets.values():
+        if 1 < len(members) <= MAX_BUCKET_SIZE:
+            candidates.update((first, other) for pos, first in enumerate(members) for other in members[pos + 1:])
+    for first, other in sorted(candidates):
+        if groups.find(first) != groups.find(other) and \
+                _close_in_time(published[first], published[other]) and \
+                _same_names(names[first], names[other]) and \
+                estimated_similarity(signatures[first], signatures[other]) >= SIMILARITY_THRESHOLD:
+            groups.union(first, other)
+
+    stories = {}
+    order = []
+    for i, item in enumerate(news):
+        root = groups.find(i)
+        if root not in stories:
+            stories[root] = dict(item)
+            order.append(root)
+            continue
+        story = stories[root]
+        if not story.get("urlToImage") and item.get("urlToImage"):
+            story["urlToImage"] = item["urlToImage"]
+        coverage = _coverage(item)
+        covered_by = story.setdefault("covered_by", [])
+        if coverage["name"] != _coverage(story)["name"] and all(c["name"] != coverage["name"] for c in covered_by):
+            covered_by.append(coverage)
+    for root in order:
+        if not stories[root].get("covered_by"):
+            stories[root].pop("covered_by", None)
+    return [stories[root] for root in order], len(news) - len(order)
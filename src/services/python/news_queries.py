@@ -0,0 +1,138 @@
+# --- Imports ---
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# --- Constants ---
+# Lista de pesquisas GNews (freguesias, clubes, instituições); LIGAFARO_NEWS_QUERIES aponta para outro ficheiro
+QUERIES_PATH = os.environ.get(
+    "LIGAFARO_NEWS_QUERIES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_queries.json"),
+)
+# Usadas se o ficheiro não existir ou estiver ilegível (as duas pesquisas de sempre)
+DEFAULT_QUERIES = [
+    {"query": "Faro Algarve", "label": "Faro"},
+    {"query": "Farense", "label": "Farense"},
+]
+DEFAULT_MAX_RESULTS = 10 # Notícias por pesquisa
+DEFAULT_TIMEOUT = 10 # Segundos por pesquisa
+MAX_CONCURRENT_QUERIES = 8
+LANGUAGE = "pt"
+COUNTRY = "PT"
+
+
+def load_queries(path=None):
+    """
+    Lê a lista de pesquisas: [{"query", "label", "max_results", "timeout", "enabled"}, ...].
+    Só "query" é obrigatório; entradas com "enabled": false são ignoradas e entradas inválidas
+    (sem texto, max_results/timeout que não são números positivos) são ignoradas com um aviso.
+    """
+    path = path or QUERIES_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError("era esperada uma lista de pesquisas")
+    except (IOError, ValueError) as e:
+        print(f"Aviso: lista de pesquisas ilegível em {path}, a usar as pesquisas por omissão: {e}", file=sys.stderr)
+        entries = DEFAULT_QUERIES
+
+    queries = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"query": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("query"), str) or not entry["query"].strip():
+            print(f"Aviso: pesquisa inválida em {path}, ignorada: {entry!r}", file=sys.stderr)
+            continue
+        if entry.get("enabled", True) is False:
+            continue
+        try:
+            max_results = int(entry.get("max_results", DEFAULT_MAX_RESULTS))
+            timeout = float(entry.get("timeout", DEFAULT_TIMEOUT))
+            if max_results < 1 or not (0 < timeout < math.inf):
+                raise ValueError(f"max_results={max_results}, timeout={timeout:g}")
+        except (TypeError, ValueError) as e:
+            print(f"Aviso: pesquisa '{entry['query']}' ignorada em {path}: {e}", file=sys.stderr)
+            continue
+        queries.append({
+            "query": entry["query"],
+            "label": entry.get("label", entry["query"]),
+            "max_results": max_results,
+            "timeout": timeout,
+        })
+    return queries
+
+def time_budget(queries, max_workers=MAX_CONCURRENT_QUERIES):
+    """Tempo máximo (s) de run_queries: cada vaga de `max_workers` pesquisas espera no máximo o maior timeout."""
+    if not queries:
+        return 0
+    return math.ceil(len(queries) / max_workers) * max(spec["timeout"] for spec in queries)
+
+def fetch_query(spec):
+    """Uma pesquisa GNews (até spec["max_results"] notícias)."""
+    from gnews import GNews # Importação pesada (requests, feedparser, bs4): só quando se vai mesmo pesquisar
+    google_news = GNews(language=LANGUAGE, country=COUNTRY, max_results=spec["max_results"])
+    return google_news.get_news(spec["query"]) or []
+
+def _run_one(fetch, spec, started, index):
+    started[index] = time.monotonic() # O timeout conta a partir de quando a pesquisa arranca, não da fila
+    return fetch(spec)
+
+def run_queries(queries=None, max_workers=MAX_CONCURRENT_QUERIES, fetch=fetch_query):
+    """
+    Corre as pesquisas num ThreadPoolExecutor (no máximo `max_workers` threads), cada uma com o seu timeout.
+    Uma pesquisa que falhe ou passe do tempo não invalida as outras: o resultado é ignorado.
+    Limite: uma thread não pode ser interrompida, por isso uma pesquisa pendurada continua a ocupar a
+    sua vaga até o pedido acabar; as que estão na fila esperam e, passado time_budget(), são dadas
+    como falhadas. O processo só termina quando essas threads acabam (o gerar_noticias_json.py
+    protege-se com signal.alarm).
+    Os avisos vão para o stderr (o fetch_news.py escreve o JSON no stdout).
+    Devolve (notícias pela ordem das pesquisas, {pesquisa: erro}).
+    """
+    queries = load_queries() if queries is None else queries
+    if not queries:
+        return [], {}
+    articles_by_query, errors = {}, {}
+    started = {} # índice -> instante em que a pesquisa saiu da fila
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(queries)))
+    futures = {executor.submit(_run_one, fetch, spec, started, index): index for index, spec in enumerate(queries)}
+    pending = set(futures)
+    deadline = time.monotonic() + time_budget(queries, max_workers)
+    try:
+        while pending:
+            now = time.monotonic()
+            for future in [future for future in pending if futures[future] in started]:
+                spec = queries[futures[future]]
+                if not future.done() and now >= started[futures[future]] + spec["timeout"]:
+                    pending.discard(future)
+                    errors[spec["query"]] = TimeoutError(f"sem resposta em {spec['timeout']:g}s")
+            if not pending or now >= deadline:
+                break
+            next_check = min([started[futures[future]] + queries[futures[future]]["timeout"]
+                              for future in pending if futures[future] in started] + [deadline])
+            done, _ = wait(pending, timeout=max(0.0, next_check - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                index = futures[future]
+                spec = queries[index]
+                error = future.exception()
+                if error is not None:
+                    errors[spec["query"]] = error
+                    continue
+                articles = list(future.result())[:spec["max_results"]]
+                for article in articles:
+                    article.setdefault('origem_busca', spec["label"]) # Etiqueta de recurso quando o texto não diz Faro/Farense
+                articles_by_query[index] = articles
+        for future in pending: # Ainda na fila quando o tempo total acabou
+            errors[queries[futures[future]]["query"]] = TimeoutError(f"sem vaga em {time_budget(queries, max_workers):g}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for spec_query, error in errors.items():
+        print(f"Aviso: pesquisa de notícias '{spec_query}' falhou: {error}", file=sys.stderr)
+    combined = [article for index in sorted(articles_by_query) for article in articles_by_query[index]]
+    return combined, errors
@@ -0,0 +1,120 @@
+# --- Imports ---
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from text_utils import fold_accents
+
+# --- Tabelas de meses e dias (não dependem do locale do sistema) ---
+MONTHS = {
+    1: ("janeiro", "jan"), 2: ("fevereiro", "fev"), 3: ("março", "mar"), 4: ("abril", "abr"),
+    5: ("maio", "mai"), 6: ("junho", "jun"), 7: ("julho", "jul"), 8: ("agosto", "ago"),
+    9: ("setembro", "set"), 10: ("outubro", "out"), 11: ("novembro", "nov"), 12: ("dezembro", "dez"),
+}
+WEEKDAYS = ( # datetime.weekday(): 0 = segunda-feira
+    ("segunda-feira", "seg"), ("terça-feira", "ter"), ("quarta-feira", "qua"), ("quinta-feira", "qui"),
+    ("sexta-feira", "sex"), ("sábado", "sáb"), ("domingo", "dom"),
+)
+
+# Nome (completo ou abreviado, sem acentos) -> número do mês. Inclui variantes como 'sep' e 'sept'.
+MONTH_LOOKUP = {}
+for _number, (_full, _abbr) in MONTHS.items():
+    MONTH_LOOKUP[fold_accents(_full)] = _number
+    MONTH_LOOKUP[fold_accents(_abbr)] = _number
+MONTH_LOOKUP.update({"sep": 9, "sept": 9})
+
+# "12 abr 2025", "12 ABR. 2025", "12 de abril de 2025"; o ano é opcional (herdado do fim do intervalo)
+DATE_PATTERN = re.compile(
+    r"(?P<day>\d{1,2})\s*(?:de\s+)?(?P<month>[^\W\d_]+)\.?\s*(?:de\s+)?(?P<year>\d{4})?",
+    re.IGNORECASE,
+)
+DAY_ONLY_PATTERN = re.compile(r"^\s*(?P<day>\d{1,2})\s*$")
+RANGE_SEPARATOR = re.compile(r"\s+[-–—]\s+")
+INVALID_MARKERS = ("sem data", "erro", "inválid")
+
+
+def _is_placeholder(text):
+    return not text or any(marker in text.lower() for marker in INVALID_MARKERS)
+
+def _match_parts(text):
+    """Devolve (dia, mês, ano ou None) da primeira data reconhecida no texto, ou None."""
+    for match in DATE_PATTERN.finditer(text):
+        month = MONTH_LOOKUP.get(fold_accents(match.group("month")))
+        if month is not None:
+            year = int(match.group("year")) if match.group("year") else None
+            return int(match.group("day")), month, year
+    return None
+
+def _build(day, month, year):
+    try:
+        return datetime(year, month, day)
+    except (TypeError, ValueError):
+        return None
+
+@lru_cache(maxsize=4096)
+def parse_date(text, default_year=None):
+    """
+    Converte uma data portuguesa ('12 abr 2025', '12 ABR 2025', '12 de abril de 2025') em datetime.
+    Não usa locale nem strptime, por isso é seguro entre threads. Resultado memorizado por texto.
+    Devolve None se o texto não for uma data.
+    """
+    if _is_placeholder(text):
+        return None
+    parts = _match_parts(text)
+    if parts is None:
+        return None
+    day, month, year = parts
+    return _build(day, month, year or default_year)
+
+@lru_cache(maxsize=4096)
+def parse_range(text, default_year=None):
+    """
+    Converte uma data simples ou um intervalo ('15 ago 2024 - 29 jun 2025', '3 – 7 mai 2025',
+    '12 ABR 2025 - Hoje!') em (início, fim). Em datas simples fim == início.
+    Campos que faltam no início (mês/ano) são herdados do fim. Devolve (None, None) se falhar.
+    """
+    if _is_placeholder(text):
+        return None, None
+    pieces = RANGE_SEPARATOR.split(" ".join(text.split()), maxsplit=1)
+    end = None
+    if len(pieces) == 2:
+        end_parts = _match_parts(pieces[1])
+        if end_parts is not None:
+            end_day, end_month, end_year = end_parts
+            end_year = end_year or default_year
+            end = _build(end_day, end_month, end_year)
+            # Início só com dia ('3 - 7 mai 2025') ou sem ano ('28 dez - 3 jan 2026')
+            day_only = DAY_ONLY_PATTERN.match(pieces[0])
+            if day_only:
+                return _build(int(day_only.group("day")), end_month, end_year), end
+            start_parts = _match_parts(pieces[0])
+            if start_parts and start_parts[2] is None and end_year:
+                start_day, start_month, _ = start_parts
+                start_year = end_year - 1 if start_month > end_month else end_year
+                return _build(start_day, start_month, start_year), end
+
+    start = parse_date(pieces[0], default_year)
+    if start is None:
+        return None, None
+    return start, end or start
+
+
+# --- Formatação ---
+
+def strftime_pt(value, fmt):
+    """
+    strftime com nomes de meses e dias em português, independente do locale do processo.
+    Suporta %A, %a, %B e %b; as restantes diretivas são passadas ao strftime normal.
+    """
+    full_month, abbr_month = MONTHS[value.month]
+    full_day, abbr_day = WEEKDAYS[value.weekday()]
+    replacements = {"%A": full_day, "%a": abbr_day, "%B": full_month, "%b": abbr_month}
+    pieces = re.split(r"(%[AaBb%])", fmt)
+    return "".join(
+        replacements[piece] if piece in replacements else value.strftime(piece) if piece else ""
+        for piece in pieces
+    )
+
+def format_date(value):
+    """Formato usado na agenda: '12 abr 2025'."""
+    return strftime_pt(value, "%d %b %Y")
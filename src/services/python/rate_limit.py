@@ -0,0 +1,97 @@
+# --- Imports ---
+import threading
+import time
+from urllib.parse import urlsplit
+
+# --- Constants ---
+DEFAULT_REQUESTS_PER_SECOND = 2.0 # Pedidos por segundo permitidos por host
+DEFAULT_BURST = 4 # Número de pedidos que podem sair de imediato antes de abrandar
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe.
+    Cada pedido consome um token; os tokens são repostos a `rate` por segundo
+    até ao máximo de `burst`. Se não houver tokens, acquire() espera o tempo necessário.
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError("rate deve ser maior que zero")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível. Devolve o tempo (s) que esperou."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class HostRateLimiter:
+    """
+    Mantém um TokenBucket por host (netloc), para que a cortesia seja aplicada
+    por site e não globalmente: CMF e Viralagenda não se atrasam um ao outro.
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {} # {"www.cm-faro.pt": (rate, burst)}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.overrides.get(host, (self.rate, self.burst))
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def configure_host(self, url, rate, burst):
+        """Define rate/burst específicos para o host do URL (recria o bucket desse host)."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            current = self._buckets.get(host)
+            if current is not None and (current.rate, current.burst) == (float(rate), max(1, int(burst))):
+                return # Já configurado; manter o estado do bucket
+            self.overrides[host] = (rate, burst)
+            self._buckets[host] = TokenBucket(rate, burst)
+
+    def acquire(self, url):
+        """Espera pela vez do host do URL indicado. Devolve o tempo (s) que esperou."""
+        return self.bucket_for(url).acquire()
+
+
+# Limitador partilhado por todos os scrapers do mesmo processo
+default_limiter = HostRateLimiter()
+
+def configure_default_limiter(rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST, overrides=None):
+    """Substitui o limitador partilhado (ex.: para ajustar pedidos/s a partir da configuração)."""
+    global default_limiter
+    default_limiter = HostRateLimiter(rate, burst, overrides)
+    return default_limiter
+
+def acquire(url):
+    """Atalho para esperar no limitador partilhado atual."""
+    return default_limiter.acquire(url)
@@ -0,0 +1,198 @@
+# --- Imports ---
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import file_utils
+
+# --- Constants ---
+# Pasta das métricas (por omissão .cache/metrics); para o node_exporter basta apontá-la
+# para o diretório do textfile collector
+METRICS_DIR = os.environ.get("LIGAFARO_METRICS_DIR")
+METRIC_PREFIX = "ligafaro_"
+# Descrições (# HELP) das métricas conhecidas; as restantes são exportadas sem HELP
+METRIC_HELP = {
+    "http_requests_total": "Pedidos HTTP feitos pelo cliente partilhado, por host e código de estado",
+    "http_response_bytes_total": "Bytes descarregados (corpo das respostas), por host",
+    "http_request_seconds": "Duração de cada tentativa HTTP, por host",
+    "scrape_stage_seconds": "Tempo por fase do scrape (fetch, parse, extract, dates, classify, write, ...)",
+    "scrape_pages_total": "Páginas visitadas por fonte e resultado (ok, not_modified, error)",
+    "scrape_events_per_page": "Eventos extraídos por página",
+    "scrape_events_total": "Eventos extraídos, por fonte",
+    "scrape_dropped_items_total": "Itens descartados durante a extração, por fonte e motivo",
+    "date_parse_failures_total": "Datas que não foi possível converter, por fonte",
+    "source_run_seconds": "Duração da recolha completa de uma fonte",
+    "source_events": "Eventos devolvidos pela fonte na última recolha",
+    "source_errors_total": "Recolhas de uma fonte que terminaram com exceção",
+    "events_published": "Eventos gravados em events_data.json na última publicação",
+    "daemon_job_interval_seconds": "Intervalo adaptativo atual de cada trabalho do ingest_daemon",
+    "daemon_job_failures_total": "Execuções de trabalhos do ingest_daemon que falharam",
+    "last_run_timestamp_seconds": "Instante (epoch) em que as métricas foram gravadas",
+    "run_duration_seconds": "Tempo desde o início do processo até à gravação das métricas",
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Registo de métricas do processo (thread-safe): contadores, gauges e resumos (count/sum/max).
+    Os tempos são resumos em segundos (nomes terminados em _seconds).
+    As métricas acumulam durante todo o processo, como os contadores do Prometheus.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                self._summaries[key] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                summary[2] = max(summary[2], value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mede o bloco (também quando sai com exceção) e regista os segundos em `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def drop(self, source, reason, count=1):
+        """Conta itens descartados por uma fonte (ex.: local em falta, dados incompletos)."""
+        self.inc("scrape_dropped_items_total", count, source=source, reason=reason)
+
+    def snapshot(self):
+        """Estado atual em estruturas simples (usado para o JSON)."""
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())]
+            gauges = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._gauges.items())]
+            summaries = [{"name": n, "labels": dict(l), "count": c, "sum": round(s, 6), "max": round(m, 6)}
+                         for (n, l), (c, s, m) in sorted(self._summaries.items())]
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "run_duration_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "gauges": gauges,
+            "summaries": summaries,
+        }
+
+    def to_prometheus(self):
+        """Texto no formato de exposição do Prometheus (para o textfile collector do node_exporter)."""
+        now = time.time()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items()) + [
+                (("last_run_timestamp_seconds", ()), round(now, 3)),
+                (("run_duration_seconds", ()), round(now - self.started, 3)),
+            ]
+            summaries = sorted(self._summaries.items())
+
+        lines = []
+        def header(name, kind):
+            full = METRIC_PREFIX + name
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {full} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+
+        for kind, items in (("counter", counters), ("gauge", gauges)):
+            previous = None
+            for (name, labels), value in items:
+                if name != previous:
+                    header(name, kind)
+                    previous = name
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {_format_value(value)}")
+
+        previous = None
+        for (name, labels), (count, total, _) in summaries:
+            if name != previous:
+                header(name, "summary")
+                previous = name
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {_format_value(float(total))}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {count}")
+        # O máximo não faz parte do tipo summary: vai num gauge à parte (<nome>_max)
+        previous = None
+        for (name, labels), (_, _, maximum) in summaries:
+            if name != previous:
+                lines.append(f"# TYPE {METRIC_PREFIX}{name}_max gauge")
+                previous = name
+            lines.append(f"{METRIC_PREFIX}{name}_max{_format_labels(labels)} {_format_value(float(maximum))}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, job="scrape", directory=None):
+        """
+        Grava `<job>_metrics.json` e `<job>.prom` (escrita atómica, o collector nunca lê um ficheiro a meio).
+        Devolve os dois caminhos.
+        """
+        # Importado só aqui: o registo é carregado por módulos usados pelo chatbot (event_sources),
+        # que não devem pagar o arranque do requests (http_cache)
+        from http_cache import CACHE_DIR
+        directory = directory or METRICS_DIR or os.path.join(CACHE_DIR, "metrics")
+        json_path = os.path.join(directory, f"{job}_metrics.json")
+        prom_path = os.path.join(directory, f"{job}.prom")
+        payload = dict(self.snapshot(), job=job)
+        file_utils.atomic_write_text(json_path, json.dumps(payload, ensure_ascii=False, indent=2))
+        file_utils.atomic_write_text(prom_path, self.to_prometheus())
+        return json_path, prom_path
+
+
+# Registo partilhado por todos os módulos do processo
+default_metrics = Metrics()
+
+def inc(name, value=1, **labels):
+    default_metrics.inc(name, value, **labels)
+
+def set_gauge(name, value, **labels):
+    default_metrics.set_gauge(name, value, **labels)
+
+def observe(name, value, **labels):
+    default_metrics.observe(name, value, **labels)
+
+def timer(name, **labels):
+    return default_metrics.timer(name, **labels)
+
+def drop(source, reason, count=1):
+    default_metrics.drop(source, reason, count)
+
+def write(job="scrape", directory=None):
+    """Grava as métricas do processo; um erro de escrita só gera um aviso (não estraga a recolha)."""
+    try:
+        json_path, prom_path = default_metrics.write(job, directory)
+        print(f"Métricas gravadas em {json_path} e {prom_path}")
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar as métricas: {e}")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import categorias
+
+
+def test_category_priority_follows_rule_order():
+    assert categorias.classify_text("Festival de teatro") == "Música"
+    assert categorias.classify_text("Concertos no Teatro das Figuras") == "Música"
+    assert categorias.classify_text("Feira de artesanato e degustação") == "Comida & Bebida"
+
+def test_keywords_match_word_starts_without_accents():
+    assert categorias.find_category("EXPOSICAO de pintura") == "Cultural"
+    assert categorias.find_category("Uma parte da cidade") is None # "arte" não apanha "parte"
+    assert categorias.classify_text("Uma parte da cidade") == categorias.DEFAULT_CATEGORY
+
+def test_classify_reads_the_given_fields_in_place():
+    events = [{"title": "Corrida da Ria", "description": None}, {"title": "Sessão", "description": "Workshop de cerâmica"}]
+    assert categorias.classify(events) is events
+    assert [evento["category"] for evento in events] == ["Desporto", "Educação"]
+
+def test_custom_rules_and_first_category_wins_for_shared_keywords():
+    classifier = categorias.KeywordClassifier({"A": ["mercado"], "B": ["mercado", "praia"]}, default="Outro")
+    assert classifier.classify_text("Mercado na praia") == "A"
+    assert classifier.classify_text("Praia") == "B"
+    assert classifier.classify_text("") == "Outro"
+    assert categorias.KeywordClassifier({}, default="Outro").classify_text("mercado") == "Outro"
@@ -0,0 +1,39 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl_state
+
+
+def _end_of(evento):
+    return evento["end"] or datetime.max
+
+def test_prune_evicts_ended_and_long_unseen_events(tmp_path):
+    state = crawl_state.CrawlState("cmf", state_dir=str(tmp_path))
+    now = 1_700_000_000
+    state.known = {
+        "ended": {"event": {"end": datetime(2020, 1, 1)}, "last_seen": now},
+        "undated_recent": {"event": {"end": None}, "last_seen": now - 5 * 86400},
+        "undated_old": {"event": {"end": None}, "last_seen": now - 90 * 86400},
+        "future_old": {"event": {"end": datetime(2999, 1, 1)}, "last_seen": now - 90 * 86400},
+    }
+
+    assert state.prune(_end_of, before=datetime(2024, 1, 1), max_unseen_days=60, now=now) == 3
+    assert list(state.known) == ["undated_recent"]
+
+def test_state_round_trips_with_datetimes(tmp_path):
+    state = crawl_state.CrawlState("cmf", state_dir=str(tmp_path))
+    state.remember("fp", {"title": "Feira", "end": datetime(2025, 3, 1, 18, 0)})
+    state.save()
+
+    reloaded = crawl_state.CrawlState("cmf", state_dir=str(tmp_path))
+    assert reloaded.is_known("fp")
+    assert reloaded.events_except(set()) == [{"title": "Feira", "end": datetime(2025, 3, 1, 18, 0)}]
+    assert reloaded.events_except({"fp"}) == []
+
+def test_discover_page_count():
+    html = '<a href="agenda.aspx?page=2">2</a><a href="agenda.aspx?x=1&page=12">12</a>'
+    assert crawl_state.discover_page_count(html) == 12
+    assert crawl_state.discover_page_count("<p>sem paginador</p>") is None
@@ -0,0 +1,59 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup
+
+
+def _event(title, location, day=7, **fields):
+    return {"title": title, "location": location, "_start": datetime(2025, 11, day, 9, 0),
+            "description": "", "time": "Hora não encontrada", **fields}
+
+def test_same_title_and_day_in_different_cities_are_kept_apart():
+    events = [_event("Mercado Mensal", "Mercado Municipal de Loulé"),
+              _event("Mercado Mensal", "Mercado Municipal de Tavira")]
+
+    result, merged = dedup.deduplicate(events)
+
+    assert merged == 0
+    assert [e["location"] for e in result] == ["Mercado Municipal de Loulé", "Mercado Municipal de Tavira"]
+
+def test_same_venue_is_merged_with_richer_fields():
+    events = [_event("Concerto de Primavera", "Faro", imageUrl="Sem capa"),
+              _event("Concerto de Primavera!", "Teatro das Figuras", time="21:30", imageUrl="https://img/1.jpg"),
+              _event("Concerto de Primavera", "Teatro Municipal de Faro - Teatro das Figuras")]
+
+    result, merged = dedup.deduplicate(events)
+
+    assert merged == 2
+    assert result[0]["location"] == "Teatro das Figuras"
+    assert result[0]["time"] == "21:30" and result[0]["imageUrl"] == "https://img/1.jpg"
+
+def test_generic_location_does_not_bridge_two_cities():
+    events = [_event("Mercado Mensal", "Mercado Municipal de Loulé"),
+              _event("Mercado Mensal", "Faro"),
+              _event("Mercado Mensal", "Mercado Municipal de Tavira")]
+
+    result, merged = dedup.deduplicate(events)
+
+    assert merged == 1
+    assert {e["location"] for e in result} == {"Mercado Municipal de Loulé", "Mercado Municipal de Tavira"}
+
+def test_near_duplicate_titles_merge_but_numbered_sessions_and_other_days_do_not():
+    events = [_event("Exposição: O Sagrado e o Profano", "Museu Municipal"),
+              _event("Exposição O Sagrado e o Profano", "Museu Municipal"),
+              _event("Exposição: O Sagrado e o Profano", "Museu Municipal", day=8),
+              _event("Oficina de Teatro - Sessão 1", "Teatro Lethes"),
+              _event("Oficina de Teatro - Sessão 2", "Teatro Lethes")]
+
+    result, merged = dedup.deduplicate(events)
+
+    assert merged == 1
+    assert len(result) == 4
+
+def test_undated_events_are_never_merged():
+    events = [{"title": "Feira do Livro", "location": "Faro", "_start": None}] * 2
+
+    assert dedup.deduplicate(events)[1] == 0
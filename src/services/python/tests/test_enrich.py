@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enrich
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def test_extract_cmf_details_from_detail_page():
+    details = enrich.extract_cmf_details(_fixture("cmf_event_detail.html"))
+
+    assert details["time"] == "21h30"
+    assert details["location"] == "Teatro das Figuras"
+    assert details["description"].startswith("A Banda Filarmónica de Faro apresenta")
+    assert "Largo da Sé" not in details["description"]
+
+def test_extract_cmf_details_ignores_unknown_layout():
+    # Sem o bloco da agenda (página de listagem, layout novo): nada vem do menu, do rodapé ou de horas soltas no texto
+    html = _fixture("cmf_event_detail.html").replace("agenda_detail", "outro_layout")
+
+    assert enrich.extract_cmf_details(html) == {}
+    assert enrich.extract_cmf_details(_fixture("cmf_agenda_page.html")) == {}
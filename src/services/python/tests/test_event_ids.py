@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_ids
+
+
+def _events(*dates):
+    return [{"id": 7, "title": "Feira de Artesanato", "date": date} for date in dates]
+
+def test_colliding_ids_do_not_depend_on_order_or_group_members():
+    both = _events("2025-03-01", "2025-03-08")
+    assert event_ids.ensure_unique_ids(both) == 2
+    ids = {evento["date"]: evento["id"] for evento in both}
+    assert 7 not in ids.values() and len(set(ids.values())) == 2
+
+    reversed_order = _events("2025-03-08", "2025-03-01")
+    event_ids.ensure_unique_ids(reversed_order)
+    assert {evento["date"]: evento["id"] for evento in reversed_order} == ids
+
+    # Quando a primeira data sai da agenda, as outras do grupo mantêm os seus IDs
+    three = _events("2025-03-01", "2025-03-08", "2025-03-15")
+    event_ids.ensure_unique_ids(three)
+    later = _events("2025-03-08", "2025-03-15")
+    event_ids.ensure_unique_ids(later)
+    assert [evento["id"] for evento in later] == [evento["id"] for evento in three[1:]]
+
+def test_identical_colliding_events_get_distinct_ids():
+    events = _events("2025-03-01", "2025-03-01", "2025-03-01")
+    event_ids.ensure_unique_ids(events)
+    assert len({evento["id"] for evento in events}) == 3
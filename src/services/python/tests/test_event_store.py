@@ -0,0 +1,66 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = event_store.open_store(str(tmp_path / "ligafaro.db"))
+    yield store
+    store.close()
+
+def _event(event_id, source, title, day=7, **fields):
+    return {"id": event_id, "title": title, "category": "Música", "location": "Teatro das Figuras",
+            "description": f"{title} em Faro", "_source": source, "_start": datetime(2025, 11, day),
+            "_end": datetime(2025, 11, day), **fields}
+
+def test_sync_events_upserts_only_changes(store):
+    events = [_event(1, "cmf", "Concerto de Primavera"), _event(2, "viralagenda", "Feira do Livro")]
+    assert store.sync_events(events) == (2, 0)
+    assert store.sync_events(events) == (0, 0) # Sem alterações: nada reescrito
+
+    events[0] = _event(1, "cmf", "Concerto de Primavera", location="Teatro Lethes")
+    assert store.sync_events(events) == (1, 0)
+    assert [e["location"] for e in store.query_events(source="cmf")] == ["Teatro Lethes"]
+    assert [e["title"] for e in store.query_events(text="feira")] == ["Feira do Livro"]
+    assert "_source" not in store.export_events()[0]
+
+def test_sync_events_deactivates_only_sources_that_ran(store):
+    store.sync_events([_event(1, "cmf", "A"), _event(2, "cmf", "B"), _event(3, "viralagenda", "C")])
+
+    # A viralagenda falhou nesta execução: os seus eventos ficam; o "B" saiu da agenda CMF
+    upserted, deactivated = store.sync_events([_event(1, "cmf", "A")], sources=["cmf", "viralagenda"])
+    assert (upserted, deactivated) == (0, 1)
+    assert sorted(e["id"] for e in store.export_events()) == [1, 3]
+
+    # Uma fonte que veio vazia não desativa nada
+    assert store.sync_events([], sources=["cmf"]) == (0, 0)
+    assert store.count_events() == 2
+
+    # Voltar a aparecer reativa o evento
+    store.sync_events([_event(1, "cmf", "A"), _event(2, "cmf", "B")], sources=["cmf"])
+    assert store.count_events() == 3
+
+def test_sync_news_uses_the_canonical_news_url(store):
+    item = {"title": "Farense vence", "description": "Jogo no São Luís", "source": {"name": "Público"},
+            "publishedAt": "Tue, 01 Oct 2024 10:00:00 GMT"}
+    store.sync_news([dict(item, url="https://www.publico.pt/2024/10/01/farense?utm_source=gn")])
+    store.sync_news([dict(item, url="https://publico.pt/2024/10/01/farense/amp")])
+
+    assert len(store.latest_news()) == 1
+    assert [n["title"] for n in store.latest_news(text="farense")] == ["Farense vence"]
+
+def test_export_with_dates_matches_published_export(store):
+    store.sync_events([_event(1, "cmf", "A", day=9), _event(2, "viralagenda", "B", day=8),
+                       _event(3, "cmf", "Sem data", _start=None, _end=None)])
+
+    with_dates = store.export_events(with_dates=True)
+
+    assert [e["_start"] for e in with_dates] == [datetime(2025, 11, 8), datetime(2025, 11, 9), None]
+    assert [{k: v for k, v in e.items() if not k.startswith("_")} for e in with_dates] == store.export_events()
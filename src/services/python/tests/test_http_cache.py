@@ -0,0 +1,88 @@
+import os
+import sys
+from datetime import datetime
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_cache
+
+URL = "https://www.cm-faro.pt/pt/agenda.aspx"
+
+
+class FakeServer:
+    """Substitui http_client.get: responde 304 quando o ETag enviado ainda é o atual."""
+
+    def __init__(self, body="<html>v1</html>", etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        response = requests.Response()
+        response.url = url
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = self.body.encode("utf-8")
+            response.encoding = "utf-8"
+            if self.etag:
+                response.headers["ETag"] = self.etag
+        return response
+
+def _cache(tmp_path, monkeypatch, server, enabled=True):
+    monkeypatch.setattr(http_cache.http_client, "get", server.get)
+    return http_cache.HttpCache(cache_dir=str(tmp_path), enabled=enabled)
+
+def test_second_fetch_is_conditional_and_reuses_the_body(tmp_path, monkeypatch):
+    server = FakeServer()
+    cache = _cache(tmp_path, monkeypatch, server)
+    first = cache.fetch(URL)
+    assert (first.status_code, first.text, first.not_modified) == (200, "<html>v1</html>", False)
+    second = cache.fetch(URL)
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert (second.status_code, second.text, second.not_modified) == (200, "<html>v1</html>", True)
+
+def test_parsed_events_survive_304_and_are_dropped_on_new_body(tmp_path, monkeypatch):
+    server = FakeServer()
+    cache = _cache(tmp_path, monkeypatch, server)
+    cache.fetch(URL)
+    events = [{"title": "Concerto", "start": datetime(2025, 4, 12)}]
+    cache.store_parsed(URL, events, variant="2025-04-01")
+    cache.fetch(URL)
+    assert cache.load_parsed(URL, variant="2025-04-01") == events # datetime volta como datetime
+    assert cache.load_parsed(URL) is None
+
+    server.body, server.etag = "<html>v2</html>", '"v2"'
+    assert cache.fetch(URL).text == "<html>v2</html>"
+    assert cache.load_parsed(URL, variant="2025-04-01") is None
+
+def test_responses_without_validators_are_not_cached(tmp_path, monkeypatch):
+    server = FakeServer(etag=None)
+    cache = _cache(tmp_path, monkeypatch, server)
+    cache.fetch(URL)
+    cache.store_parsed(URL, [{"title": "x"}])
+    cache.fetch(URL)
+    assert "If-None-Match" not in server.requests[1]
+    assert cache.load_parsed(URL) is None
+    assert os.listdir(tmp_path) == []
+
+def test_corrupt_entry_is_ignored(tmp_path, monkeypatch):
+    server = FakeServer()
+    cache = _cache(tmp_path, monkeypatch, server)
+    with open(cache._entry_path(URL), "w", encoding="utf-8") as f:
+        f.write("{corrompido")
+    assert cache.fetch(URL).not_modified is False
+    assert "If-None-Match" not in server.requests[0]
+
+def test_disabled_cache_always_does_full_requests(tmp_path, monkeypatch):
+    server = FakeServer()
+    cache = _cache(tmp_path, monkeypatch, server, enabled=False)
+    cache.fetch(URL)
+    cache.fetch(URL)
+    assert all("If-None-Match" not in headers for headers in server.requests)
+    assert os.listdir(tmp_path) == []
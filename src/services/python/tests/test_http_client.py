@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client
+import rate_limit
+
+URL = "https://www.cm-faro.pt/pt/agenda.aspx"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(http_client.time, "sleep", clock.sleep)
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+def _response(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b"ok"
+    response.url = URL
+    return response
+
+def _client(monkeypatch, outcomes, max_retries=3):
+    """Cliente cuja sessão devolve (ou levanta) os `outcomes` por ordem."""
+    client = http_client.HttpClient(max_retries=max_retries, limiter=rate_limit.HostRateLimiter(rate=1000, burst=1000))
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _response(outcome)
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+    return client, calls
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = http_client.CircuitBreaker(threshold=2, cooldown=60)
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 60
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow() # Só um pedido de teste de cada vez
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_retries_transient_errors_and_statuses(clock, monkeypatch):
+    client, calls = _client(monkeypatch, [requests.exceptions.ConnectionError("reset"), 503, 200])
+
+    response = client.get(URL, rate_limited=False)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert client.summary()["www.cm-faro.pt"]["retries"] == 2
+    assert client.breaker_for("www.cm-faro.pt").state == "closed"
+
+def test_client_errors_are_returned_without_retry(clock, monkeypatch):
+    client, calls = _client(monkeypatch, [404])
+
+    assert client.get(URL, rate_limited=False).status_code == 404
+    assert len(calls) == 1
+
+def test_non_transient_request_error_is_raised_at_once(clock, monkeypatch):
+    client, calls = _client(monkeypatch, [requests.exceptions.TooManyRedirects("loop")])
+
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        client.get(URL, rate_limited=False)
+    assert len(calls) == 1
+
+def test_failed_probe_with_other_request_error_does_not_wedge_the_breaker(clock, monkeypatch):
+    outcomes = [requests.exceptions.TooManyRedirects("loop"), 200]
+    client, _ = _client(monkeypatch, outcomes)
+    breaker = client.breaker_for("www.cm-faro.pt")
+    breaker.failures, breaker.opened_at = http_client.BREAKER_THRESHOLD, clock.now - http_client.BREAKER_COOLDOWN
+
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        client.get(URL, rate_limited=False) # Pedido de teste falha: volta a open
+    assert breaker.state == "open"
+
+    clock.now += http_client.BREAKER_COOLDOWN
+    assert client.get(URL, rate_limited=False).status_code == 200
+    assert breaker.state == "closed"
+
+def test_open_circuit_rejects_without_calling_the_host(clock, monkeypatch):
+    client, calls = _client(monkeypatch, [503] * 10, max_retries=10)
+
+    client.get(URL, rate_limited=False) # Abre o circuito ao fim de BREAKER_THRESHOLD falhas
+    with pytest.raises(http_client.CircuitOpenError):
+        client.get(URL, rate_limited=False)
+    assert len(calls) == http_client.BREAKER_THRESHOLD
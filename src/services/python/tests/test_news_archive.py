@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_archive
+
+
+def _batch(start, count, day):
+    """`count` notícias de um lote, da mais recente (start) para a mais antiga, como as grava o gerar_noticias_json."""
+    return [{"title": str(i), "url": f"https://www.jornal.pt/{i}",
+             "publishedAt": f"Tue, {day:02d} Oct 2024 {23 - (i - start):02d}:00:00 GMT"}
+            for i in range(start, start + count)]
+
+def test_latest_returns_newest_articles_across_batches(tmp_path):
+    archive = news_archive.open_archive(str(tmp_path))
+    archive.ingest(_batch(0, 10, 1), now="2024-10-01T10:00:00")
+    archive.ingest(_batch(10, 10, 2), now="2024-10-02T10:00:00")
+
+    assert [item["title"] for item in archive.latest(3)] == ["10", "11", "12"]
+    assert [item["title"] for item in archive.latest(12)] == [str(i) for i in range(10, 20)] + ["0", "1"]
+
+def test_latest_across_segments_and_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_archive, "SEGMENT_MAX_ITEMS", 4)
+    archive = news_archive.open_archive(str(tmp_path))
+    for run in range(3):
+        archive.ingest(_batch(run * 5, 5, run + 1), now=f"2024-10-0{run + 1}T10:00:00")
+
+    reopened = news_archive.open_archive(str(tmp_path))
+    assert reopened.count() == 15
+    assert [item["title"] for item in reopened.latest(2)] == ["10", "11"]
+
+def test_ingest_skips_urls_already_archived(tmp_path):
+    archive = news_archive.open_archive(str(tmp_path))
+    assert archive.ingest(_batch(0, 3, 1), now="2024-10-01T10:00:00") == 3
+    # O mesmo artigo com outro host (m.), tracking e /amp não é uma notícia nova
+    again = [{"title": "0", "url": "https://m.jornal.pt/0/amp?utm_source=gn"}]
+    assert archive.ingest(again, now="2024-10-02T10:00:00") == 0
+    assert archive.count() == 3
+
+def test_rebuild_index_replaces_buckets_and_drops_stale_ones(tmp_path):
+    archive = news_archive.open_archive(str(tmp_path))
+    archive.ingest(_batch(0, 5, 1), now="2024-10-01T10:00:00")
+    stale = tmp_path / news_archive.INDEX_DIRNAME / "zz.txt"
+    stale.write_text("zz00000000000000\n", encoding="utf-8")
+    (tmp_path / news_archive.STATE_FILENAME).unlink()
+
+    reopened = news_archive.open_archive(str(tmp_path)) # Sem state.json: reconstrói o índice
+
+    assert reopened.count() == 5
+    assert not stale.exists()
+    assert not [name for name in os.listdir(tmp_path / news_archive.INDEX_DIRNAME) if name.startswith(".tmp-")]
+    assert reopened.ingest(_batch(0, 5, 1), now="2024-10-02T10:00:00") == 0
@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_dedup
+
+
+def _news(title, url, source, description="", published="Mon, 06 Oct 2025 10:00:00 GMT", image=None):
+    return {"title": title, "url": url, "description": description, "publishedAt": published,
+            "source": {"name": source}, "urlToImage": image}
+
+def test_canonical_news_url_drops_tracking_and_mobile_variants():
+    canonical = news_dedup.canonical_news_url("https://www.publico.pt/2025/10/06/local/noticia?utm_source=x&id=3")
+    assert canonical == news_dedup.canonical_news_url("http://m.publico.pt/2025/10/06/local/noticia/amp?id=3&fbclid=y")
+    assert "utm_source" not in canonical and "id=3" in canonical
+    assert news_dedup.canonical_news_url("https://news.google.com/articles/x?url=https://www.sulinformacao.pt/a") == \
+        news_dedup.canonical_news_url("https://sulinformacao.pt/a")
+    assert news_dedup.canonical_news_url("https://[bad") is None
+    assert news_dedup.canonical_news_url("Sistema") is None
+
+def test_same_article_from_two_searches_is_merged():
+    news = [
+        _news("Faro recebe festival de jazz", "https://www.sulinformacao.pt/jazz?utm_medium=rss", "Sul Informação"),
+        _news("Faro recebe festival de jazz", "https://sulinformacao.pt/jazz", "Sul Informação", image="capa.jpg"),
+    ]
+    stories, merged = news_dedup.cluster_stories(news)
+    assert merged == 1
+    assert stories[0]["urlToImage"] == "capa.jpg"
+    assert "covered_by" not in stories[0] # O mesmo jornal não conta como outra cobertura
+
+def test_near_duplicate_story_in_another_paper_is_merged():
+    news = [
+        _news("Câmara de Faro aprova orçamento de 120 milhões para 2026",
+              "https://www.sulinformacao.pt/orcamento", "Sul Informação",
+              "A Câmara Municipal de Faro aprovou esta segunda-feira o orçamento municipal para 2026."),
+        _news("Câmara de Faro aprova orçamento de 120 milhões de euros para 2026",
+              "https://www.barlavento.pt/orcamento-faro", "Barlavento",
+              "A Câmara Municipal de Faro aprovou esta segunda-feira o orçamento para 2026.",
+              published="Tue, 07 Oct 2025 09:00:00 GMT"),
+    ]
+    stories, merged = news_dedup.cluster_stories(news)
+    assert merged == 1
+    assert stories[0]["url"] == "https://www.sulinformacao.pt/orcamento" # A ordem de entrada é a prioridade
+    assert stories[0]["covered_by"] == [{"name": "Barlavento", "url": "https://www.barlavento.pt/orcamento-faro"}]
+
+def test_similar_titles_with_other_names_or_days_are_kept_apart():
+    description = "A Câmara Municipal aprovou esta segunda-feira o orçamento municipal para 2026."
+    faro = _news("Câmara de Faro aprova orçamento para 2026", "https://a.pt/1", "A", description)
+    loule = _news("Câmara de Loulé aprova orçamento para 2026", "https://b.pt/2", "B", description)
+    later = _news("Câmara de Faro aprova orçamento para 2026", "https://c.pt/3", "C", description,
+                  published="Mon, 20 Oct 2025 10:00:00 GMT")
+    assert news_dedup.cluster_stories([faro, loule])[1] == 0
+    assert news_dedup.cluster_stories([faro, later])[1] == 0
+
+def test_items_without_url_or_text_are_never_merged():
+    empty = [{"title": "", "url": "", "description": ""} for _ in range(3)]
+    stories, merged = news_dedup.cluster_stories(empty)
+    assert merged == 0 and len(stories) == 3
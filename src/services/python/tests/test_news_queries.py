@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_queries
+
+
+def test_load_queries_skips_invalid_entries(tmp_path, capsys):
+    path = tmp_path / "queries.json"
+    path.write_text(json.dumps([
+        {"query": "Faro Algarve", "label": "Faro"},
+        {"query": "Estoi", "max_results": "muitas"},
+        {"query": "Loulé", "timeout": None},
+        {"query": "Olhão", "timeout": -1},
+        {"label": "sem pesquisa"},
+        "Farense",
+    ]), encoding="utf-8")
+
+    queries = news_queries.load_queries(str(path))
+
+    assert [spec["query"] for spec in queries] == ["Faro Algarve", "Farense"]
+    assert capsys.readouterr().err.count("Aviso:") == 4
+
+def test_run_queries_bounds_threads_and_times_out(capsys):
+    release = threading.Event()
+    queries = [{"query": f"q{i}", "label": "Faro", "max_results": 5, "timeout": 0.2} for i in range(4)]
+
+    def fetch(spec):
+        if spec["query"] == "q0":
+            release.wait(5) # Pesquisa pendurada
+        return [{"title": spec["query"]}]
+
+    before = threading.active_count()
+    try:
+        articles, errors = news_queries.run_queries(queries, max_workers=2, fetch=fetch)
+        assert threading.active_count() - before <= 2
+    finally:
+        release.set()
+
+    assert [article["title"] for article in articles] == ["q1", "q2", "q3"]
+    assert all(article["origem_busca"] == "Faro" for article in articles)
+    assert list(errors) == ["q0"] and isinstance(errors["q0"], TimeoutError)
@@ -0,0 +1,39 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pt_dates
+
+
+@pytest.mark.parametrize("text", ["12 abr 2025", "12 ABR. 2025", "12 de abril de 2025", "12 Abril 2025"])
+def test_parse_date_accepts_the_agenda_formats(text):
+    assert pt_dates.parse_date(text) == datetime(2025, 4, 12)
+
+@pytest.mark.parametrize("text", ["", "Sem data", "Erro ao ler", "31 fev 2025", "12 foo 2025"])
+def test_parse_date_rejects_placeholders_and_invalid_dates(text):
+    assert pt_dates.parse_date(text) is None
+
+def test_parse_date_uses_default_year_and_month_variants():
+    assert pt_dates.parse_date("12 mar", default_year=2026) == datetime(2026, 3, 12)
+    assert pt_dates.parse_date("12 mar") is None
+    assert pt_dates.parse_date("15 sept 2024") == datetime(2024, 9, 15)
+
+@pytest.mark.parametrize("text, expected", [
+    ("12 abr 2025", (datetime(2025, 4, 12), datetime(2025, 4, 12))),
+    ("15 ago 2024 - 29 jun 2025", (datetime(2024, 8, 15), datetime(2025, 6, 29))),
+    ("3 – 7 mai 2025", (datetime(2025, 5, 3), datetime(2025, 5, 7))),
+    ("28 dez - 3 jan 2026", (datetime(2025, 12, 28), datetime(2026, 1, 3))),
+    ("12 ABR 2025 - Hoje!", (datetime(2025, 4, 12), datetime(2025, 4, 12))),
+    ("Sem data", (None, None)),
+])
+def test_parse_range(text, expected):
+    assert pt_dates.parse_range(text) == expected
+
+def test_formatting_does_not_depend_on_locale():
+    value = datetime(2025, 3, 1)
+    assert pt_dates.format_date(value) == "01 mar 2025"
+    assert pt_dates.strftime_pt(value, "%A, %d de %B %%") == "sábado, 01 de março %"
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limit
+
+
+class FakeClock:
+    """Substitui time.monotonic/time.sleep do rate_limit: sleep avança o relógio sem esperar."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", fake.sleep)
+    return fake
+
+def test_burst_is_free_then_requests_are_spaced_by_rate(clock):
+    bucket = rate_limit.TokenBucket(rate=2, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+
+def test_tokens_refill_up_to_burst(clock):
+    bucket = rate_limit.TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60 # Muito tempo parado não acumula mais do que `burst` tokens
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+def test_invalid_rate_is_rejected():
+    with pytest.raises(ValueError):
+        rate_limit.TokenBucket(rate=0)
+
+def test_hosts_have_independent_buckets(clock):
+    limiter = rate_limit.HostRateLimiter(rate=1, burst=1, overrides={"www.cm-faro.pt": (4, 2)})
+    assert limiter.acquire("https://www.cm-faro.pt/agenda") == 0.0
+    assert limiter.acquire("https://www.viralagenda.com/pt/faro") == 0.0 # Outro host não espera
+    assert limiter.bucket_for("https://WWW.CM-FARO.PT/x").rate == 4.0
+    assert limiter.bucket_for("https://www.viralagenda.com/y").burst == 1
+
+def test_configure_host_keeps_state_when_unchanged(clock):
+    limiter = rate_limit.HostRateLimiter(rate=1, burst=1)
+    bucket = limiter.bucket_for("https://a.pt/")
+    limiter.configure_host("https://a.pt/", 1, 1)
+    assert limiter.bucket_for("https://a.pt/") is bucket
+    limiter.configure_host("https://a.pt/", 5, 2)
+    assert limiter.bucket_for("https://a.pt/").rate == 5.0
@@ -0,0 +1,15 @@
+# --- Imports ---
+import re
+import unicodedata
+
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold_accents(text):
+    """Minúsculas e sem acentos: 'Exposição MARÇO' -> 'exposicao marco'."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def normalize_text(text):
+    """fold_accents + pontuação convertida em espaços simples (para comparar títulos)."""
+    return NON_ALNUM.sub(" ", fold_accents(text)).strip()
@@ -14,6 +14,7 @@ export interface NewsItem {
   publishedAt: string;
   content: string | null;
   origem_busca?: string; // Campo opcional para rastrear a origem da notícia
+  covered_by?: { name: string; url: string }[]; // Outros jornais com a mesma história (news_dedup)
 }
 
 export interface NewsResponse {
@@ -7,14 +7,18 @@ Este script lê o ficheiro requirements.txt, verifica as versões mais recentes
 de cada biblioteca no PyPI e atualiza o ficheiro com as versões mais recentes.
 """
 
+import os
 import re
-import requests
 import sys
 from packaging import version
 from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import time
 
+# Cliente HTTP partilhado (pool de ligações, tentativas com backoff, circuit breaker)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "services", "python"))
+import http_client
+
 # Cores para output no terminal
 class Colors:
     HEADER = '\033[95m'
@@ -38,7 +42,7 @@ def get_latest_version(package_name):
     """
     try:
         url = f"https://pypi.org/pypi/{package_name}/json"
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, timeout=10, rate_limited=False)
         
         if response.status_code == 200:
             data = response.json()